@@ -0,0 +1,172 @@
+"""Benchmarks of the ScheduledTask search
+
+Covers both search engines, all three strategies, dense and sparse rules, list and range
+candidates, forward and backward search and batch enumeration. Reports calls per second and
+search iterations per call. Speed is also reported relative to a fixed workload that doesn't use the package,
+measured in the same run, so the baseline can be checked on other machines.
+
+Usage:
+    python benchmarks/benchmark.py                       Run and print the results
+    python benchmarks/benchmark.py --save                Run and store the results as the baseline
+    python benchmarks/benchmark.py --check               Run and fail if any case regressed against the baseline
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from statistics import median
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scheduledtask import ScheduledTask  # noqa: E402
+from scheduledtask.scheduledtask import SearchEngine  # noqa: E402
+from scheduledtask.stats import StatsCollector  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+REFERENCES = [datetime(2016, 1, 1) + timedelta(minutes=7919 * i) for i in range(100)]
+
+SCHEDULES = [
+    # (name, rules)
+    ('days_of_month-dense-list', dict(minutes=[0, 15, 30, 45])),
+    ('days_of_month-dense-range', dict(minutes=range(0, 60, 5), hours=range(8, 18))),
+    ('days_of_month-sparse-list', dict(minutes=[0], hours=[0], days=[31], months=[1, 7])),
+    ('days_of_month-sparse-range', dict(minutes=[30], hours=[4], days=range(1, 32, 10), years=range(2000, 9999, 3))),
+    ('days_of_week-dense-list', dict(minutes=[0, 30], days_of_week=[0, 1, 2, 3, 4])),
+    ('days_of_week-sparse-range', dict(minutes=[0], hours=[0], days_of_week=[6], weeks=range(4, 6))),
+    ('days_of_week_num-dense-range', dict(minutes=range(0, 60, 10), days_of_week=range(0, 7, 2),
+                                          days_of_week_num=range(0, 5))),
+    ('days_of_week_num-sparse-list', dict(minutes=[0], hours=[0], days_of_week=[2], days_of_week_num=[4],
+                                          months=[2], years=range(1848, 9999, 4))),
+    ('seconds-dense-range', dict(seconds=range(0, 60, 10))),
+    ('seconds-sparse-list', dict(seconds=[15], minutes=[0], hours=[9], days_of_week=[0])),
+]
+
+
+def count_iterations(task: ScheduledTask, operation):
+    """Runs operation once and returns number of search iterations it performed
+    """
+    task.stats = StatsCollector()
+    try:
+        operation()
+    finally:
+        iterations = task.stats.iterations
+        task.stats = None
+    return iterations
+
+
+def cases():
+    """Yields (name, task, operation, calls per operation)
+    """
+    for (name, rules), engine in [(schedule, engine) for engine in SearchEngine for schedule in SCHEDULES]:
+        name = engine.name + '-' + name
+        task = ScheduledTask(max_iterations=10000, engine=engine, **rules)
+        yield name + '-next', task, lambda task=task: [task.get_next_time(r) for r in REFERENCES], len(REFERENCES)
+        yield name + '-previous', task, \
+            lambda task=task: [task.get_previous_time(r) for r in REFERENCES], len(REFERENCES)
+        yield name + '-iter', task, lambda task=task: list(task.iter_next_times(REFERENCES[0], count=100)), 100
+        yield name + '-batch', task, lambda task=task: task.get_next_times(REFERENCES), len(REFERENCES)
+
+
+def calibrate(operation, min_seconds: float = 0.05):
+    """Returns number of operations in a timing run that takes at least min_seconds, as single runs of short
+       operations are dominated by noise
+    """
+    number = 1
+    while timeit.timeit(operation, number=number) < min_seconds:
+        number *= 2
+    return number
+
+
+def reference_workload():
+    """Fixed workload of datetime arithmetic and dict lookups that doesn't use the package, the unit of
+       relative speed
+    """
+    counts = {}
+    for i in range(20000):
+        day = (REFERENCES[i % len(REFERENCES)] + timedelta(minutes=i)).day
+        counts[day] = counts.get(day, 0) + 1
+    return counts
+
+
+def measure(operation, reference_number: int, repeat: int):
+    """Returns (best seconds per operation, median speed relative to the reference workload). The reference is
+       timed right before every timing run, so the ratio doesn't depend on the machine or its current load
+    """
+    number = calibrate(operation)
+    seconds, ratios = [], []
+    for _ in range(repeat):
+        reference = timeit.timeit(reference_workload, number=reference_number) / reference_number
+        seconds.append(timeit.timeit(operation, number=number) / number)
+        ratios.append(reference / seconds[-1])
+    return min(seconds), median(ratios)
+
+
+def run(repeat: int):
+    reference_number = calibrate(reference_workload)
+    results = {}
+    for name, task, operation, calls in cases():
+        seconds, relative = measure(operation, reference_number, repeat)
+        iterations = count_iterations(task, operation)
+        results[name] = {
+            'ops_per_sec': calls / seconds,
+            'relative_speed': calls * relative,
+            'iterations_per_call': iterations / calls,
+        }
+        print('{:<54} {:>12.0f} ops/sec {:>10.1f} relative {:>8.2f} iterations/call'.format(
+            name, results[name]['ops_per_sec'], results[name]['relative_speed'],
+            results[name]['iterations_per_call']))
+    return results
+
+
+def check(results: dict, baseline: dict, tolerance: float):
+    """Returns list of regressions: relative speed lower by more than tolerance, or more iterations than
+       the baseline
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        if result['relative_speed'] < expected['relative_speed'] * (1 - tolerance):
+            regressions.append('{}: relative speed {:.1f}, baseline {:.1f}'.format(
+                name, result['relative_speed'], expected['relative_speed']))
+        if result['iterations_per_call'] > expected['iterations_per_call']:
+            regressions.append('{}: {:.2f} iterations/call, baseline {:.2f}'.format(
+                name, result['iterations_per_call'], expected['iterations_per_call']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', action='store_true', help="store results as the baseline")
+    parser.add_argument('--check', action='store_true', help="compare results against the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative speed slowdown against the baseline, 0.25 means 25%% (default)")
+    parser.add_argument('--repeat', type=int, default=5, help="number of timing runs, the best one is reported")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    if args.save:
+        baseline = {name: {'relative_speed': round(result['relative_speed'], 2),
+                           'iterations_per_call': result['iterations_per_call']} for name, result in results.items()}
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print("Baseline saved to " + args.baseline)
+
+    if args.check:
+        with open(args.baseline) as f:
+            regressions = check(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
-from .scheduledtask import ScheduledTask
+from .scheduledtask import ScheduledTask, CompiledSchedule, compile_schedule
+from .taskindex import TaskIndex
 
-__all__ = ['ScheduledTask']
+__all__ = ['ScheduledTask', 'CompiledSchedule', 'compile_schedule', 'TaskIndex']
@@ -0,0 +1,142 @@
+import asyncio
+import random
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from .scheduledtask import ScheduledTask
+from .taskindex import TaskIndex
+from .tz import as_utc
+
+
+class OverlapPolicy(Enum):
+    skip = 0  # Don't start a run while the previous one is still running
+    queue = 1  # Start the run after the previous one is finished
+    concurrent = 2  # Start the run right away
+
+
+class Registration:
+    """Coroutine callback registered against a scheduled task. Returned by AsyncRunner.register
+    """
+    __slots__ = ['task', 'callback', 'overlap', 'jitter', 'jobs', 'queued']
+
+    def __init__(self, task: ScheduledTask, callback, overlap: OverlapPolicy, jitter: float):
+        self.task = task
+        self.callback = callback
+        self.overlap = overlap
+        self.jitter = jitter
+        self.jobs = set()  # Running asyncio tasks
+        self.queued = deque()  # Due times waiting for the running job, OverlapPolicy.queue only
+
+    def get_next_time(self, current_datetime: datetime = None):
+        return self.task.get_next_time(current_datetime)
+
+    @property
+    def resolution(self):
+        return self.task.resolution
+
+
+class AsyncRunner:
+    """Runs coroutine callbacks at execution times of their scheduled tasks.
+       All registrations share a single TaskIndex and a single timer that sleeps until the earliest due time
+    """
+    def __init__(self, now=datetime.utcnow):
+        """
+        :param now:Callable returning current datetime, naive datetimes are considered to be UTC
+        """
+        self.now = now
+        self._index = TaskIndex()
+        self._jobs = set()  # Running asyncio tasks of all registrations
+        self._wakeup = None
+        self._running = False
+
+    def register(self, task: ScheduledTask, callback, overlap: OverlapPolicy = OverlapPolicy.skip,
+                 jitter: float = 0):
+        """Registers coroutine function callback(due_time) to be called at every execution time of the task
+        :param overlap:What to do if the task is due while the previous run is still running
+        :param jitter:Maximum random delay of every run, in seconds
+        :return:Registration that can be passed to cancel
+        """
+        registration = Registration(task, callback, overlap, jitter)
+        self._index.add(registration, self.now())
+        self._notify()
+        return registration
+
+    def cancel(self, registration: Registration, cancel_running: bool = False):
+        """Stops scheduling the registration. Optionally cancels its runs that are in progress
+        """
+        if registration in self._index:
+            self._index.remove(registration)
+        registration.queued.clear()
+        if cancel_running:
+            for job in list(registration.jobs):
+                job.cancel()
+        self._notify()
+
+    def stop(self):
+        """Makes run() return. Runs in progress are cancelled
+        """
+        self._running = False
+        self._notify()
+
+    async def run(self):
+        """Fires due registrations until stop() is called
+        """
+        self._wakeup = asyncio.Event()
+        self._running = True
+        try:
+            while self._running:
+                for due_time, registration in self._index.pop_due(self.now()):
+                    self._fire(registration, due_time)
+
+                self._wakeup.clear()
+                next_entry = self._index.peek_next()
+                if next_entry is None:
+                    timeout = None
+                else:
+                    timeout = max(0, (as_utc(next_entry[0]) - as_utc(self.now())).total_seconds())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._running = False
+            jobs = list(self._jobs)
+            for job in jobs:
+                job.cancel()
+            if jobs:
+                await asyncio.wait(jobs)
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _fire(self, registration: Registration, due_time: datetime):
+        if registration.jobs and registration.overlap == OverlapPolicy.skip:
+            return
+        if registration.jobs and registration.overlap == OverlapPolicy.queue:
+            registration.queued.append(due_time)
+            return
+
+        job = asyncio.ensure_future(self._run_job(registration, due_time))
+        registration.jobs.add(job)
+        self._jobs.add(job)
+        job.add_done_callback(lambda finished: self._job_done(registration, finished))
+
+    async def _run_job(self, registration: Registration, due_time: datetime):
+        while True:
+            if registration.jitter:
+                await asyncio.sleep(random.uniform(0, registration.jitter))
+            await registration.callback(due_time)
+            if not registration.queued:
+                return
+            due_time = registration.queued.popleft()
+
+    def _job_done(self, registration: Registration, job):
+        registration.jobs.discard(job)
+        self._jobs.discard(job)
+        if not job.cancelled() and job.exception() is not None:
+            asyncio.get_event_loop().call_exception_handler({
+                'message': 'Exception in scheduled task callback',
+                'exception': job.exception(),
+                'future': job,
+            })
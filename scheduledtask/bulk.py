@@ -0,0 +1,58 @@
+"""Next and previous execution times of many tasks computed across a process pool
+
+The search is CPU-bound Python, so a single process only uses one core. Tasks are sent to worker processes
+in chunks: a pickled task is its rules and settings, and tasks sharing a schedule within a chunk send the
+rules once. Results are yielded chunk by chunk, in the order of the tasks
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice, repeat
+
+
+def bulk_next_times(tasks, current_datetime: datetime = None, max_workers: int = None, chunk_size: int = 2000,
+                    executor=None):
+    """Yields lists of next execution times of the tasks nearest to the given datetime, chunk_size tasks each,
+       in the order of the tasks
+    :param tasks:Iterable of ScheduledTask
+    :param max_workers:Number of worker processes, number of CPUs by default. Ignored if executor is given
+    :param executor:Already running concurrent.futures executor to use instead of a new process pool
+    """
+    return _bulk_times(tasks, current_datetime, +1, max_workers, chunk_size, executor)
+
+
+def bulk_previous_times(tasks, current_datetime: datetime = None, max_workers: int = None, chunk_size: int = 2000,
+                        executor=None):
+    """Yields lists of previous execution times of the tasks nearest to the given datetime, see bulk_next_times
+    """
+    return _bulk_times(tasks, current_datetime, -1, max_workers, chunk_size, executor)
+
+
+def _bulk_times(tasks, current_datetime: datetime, increment: int, max_workers: int, chunk_size: int, executor):
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if current_datetime is None:
+        current_datetime = datetime.utcnow()  # Same reference time for every worker
+
+    chunks = _chunks(tasks, chunk_size)
+    if executor is not None:
+        yield from executor.map(_get_times, chunks, repeat(current_datetime), repeat(increment))
+        return
+    with ProcessPoolExecutor(max_workers) as executor:
+        yield from executor.map(_get_times, chunks, repeat(current_datetime), repeat(increment))
+
+
+def _chunks(tasks, chunk_size: int):
+    tasks = iter(tasks)
+    while True:
+        chunk = list(islice(tasks, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _get_times(tasks: list, current_datetime: datetime, increment: int):
+    """Runs in the worker process
+    """
+    if increment > 0:
+        return [task.get_next_time(current_datetime) for task in tasks]
+    return [task.get_previous_time(current_datetime) for task in tasks]
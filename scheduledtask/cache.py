@@ -0,0 +1,101 @@
+from bisect import bisect_right, insort
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from time import monotonic
+from .tz import as_utc
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class OccurrenceCache:
+    """LRU cache of intervals between two adjacent task execution times.
+       An interval (previous, next) means that the task is not executed anywhere strictly between previous and next,
+       so any reference time inside of it is answered without searching.
+       previous / next is None if there's no execution before / after the interval
+    """
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._keys = []  # Sorted (start, end) keys, used to find the interval containing the reference
+        self._intervals = OrderedDict()  # (start, end) -> (previous, next), in LRU order
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def lookup(self, reference: datetime):
+        """Returns (previous, next) interval that contains the reference, or None if it's not cached
+        """
+        i = bisect_right(self._keys, (reference, datetime.max)) - 1
+        if i >= 0 and self._keys[i][1] >= reference:
+            key = self._keys[i]
+            self._intervals.move_to_end(key)
+            self.hits += 1
+            return self._intervals[key]
+        self.misses += 1
+        return None
+
+    def store(self, previous: datetime, next: datetime):
+        """Remembers that the task is not executed strictly between previous and next
+        """
+        key = (previous if previous is not None else datetime.min, next if next is not None else datetime.max)
+        if key in self._intervals:
+            self._intervals.move_to_end(key)
+            return
+        if len(self._intervals) >= self.maxsize:
+            evicted, _ = self._intervals.popitem(last=False)
+            del self._keys[bisect_right(self._keys, evicted) - 1]
+        self._intervals[key] = (previous, next)
+        insort(self._keys, key)
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+        self._keys = []
+        self._intervals.clear()
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._intervals))
+
+
+class MonotonicDeadline:
+    """Next execution time of a task kept as a deadline of the monotonic clock. Checking it reads neither the wall
+       clock nor the schedule, and jumps of the wall clock (i.e. NTP corrections) don't make an execution time
+       due early, late or twice: the wall clock is only read to compute the next deadline once the current one passes
+    """
+    __slots__ = ['task', 'now', 'monotonic', 'next_time', 'deadline']
+
+    def __init__(self, task, now=datetime.utcnow, monotonic=monotonic):
+        """
+        :param task:ScheduledTask
+        :param now:Callable returning current wall clock datetime, in the same timezone the task is defined in
+        :param monotonic:Callable returning monotonic clock seconds
+        """
+        self.task = task
+        self.now = now
+        self.monotonic = monotonic
+        current_datetime = self.now()
+        self._schedule(current_datetime, current_datetime)
+
+    def _schedule(self, reference: datetime, current_datetime: datetime):
+        """Sets deadline to the next execution time nearest to the reference, counted from the current datetime
+        """
+        self.next_time = self.task.get_next_time(reference)
+        if self.next_time is None:
+            self.deadline = float('inf')
+        else:
+            self.deadline = self.monotonic() + (as_utc(self.next_time) - as_utc(current_datetime)).total_seconds()
+
+    def pop_due(self):
+        """Returns the execution time that is due, None if it's not due yet. Every due time is returned once,
+           the deadline then moves to the next execution time after both the due time and the wall clock
+        """
+        if self.monotonic() < self.deadline:
+            return None
+        due_time = self.next_time
+        current_datetime = self.now()
+        following = as_utc(due_time) + self.task.resolution
+        self._schedule(max(as_utc(current_datetime), following), current_datetime)
+        return due_time
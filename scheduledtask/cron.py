@@ -0,0 +1,153 @@
+"""Parser of cron expressions into ScheduledTask rules
+
+Supported fields: minute, hour, day of month, month, day of week and optional year.
+Every field supports *, ?, values, names (JAN-DEC, SUN-SAT), ranges (a-b), steps (*/s, a/s, a-b/s) and lists.
+Day of month also supports L (last day), L-n (n days before the last day), nW (weekday nearest to day n)
+and LW (last weekday). Day of week also supports nL (last weekday n of month) and n#k (k-th weekday n of month)
+"""
+
+MONTH_NAMES = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+DAY_OF_WEEK_NAMES = ['SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
+
+MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+
+def normalize_cron(expression: str):
+    """Returns the expression with macros expanded, names and whitespace normalized.
+       Equal expressions produce the same ScheduledTask rules
+    """
+    expression = expression.strip()
+    expression = MACROS.get(expression.lower(), expression)
+    return ' '.join(expression.upper().split())
+
+
+def parse_cron(expression: str):
+    """Parses cron expression into ScheduledTask keyword arguments.
+       Fields that are not restricted are omitted, ranges with a step are kept as range objects
+    """
+    fields = normalize_cron(expression).split(' ')
+    if len(fields) not in (5, 6):
+        raise ValueError("cron expression must have 5 or 6 fields: {!r}".format(expression))
+    minute, hour, day, month, day_of_week = fields[:5]
+
+    rules = {}
+    _set_rule(rules, 'minutes', _parse_field(minute, 0, 59))
+    _set_rule(rules, 'hours', _parse_field(hour, 0, 23))
+    _set_rule(rules, 'months', _parse_field(month, 1, 12, MONTH_NAMES, 1))
+    if len(fields) == 6:
+        _set_rule(rules, 'years', _parse_field(fields[5], 1, 9999))
+
+    day_restricted = day not in ('*', '?')
+    day_of_week_restricted = day_of_week not in ('*', '?')
+    if day_restricted and day_of_week_restricted:
+        raise ValueError("cron expressions restricting both day of month and day of week are not supported: "
+                         "{!r}".format(expression))
+    if day_restricted:
+        rules.update(_parse_day(day))
+    if day_of_week_restricted:
+        rules.update(_parse_day_of_week(day_of_week))
+    return rules
+
+
+def _set_rule(rules: dict, name: str, candidates):
+    if candidates is not None:
+        rules[name] = candidates
+
+
+def _parse_value(value: str, names: list = None, names_start: int = 0):
+    if names is not None and value in names:
+        return names.index(value) + names_start
+    if not value.isdigit():
+        raise ValueError("invalid cron value: {!r}".format(value))
+    return int(value)
+
+
+def _parse_part(part: str, min_value: int, max_value: int, names: list = None, names_start: int = 0):
+    """Parses a single element of a list into a range
+    """
+    if '/' in part:
+        part, step = part.split('/', 1)
+        step = _parse_value(step)
+        if step < 1:
+            raise ValueError("cron step must be positive: {!r}".format(step))
+    else:
+        step = 1
+
+    if part in ('*', '?'):
+        start, stop = min_value, max_value
+    elif '-' in part:
+        start, stop = part.split('-', 1)
+        start, stop = _parse_value(start, names, names_start), _parse_value(stop, names, names_start)
+    else:
+        start = _parse_value(part, names, names_start)
+        stop = max_value if step != 1 else start  # a/s means from a to the maximum value
+
+    if start < min_value or stop > max_value or start > stop:
+        raise ValueError("cron range {}-{} is out of bounds {}-{}".format(start, stop, min_value, max_value))
+    return range(start, stop + 1, step)
+
+
+def _parse_field(field: str, min_value: int, max_value: int, names: list = None, names_start: int = 0):
+    """Parses a field into None (every value), range or list of values
+    """
+    if field in ('*', '?'):
+        return None
+    parts = [_parse_part(part, min_value, max_value, names, names_start) for part in field.split(',')]
+    if len(parts) == 1 and len(parts[0]) > 1:
+        return parts[0]
+    return sorted(set(value for part in parts for value in part))
+
+
+def _parse_day(field: str):
+    """Parses day of month field, including L and W
+    """
+    if field in ('L', 'LW'):
+        return {'days': [-1], 'nearest_weekday': field == 'LW'}
+    if field.startswith('L-'):
+        return {'days': [-1 - _parse_value(field[2:])]}
+    if field.endswith('W'):
+        day = _parse_value(field[:-1])
+        if not 1 <= day <= 31:
+            raise ValueError("cron day is out of bounds 1-31: {!r}".format(field))
+        return {'days': [day], 'nearest_weekday': True}
+    return {'days': _parse_field(field, 1, 31)}
+
+
+def _parse_day_of_week(field: str):
+    """Parses day of week field, including L and #. Cron counts days of week from Sunday (0 or 7),
+       ScheduledTask from Monday (0)
+    """
+    if 'L' not in field.replace('LW', '') and '#' not in field:
+        days_of_week = _parse_field(field, 0, 7, DAY_OF_WEEK_NAMES)
+        return {'days_of_week': sorted(set((day_of_week + 6) % 7 for day_of_week in days_of_week))}
+
+    # Every element must then be nL or n#k with the same L / k, since rules are a product of weekdays and numbers
+    days_of_week = []
+    days_of_week_nums = set()
+    for part in field.split(','):
+        if part.endswith('L'):
+            day_of_week, day_of_week_num = part[:-1], -1
+        elif '#' in part:
+            day_of_week, day_of_week_num = part.split('#', 1)
+            day_of_week_num = _parse_value(day_of_week_num) - 1
+            if not 0 <= day_of_week_num <= 4:
+                raise ValueError("cron day of week number is out of bounds 1-5: {!r}".format(part))
+        else:
+            raise ValueError("cron day of week can't mix plain values with L or #: {!r}".format(field))
+        day_of_week = _parse_value(day_of_week, DAY_OF_WEEK_NAMES)
+        if day_of_week > 7:
+            raise ValueError("cron day of week is out of bounds 0-7: {!r}".format(part))
+        days_of_week.append((day_of_week + 6) % 7)
+        days_of_week_nums.add(day_of_week_num)
+
+    if len(days_of_week_nums) != 1:
+        raise ValueError("cron day of week elements must share the same L or # number: {!r}".format(field))
+    return {'days_of_week': sorted(set(days_of_week)), 'days_of_week_num': list(days_of_week_nums)}
@@ -0,0 +1,149 @@
+from datetime import datetime
+from .scheduledtask import CompiledSchedule, ScheduleMasks, RULE_NAMES, get_schedule
+from .utils import num_days_in_month, week_num, weekday_num
+
+# Number of values of every mask of ScheduleMasks
+FIELD_SIZES = ScheduleMasks(minutes=60, hours=24, days=31, days_from_end=31, months=12, days_of_week=7, weeks=6,
+                            days_of_week_num=5, days_of_week_num_from_end=5, exact=None)
+_YEARS = RULE_NAMES.index('years')
+
+
+class TaskMatcher:
+    """Inverted index answering which tasks are executed at a given minute.
+       For every value of every fraction (see ScheduleMasks) it keeps a bitset of ids of the tasks matching it,
+       as an integer like CandidateSet does. Tasks matching every value of a fraction are kept in a single bitset
+       of that fraction instead, so a task usually takes a few bits. A tick intersects one bitset per fraction.
+       Tasks with year rules or nearest weekday are confirmed by their schedule after the intersection.
+       Tasks with timezone are not supported, times are in the time of the rules
+    """
+    def __init__(self):
+        self._values = {field: [0] * size for field, size in zip(ScheduleMasks._fields, FIELD_SIZES[:-1])}
+        self._full = dict.fromkeys(ScheduleMasks._fields[:-1], 0)  # Field -> tasks matching every value
+        self._alive = 0
+        self._irregular = {}  # Id -> CompiledSchedule of tasks confirmed by the schedule
+        self._size = 0
+
+    def __len__(self):
+        return bin(self._alive).count('1')
+
+    def __contains__(self, task_id: int):
+        return bool(self._alive >> task_id & 1)
+
+    def add(self, task):
+        """Adds ScheduledTask or CompiledSchedule, returns its id
+        """
+        return self.add_many([task])[0]
+
+    def add_many(self, tasks):
+        """Adds many ScheduledTasks or CompiledSchedules, returns list of their ids. Ids are numbered in the order
+           the tasks are added, removed ids are not reused. Every bitset is updated once for all of the tasks
+        """
+        fields = ScheduleMasks._fields[:-1]
+        values = {field: {} for field in fields}  # Field -> value -> new ids
+        full = {field: [] for field in fields}
+        packed = {}  # Schedule -> unpacked masks, tasks sharing a schedule are unpacked once
+        ids = []
+        for task in tasks:
+            schedule = get_schedule(task)
+            task_id = self._size + len(ids)
+            ids.append(task_id)
+            unpacked = packed.get(schedule)
+            if unpacked is None:
+                unpacked = packed[schedule] = _unpack(schedule)
+            fields_values, irregular = unpacked
+            for field, field_values in fields_values:
+                if field_values is None:
+                    full[field].append(task_id)
+                else:
+                    for value in field_values:
+                        values[field].setdefault(value, []).append(task_id)
+            if irregular:
+                self._irregular[task_id] = schedule
+
+        for field in fields:
+            for value, value_ids in values[field].items():
+                self._values[field][value] |= _bitset(value_ids)
+            if full[field]:
+                self._full[field] |= _bitset(full[field])
+        if ids:
+            self._alive |= _bitset(ids)
+        self._size += len(ids)
+        return ids
+
+    def remove(self, task_id: int):
+        """Removes the task and clears its bit in every bitset. Raises KeyError if there's no such task
+        """
+        if task_id not in self:
+            raise KeyError(task_id)
+        keep = ~(1 << task_id)
+        self._alive &= keep
+        for field_values in self._values.values():
+            for value, bits in enumerate(field_values):
+                if bits >> task_id & 1:
+                    field_values[value] = bits & keep
+        for field, bits in self._full.items():
+            self._full[field] = bits & keep
+        self._irregular.pop(task_id, None)
+
+    def match(self, current_datetime: datetime):
+        """Returns sorted list of ids of the tasks executed within the minute of the given datetime
+        """
+        year, month, day = current_datetime.year, current_datetime.month, current_datetime.day
+        from_end = num_days_in_month(year, month) - day
+        values, full = self._values, self._full
+
+        matched = self._alive
+        matched &= values['minutes'][current_datetime.minute] | full['minutes']
+        matched &= values['hours'][current_datetime.hour] | full['hours']
+        matched &= values['months'][month - 1] | full['months']
+        matched &= values['days'][day - 1] | full['days'] | values['days_from_end'][from_end] | full['days_from_end']
+        matched &= values['days_of_week'][current_datetime.weekday()] | full['days_of_week']
+        matched &= values['weeks'][week_num(current_datetime)] | full['weeks']
+        matched &= values['days_of_week_num'][weekday_num(current_datetime)] | full['days_of_week_num'] \
+            | values['days_of_week_num_from_end'][from_end // 7] | full['days_of_week_num_from_end']
+        if not matched:
+            return []
+
+        bits = bin(matched)[:1:-1]  # Lowest bit first
+        ids = []
+        task_id = bits.find('1')
+        while task_id >= 0:
+            schedule = self._irregular.get(task_id)
+            if schedule is None or _schedule_matches(schedule, year, month, day):
+                ids.append(task_id)
+            task_id = bits.find('1', task_id + 1)
+        return ids
+
+
+def _unpack(schedule: CompiledSchedule):
+    """Returns ([(field, values of the mask or None if all of them are set)], whether the schedule is irregular)
+    """
+    masks = schedule.masks()
+    fields_values = []
+    for field, mask, size in zip(ScheduleMasks._fields, masks, FIELD_SIZES[:-1]):
+        if mask == (1 << size) - 1:
+            fields_values.append((field, None))
+        else:
+            field_values = []
+            while mask:
+                lowest = mask & -mask
+                field_values.append(lowest.bit_length() - 1)
+                mask ^= lowest
+            fields_values.append((field, field_values))
+    return fields_values, not masks.exact or schedule.rules[_YEARS] is not None
+
+
+def _bitset(ids: list):
+    """Returns integer with bits of the ids set
+    """
+    bits = bytearray(b'0') * (max(ids) + 1)
+    for task_id in ids:
+        bits[task_id] = 49  # '1'
+    return int(bits[::-1], 2)
+
+
+def _schedule_matches(schedule: CompiledSchedule, year: int, month: int, day: int):
+    if year not in schedule.candidate_sets[schedule.fractions.year.value]:
+        return False
+    month_days = schedule.month_days(year, month)
+    return month_days is not None and day in month_days
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from enum import Enum
+
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class MisfirePolicy(Enum):
+    skip = 0  # Don't run the missed runs
+    fire_once = 1  # Run once, for the last missed run
+    fire_all = 2  # Run every missed run
+
+
+class MissedRuns:
+    """Execution times of a task missed after its last run, up to the current time (inclusive).
+       Count, first and last missed run are computed without stepping through the missed runs,
+       iterating yields them lazily. Returned by ScheduledTask.get_missed_runs
+    """
+    __slots__ = ['task', 'last_run', 'current_datetime', 'count', 'first', 'last']
+
+    def __init__(self, task, last_run: datetime, current_datetime: datetime):
+        self.task = task
+        self.last_run = last_run
+        self.current_datetime = current_datetime
+        self.count = task.count_between(last_run + _MICROSECOND, current_datetime + _MICROSECOND)
+        if self.count:
+            self.first = next(iter(self))
+            # Reverse search bounded by the first missed run, so last is one of the counted runs
+            self.last = self.first if self.count == 1 else \
+                next(task.iter_previous_times(current_datetime, until=self.first), self.first)
+        else:
+            self.first = self.last = None
+
+    def __iter__(self):
+        return self.task.occurrences_between(self.last_run + _MICROSECOND, self.current_datetime + _MICROSECOND)
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __repr__(self):
+        return "MissedRuns(count={}, first={!r}, last={!r})".format(self.count, self.first, self.last)
+
+    def due_times(self, policy: MisfirePolicy):
+        """Returns iterator of the missed execution times to run according to the policy
+        """
+        if policy == MisfirePolicy.skip or not self.count:
+            return iter(())
+        if policy == MisfirePolicy.fire_once:
+            return iter((self.last,))
+        if policy == MisfirePolicy.fire_all:
+            return iter(self)
+        raise ValueError("unknown misfire policy: {!r}".format(policy))
@@ -0,0 +1,138 @@
+"""Columnar registry of many schedules, requires NumPy
+
+Every schedule is a row of packed bitmasks instead of a ScheduledTask object: minutes (60 bits), hours (24 bits),
+days of month counted from the start and from the end (31 bits each), months (12 bits), days of week (7 bits),
+weeks (6 bits), day of week numbers counted from the start and from the end (5 bits each) and the year range.
+The day rules of every strategy are expressed with the same columns, strategies only differ by the masks
+that are left full. A row takes 33 bytes, and finding the tasks executed at a minute is one vectorized pass
+"""
+from datetime import datetime
+import numpy
+from .scheduledtask import CompiledSchedule, get_schedule
+from .utils import num_days_in_month, week_num, weekday_num
+
+COLUMNS = (
+    ('minutes', numpy.uint64),
+    ('hours', numpy.uint32),
+    ('days', numpy.uint32),  # Bit 0 is the 1st
+    ('days_from_end', numpy.uint32),  # Bit 0 is the last day
+    ('months', numpy.uint16),  # Bit 0 is January
+    ('days_of_week', numpy.uint8),
+    ('weeks', numpy.uint8),
+    ('days_of_week_num', numpy.uint8),
+    ('days_of_week_num_from_end', numpy.uint8),  # Bit 0 is the last such weekday of month
+    ('first_year', numpy.int16),
+    ('last_year', numpy.int16),
+    ('year_step', numpy.int16),
+    ('flags', numpy.uint8),
+)
+
+_ALIVE = 1
+_IRREGULAR = 2  # Rules that masks can't express (nearest weekday, list of years), checked by the schedule
+
+
+class TaskRegistry:
+    """Rows of packed schedules. Rows are numbered in the order they are added, removed rows are not reused.
+       Tasks with timezone are not supported, times are in the time of the rules
+    """
+    def __init__(self, capacity: int = 1024):
+        self._columns = {name: numpy.zeros(max(capacity, 1), dtype=dtype) for name, dtype in COLUMNS}
+        self._size = 0
+        self._irregular = {}  # Row -> CompiledSchedule, for rows flagged as irregular
+
+    def __len__(self):
+        return int(numpy.count_nonzero(self._columns['flags'][:self._size] & _ALIVE))
+
+    @property
+    def nbytes(self):
+        """Memory taken by the rows, including the preallocated capacity
+        """
+        return sum(column.nbytes for column in self._columns.values())
+
+    def add(self, task):
+        """Adds ScheduledTask or CompiledSchedule, returns its row
+        """
+        return self._append([_pack(get_schedule(task))])[0]
+
+    def add_many(self, tasks):
+        """Adds many ScheduledTasks or CompiledSchedules, returns array of their rows.
+           Tasks of the same schedule are packed once
+        """
+        packed = {}
+        rows = []
+        for task in tasks:
+            schedule = get_schedule(task)
+            row = packed.get(schedule)
+            if row is None:
+                row = packed[schedule] = _pack(schedule)
+            rows.append(row)
+        return numpy.array(self._append(rows), dtype=numpy.int64)
+
+    def remove(self, row: int):
+        """Removes the row. Raises KeyError if there's no such row
+        """
+        if not 0 <= row < self._size or not self._columns['flags'][row] & _ALIVE:
+            raise KeyError(row)
+        self._columns['flags'][row] = 0
+        self._irregular.pop(row, None)
+
+    def due_at(self, current_datetime: datetime):
+        """Returns sorted array of rows of the tasks executed within the minute of the given datetime
+        """
+        columns = {name: column[:self._size] for name, column in self._columns.items()}
+        year, month, day = current_datetime.year, current_datetime.month, current_datetime.day
+        n_days_in_month = num_days_in_month(year, month)
+        from_end = n_days_in_month - day
+
+        due = _has_bit(columns['minutes'], current_datetime.minute)
+        due &= _has_bit(columns['hours'], current_datetime.hour)
+        due &= _has_bit(columns['months'], month - 1)
+        due &= _has_bit(columns['days'], day - 1) | _has_bit(columns['days_from_end'], from_end)
+        due &= _has_bit(columns['days_of_week'], current_datetime.weekday())
+        due &= _has_bit(columns['weeks'], week_num(current_datetime))
+        due &= _has_bit(columns['days_of_week_num'], weekday_num(current_datetime)) \
+            | _has_bit(columns['days_of_week_num_from_end'], from_end // 7)
+        due &= (columns['first_year'] <= year) & (columns['last_year'] >= year) \
+            & ((year - columns['first_year'].astype(numpy.int32)) % columns['year_step'] == 0)
+        due &= (columns['flags'] & _ALIVE).astype(bool)
+
+        irregular = due & (columns['flags'] & _IRREGULAR).astype(bool)
+        for row in numpy.flatnonzero(irregular):
+            schedule = self._irregular[int(row)]
+            month_days = schedule.month_days(year, month)
+            if year not in schedule.candidate_sets[schedule.fractions.year.value] \
+                    or month_days is None or day not in month_days:
+                due[row] = False
+        return numpy.flatnonzero(due)
+
+    def _append(self, packed_rows: list):
+        size = self._size + len(packed_rows)
+        capacity = len(self._columns['flags'])
+        if size > capacity:
+            capacity = max(size, capacity * 2)
+            for name, column in self._columns.items():
+                self._columns[name] = numpy.resize(column, capacity)
+
+        rows = list(range(self._size, size))
+        for i, (name, _) in enumerate(COLUMNS):
+            self._columns[name][self._size:size] = [packed[0][i] for packed in packed_rows]
+        for row, (_, schedule) in zip(rows, packed_rows):
+            if schedule is not None:
+                self._irregular[row] = schedule
+        self._size = size
+        return rows
+
+
+def _has_bit(column, bit: int):
+    return (column & column.dtype.type(1 << bit)) != 0
+
+
+def _pack(schedule: CompiledSchedule):
+    """Returns (column values, schedule if irregular otherwise None)
+    """
+    masks = schedule.masks()
+    years = schedule.candidate_sets[schedule.fractions.year.value]
+    irregular = not masks.exact or years.mask is not None
+    values = masks[:-1] + (years.first, years.last, years.step if years.mask is None else 1,
+                           _ALIVE | (_IRREGULAR if irregular else 0))
+    return values, schedule if irregular else None
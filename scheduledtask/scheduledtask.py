@@ -1,15 +1,28 @@
-from datetime import datetime
+from calendar import isleap
+from collections import namedtuple
+from datetime import datetime, timedelta, tzinfo, MINYEAR, MAXYEAR
 from enum import Enum
 from copy import copy
-from .utils import get_biggest_value_less_or_equal_to, get_smallest_value_greater_or_equal_to, last, first, \
-    weekday_num, weekday_and_num_to_day, num_days_in_month, weekday_and_week_to_day, week_num, max_week_num
+from time import perf_counter
+from weakref import WeakValueDictionary
+from .cache import OccurrenceCache
+from .cron import normalize_cron, parse_cron
+from .misfire import MissedRuns
+from .stats import SearchStats, StatsCollector
+from .tz import as_utc, transition_table
+from .utils import CandidateSet, weekday_num, weekday_and_num_to_day, num_days_in_month, weekday_and_week_to_day, \
+    week_num, max_week_num, first_weekday, nearest_weekday
 
 
 class DateTimeHolder:
-    __slots__ = ['minute', 'hour', 'day', 'day_of_week', 'day_of_week_num', 'month', 'week', 'year']
+    """Fractions of a searched date time. Fractions are changed by item, e.g. holder['day'] = 1, so the cached key
+       is invalidated
+    """
+    __slots__ = ['second', 'minute', 'hour', 'day', 'day_of_week', 'day_of_week_num', 'month', 'week', 'year', '_key']
 
     def __init__(self, minute=None, hour=None, day=None, day_of_week=None, day_of_week_num=None, week=None,
-                 month=None, year=None):
+                 month=None, year=None, second=None):
+        self.second = second
         self.minute = minute
         self.hour = hour
         self.day = day
@@ -18,42 +31,68 @@ class DateTimeHolder:
         self.week = week
         self.month = month
         self.year = year
+        self._key = None
 
     @property
     def datetime(self):
+        return datetime(self.year, self.month or 1, self.day_of_month(), self.hour or 0, self.minute or 0,
+                        self.second or 0)
+
+    def day_of_month(self):
+        """Returns day of month, resolving it from the weekday fractions if they are set
+        """
         if self.day_of_week is not None and self.day_of_week_num is not None:
-            day = weekday_and_num_to_day(self.year, self.month, self.day_of_week_num, self.day_of_week)
-            return datetime(self.year, self.month, day, self.hour or 0, self.minute or 0)
+            return weekday_and_num_to_day(self.year, self.month, self.day_of_week_num, self.day_of_week)
         elif self.day_of_week is not None and self.week is not None:
-            day = weekday_and_week_to_day(self.year, self.month, self.week, self.day_of_week)
-            return datetime(self.year, self.month, day, self.hour or 0, self.minute or 0)
+            return weekday_and_week_to_day(self.year, self.month, self.week, self.day_of_week)
         else:
-            return datetime(self.year, self.month or 1, self.day or 1, self.hour or 0, self.minute or 0)
+            return self.day or 1
+
+    @property
+    def key(self):
+        """Integer that orders date time holders the same way as their datetimes, computed without creating one.
+           Cached until a fraction is changed
+        """
+        if self._key is None:
+            self._key = (((((self.year * 13 + (self.month or 1)) * 32 + self.day_of_month()) * 24 + (self.hour or 0)) *
+                          60 + (self.minute or 0)) * 60 + (self.second or 0))
+        return self._key
 
     def __getitem__(self, key):
             return getattr(self, key)
 
     def __setitem__(self, key, value):
-            return setattr(self, key, value)
+            setattr(self, key, value)
+            self._key = None
 
     def __copy__(self):
-        return DateTimeHolder(minute=self.minute, hour=self.hour, day=self.day, day_of_week=self.day_of_week,
-                              day_of_week_num=self.day_of_week_num, week=self.week, month=self.month, year=self.year)
+        holder = DateTimeHolder(minute=self.minute, hour=self.hour, day=self.day, day_of_week=self.day_of_week,
+                                day_of_week_num=self.day_of_week_num, week=self.week, month=self.month,
+                                year=self.year, second=self.second)
+        holder._key = self._key
+        return holder
 
     def __lt__(self, other):
-        return self.datetime < other.datetime
+        return self.key < other.key
 
     def __gt__(self, other):
-        return self.datetime > other.datetime
+        return self.key > other.key
 
     def __eq__(self, other):
-        return self.datetime == other.datetime
+        return self.key == other.key
 
     def __le__(self, other):
-        return self.datetime <= other.datetime
+        return self.key <= other.key
 
     def __ge__(self, other):
-        return self.datetime >= other.datetime
+        return self.key >= other.key
+
+
+_MINUTE = timedelta(minutes=1)
+_EPOCH = datetime(1970, 1, 1)  # Zero of NumPy datetime64
+_SECOND = timedelta(seconds=1)
+
+MONTH_LENGTHS = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]  # By month number, February of a common year
 
 
 class TaskStrategy(Enum):
@@ -88,36 +127,538 @@ class DayOfWeekNumStrategyFraction(Enum):
     year = 5
 
 
-class ScheduledTask:
-    def __init__(self, minutes=None, hours=None, days=None, days_of_week=None, days_of_week_num=None, weeks=None,
-                 months=None, years=None, max_iterations=100):
+# Reasons of invalid values past the end of the month, the previous search clamps them to the month instead of
+# stepping to the previous month
+_EXCEEDS_MONTH = ('day_exceeds_month', 'weekday_num_exceeds_month', 'weekday_exceeds_month', 'week_exceeds_month',
+                  'weekday_not_in_week')
+
+
+class SearchEngine(Enum):
+    fraction = 0  # Searches fraction by fraction from year to minute, days of weekday strategies per month
+    compiled = 1  # Walks candidate months using integer lookup tables, without date time holders
+
+
+# Rules as bitmasks, see CompiledSchedule.masks. Bit 0 of days is the 1st, of days_from_end the last day of month,
+# of months January, of days_of_week_num_from_end the last such weekday of month
+ScheduleMasks = namedtuple('ScheduleMasks', ['minutes', 'hours', 'days', 'days_from_end', 'months', 'days_of_week',
+                                             'weeks', 'days_of_week_num', 'days_of_week_num_from_end', 'exact'])
+
+RULE_NAMES = ('minutes', 'hours', 'days', 'days_of_week', 'days_of_week_num', 'weeks', 'months', 'years', 'seconds')
+
+
+class CompiledSchedule:
+    """Immutable rules of a task compiled for the search: candidate sets, lookup tables and caches of month and
+       year shapes. Schedules are interned by compile_schedule, so tasks with equal rules share one schedule
+    """
+    __slots__ = ['rules', 'strategy', 'fractions', 'candidates', 'candidate_sets', 'days_from_end', 'nearest_weekday',
+                 'highest_fraction', 'fraction_names', 'compared_fractions', 'next_minute', 'previous_minute',
+                 'next_hour', 'previous_hour', 'month_days_cache', 'month_day_tables_cache', 'year_months_cache',
+                 'year_days_cache', 'masks_cache', 'seconds', 'occurrence_cache', '__weakref__']
+
+    def __init__(self, rules: tuple, nearest_weekday: bool = False):
+        """
+        :param rules:Normalized candidates of every rule in RULE_NAMES order, see _normalize_rule
+        :param nearest_weekday:Move every matching day to the nearest weekday of the same month
+        """
+        minutes, hours, days, days_of_week, days_of_week_num, weeks, months, years, seconds = \
+            [list(candidates) if type(candidates) == tuple else candidates for candidates in rules]
+        _set = object.__setattr__
+        _set(self, 'rules', rules)
+
         if days_of_week is not None and days_of_week_num is not None:
-            self.strategy = TaskStrategy.days_of_week_num
-            self.fractions = DayOfWeekNumStrategyFraction
-            self.candidates = [minutes or range(0, 60), hours or range(0, 24), days_of_week or range(0, 7),
-                               days_of_week_num or range(0, 5), months or range(1, 13), years or range(0, 9999)]
+            strategy = TaskStrategy.days_of_week_num
+            fractions = DayOfWeekNumStrategyFraction
+            candidates = [minutes or range(0, 60), hours or range(0, 24), days_of_week or range(0, 7),
+                          days_of_week_num or range(0, 5), months or range(1, 13), years or range(0, 9999)]
 
         elif days_of_week is not None or weeks is not None:
-            self.strategy = TaskStrategy.days_of_week
-            self.fractions = DayOfWeekStrategyFraction
-            self.candidates = [minutes or range(0, 60), hours or range(0, 24), days_of_week or range(0, 7),
-                               weeks or range(0, 6), months or range(1, 13), years or range(0, 9999)]
+            strategy = TaskStrategy.days_of_week
+            fractions = DayOfWeekStrategyFraction
+            candidates = [minutes or range(0, 60), hours or range(0, 24), days_of_week or range(0, 7),
+                          weeks or range(0, 6), months or range(1, 13), years or range(0, 9999)]
+
+        else:
+            strategy = TaskStrategy.days_of_month
+            fractions = DayStrategyFraction
+            candidates = [minutes or range(0, 60), hours or range(0, 24), days or range(1, 32),
+                          months or range(1, 13), years or range(0, 9999)]
+        _set(self, 'strategy', strategy)
+        _set(self, 'fractions', fractions)
+        _set(self, 'candidates', tuple(candidates))
+
+        # Negative days (days_of_month) or day of week numbers (days_of_week_num) count from the end of month,
+        # -1 is the last one. They are kept apart since they resolve to a different day in every month
+        days_from_end = ()
+        _set(self, 'nearest_weekday', nearest_weekday and strategy == TaskStrategy.days_of_month)
+
+        # Compiled once, used by the search for next/previous lookups
+        candidate_sets = []
+        for fraction, fraction_candidates in zip(fractions, candidates):
+            if fraction.name in ('day', 'day_of_week_num') and type(fraction_candidates) == list \
+                    and min(fraction_candidates) < 0:
+                days_from_end = tuple(sorted(-value for value in fraction_candidates if value < 0))
+                fraction_candidates = [value for value in fraction_candidates if value >= 0]
+            candidate_sets.append(CandidateSet(fraction_candidates) if fraction_candidates else None)
+        _set(self, 'days_from_end', days_from_end)
+        _set(self, 'candidate_sets', tuple(candidate_sets))
+
+        highest_fraction = [f for f in fractions][-1]
+        _set(self, 'highest_fraction', highest_fraction)
+        _set(self, 'fraction_names', tuple(fraction.name for fraction in fractions))
+
+        # Names compared by _datetimeholders_compare for every starting fraction, from year down.
+        # Weekday fractions are compared as the day of month they resolve to, once both of them are included
+        compared_fractions = []
+        for from_fraction_value in range(highest_fraction.value + 1):
+            names = []
+            for fraction_value in range(highest_fraction.value, from_fraction_value - 1, -1):
+                name = fractions(fraction_value).name
+                if name in ('day_of_week_num', 'week'):
+                    continue
+                names.append('day' if name == 'day_of_week' else name)
+            compared_fractions.append(tuple(names))
+        _set(self, 'compared_fractions', tuple(compared_fractions))
+
+        # Fixed-index lookup tables of the compiled search, -1 means there's no such value
+        minutes_set = candidate_sets[fractions.minute.value]
+        hours_set = candidate_sets[fractions.hour.value]
+        _set(self, 'next_minute', tuple(_or_minus_one(minutes_set.next(minute)) for minute in range(61)))
+        _set(self, 'previous_minute', tuple(_or_minus_one(minutes_set.previous(minute)) for minute in range(60)))
+        _set(self, 'next_hour', tuple(_or_minus_one(hours_set.next(hour)) for hour in range(25)))
+        _set(self, 'previous_hour', tuple(_or_minus_one(hours_set.previous(hour)) for hour in range(24)))
+
+        # Seconds are resolved within the minute found by the search. None means second 0 with minute resolution
+        _set(self, 'seconds', CandidateSet(seconds) if seconds is not None else None)
+
+        # Days of month matching the day rules, by month shape (first weekday, number of days)
+        _set(self, 'month_days_cache', {})
+        _set(self, 'month_day_tables_cache', {})
+        # Candidate months that contain matching days, by year shape (first weekday, leap year)
+        _set(self, 'year_months_cache', {})
+        # Number of days of candidate months matching day rules, by year shape
+        _set(self, 'year_days_cache', {})
+        _set(self, 'masks_cache', None)
+        # Intervals between adjacent execution times, shared by the tasks of this schedule, see get_occurrence_cache
+        _set(self, 'occurrence_cache', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledSchedule is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledSchedule is immutable")
+
+    def __eq__(self, other):
+        return isinstance(other, CompiledSchedule) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __reduce__(self):
+        return _intern_schedule, self.key  # Unpickled schedules are interned as well
 
+    def __repr__(self):
+        return "CompiledSchedule({})".format(", ".join("{}={!r}".format(name, value)
+                                                       for name, value in sorted(self.kwargs.items())))
+
+    @property
+    def key(self):
+        return self.rules, self.nearest_weekday
+
+    @property
+    def kwargs(self):
+        """Rules as ScheduledTask keyword arguments, only the restricted ones
+        """
+        kwargs = {name: list(candidates) if type(candidates) == tuple else candidates
+                  for name, candidates in zip(RULE_NAMES, self.rules) if candidates is not None}
+        if self.nearest_weekday:
+            kwargs['nearest_weekday'] = True
+        return kwargs
+
+    def get_occurrence_cache(self, maxsize: int):
+        """Returns occurrence cache shared by the tasks of this schedule, keeping at least maxsize intervals
+        """
+        if self.occurrence_cache is None:
+            object.__setattr__(self, 'occurrence_cache', OccurrenceCache(maxsize))
+        elif self.occurrence_cache.maxsize < maxsize:
+            self.occurrence_cache.maxsize = maxsize
+        return self.occurrence_cache
+
+    def month_days(self, year: int, month: int):
+        """Returns CandidateSet of days of the month matching day rules, or None if there are no such days
+        """
+        return self.month_shape_days(first_weekday(year, month), num_days_in_month(year, month))
+
+    def month_shape_days(self, month_first_weekday: int, n_days_in_month: int):
+        """Returns CandidateSet of days matching day rules for the month of the given shape, or None.
+           Days are computed directly from the first weekday and the length of the month,
+           there are only 28 different shapes so the result is cached for each of them
+        """
+        key = (month_first_weekday, n_days_in_month)
+        if key in self.month_days_cache:
+            return self.month_days_cache[key]
+
+        days = []
+        if self.strategy == TaskStrategy.days_of_month:
+            if self.candidate_sets[self.fractions.day.value] is not None:
+                days.extend(self.candidate_sets[self.fractions.day.value])
+            days.extend(n_days_in_month + 1 - day_from_end for day_from_end in self.days_from_end)
+            if self.nearest_weekday:
+                days = [nearest_weekday(day, month_first_weekday, n_days_in_month) for day in days
+                        if 1 <= day <= n_days_in_month]
+        else:
+            for day_of_week in self.candidate_sets[self.fractions.day_of_week.value]:
+                first_day = 1 + (day_of_week - month_first_weekday) % 7  # First such weekday in this month
+                if self.strategy == TaskStrategy.days_of_week_num:
+                    if self.candidate_sets[self.fractions.day_of_week_num.value] is not None:
+                        for day_of_week_num in self.candidate_sets[self.fractions.day_of_week_num.value]:
+                            days.append(first_day + day_of_week_num * 7)
+                    last_day = first_day + (n_days_in_month - first_day) // 7 * 7  # Last such weekday in this month
+                    days.extend(last_day - (day_of_week_num_from_end - 1) * 7
+                                for day_of_week_num_from_end in self.days_from_end)
+                else:
+                    for week in self.candidate_sets[self.fractions.week.value]:
+                        days.append(week * 7 + day_of_week - month_first_weekday + 1)
+        days = sorted(set(day for day in days if 1 <= day <= n_days_in_month))
+
+        month_days = CandidateSet(days) if days else None
+        self.month_days_cache[key] = month_days
+        return month_days
+
+    def month_day_tables(self, year: int, month: int):
+        """Returns (next day, previous day) lookup tables of the month, indexed by day 0-32, -1 means no such day.
+           Cached by month shape
+        """
+        key = (first_weekday(year, month), num_days_in_month(year, month))
+        if key in self.month_day_tables_cache:
+            return self.month_day_tables_cache[key]
+
+        month_days = self.month_shape_days(*key)
+        if month_days is None:
+            tables = ([-1] * 33, [-1] * 33)
         else:
-            self.strategy = TaskStrategy.days_of_month
-            self.fractions = DayStrategyFraction
-            self.candidates = [minutes or range(0, 60), hours or range(0, 24), days or range(1, 32),
-                               months or range(1, 13), years or range(0, 9999)]
+            tables = ([_or_minus_one(month_days.next(day)) for day in range(33)],
+                      [_or_minus_one(month_days.previous(day)) for day in range(33)])
+        self.month_day_tables_cache[key] = tables
+        return tables
 
-        self.highest_fraction = last([f for f in self.fractions])
+    def year_months(self, year: int):
+        """Returns CandidateSet of candidate months of the year that contain days matching day rules, or None.
+           Result depends only on the weekday of January 1st and whether the year is leap,
+           so it's cached for each of these 14 year shapes
+        """
+        key = (first_weekday(year, 1), isleap(year))
+        if key in self.year_months_cache:
+            return self.year_months_cache[key]
+
+        month_first_weekday, leap = key
+        months = []
+        for month in range(1, 13):
+            n_days_in_month = MONTH_LENGTHS[month] + (1 if leap and month == 2 else 0)
+            if month in self.candidate_sets[self.fractions.month.value] \
+                    and self.month_shape_days(month_first_weekday, n_days_in_month) is not None:
+                months.append(month)
+            month_first_weekday = (month_first_weekday + n_days_in_month) % 7
+
+        year_months = CandidateSet(months) if months else None
+        self.year_months_cache[key] = year_months
+        return year_months
+
+    def next_year_month(self, year: int, month: int):
+        """Returns the nearest (year, month) not earlier than the given one that contains matching days, or None.
+           Years without such months are skipped with a single cached lookup each
+        """
+        years = self.candidate_sets[self.fractions.year.value]
+        while True:
+            next_year = years.next(year)
+            if next_year is None or next_year > MAXYEAR:
+                return None
+            if next_year != year:
+                year, month = next_year, 1
+            year_months = self.year_months(year)
+            next_month = year_months.next(month) if year_months is not None else None
+            if next_month is not None:
+                return year, next_month
+            year, month = year + 1, 1
+
+    def previous_year_month(self, year: int, month: int):
+        """Returns the nearest (year, month) not later than the given one that contains matching days, or None.
+           Years without such months are skipped with a single cached lookup each
+        """
+        years = self.candidate_sets[self.fractions.year.value]
+        while True:
+            previous_year = years.previous(year)
+            if previous_year is None or previous_year < MINYEAR:
+                return None
+            if previous_year != year:
+                year, month = previous_year, 12
+            year_months = self.year_months(year)
+            previous_month = year_months.previous(month) if year_months is not None else None
+            if previous_month is not None:
+                return year, previous_month
+            year, month = year - 1, 12
+
+    def masks(self):
+        """Returns ScheduleMasks: the rules as bitmasks of every fraction, so a minute is matched by testing one bit
+           of each of them. Day rules of every strategy use the same masks, the ones a strategy doesn't restrict are
+           full, so a day matches if (days or days_from_end) and days_of_week and weeks and
+           (days_of_week_num or days_of_week_num_from_end) have its bit. Nearest weekday can't be expressed,
+           day masks are then full and exact is False. Years are not included
+        """
+        if self.masks_cache is None:
+            object.__setattr__(self, 'masks_cache', self._compute_masks())
+        return self.masks_cache
+
+    def _compute_masks(self):
+        fractions = self.fractions
+        candidate_sets = self.candidate_sets
+        days, days_from_end = (1 << 31) - 1, 0
+        days_of_week, weeks, days_of_week_num, days_of_week_num_from_end = 0x7f, 0x3f, 0x1f, 0
+        if self.nearest_weekday:
+            pass
+        elif self.strategy == TaskStrategy.days_of_month:
+            day_set = candidate_sets[fractions.day.value]
+            days = _mask((day for day in day_set if day <= 31), 1) if day_set is not None else 0
+            days_from_end = _mask((day for day in self.days_from_end if day <= 31), 1)
+        else:
+            days_of_week = _mask(candidate_sets[fractions.day_of_week.value])
+            if self.strategy == TaskStrategy.days_of_week:
+                weeks = _mask(candidate_sets[fractions.week.value])
+            else:
+                day_of_week_num_set = candidate_sets[fractions.day_of_week_num.value]
+                days_of_week_num = _mask(day_of_week_num_set) if day_of_week_num_set is not None else 0
+                days_of_week_num_from_end = _mask(self.days_from_end, 1)
+        return ScheduleMasks(_mask(candidate_sets[fractions.minute.value]), _mask(candidate_sets[fractions.hour.value]),
+                             days, days_from_end, _mask(candidate_sets[fractions.month.value], 1), days_of_week, weeks,
+                             days_of_week_num, days_of_week_num_from_end, not self.nearest_weekday)
+
+    def year_days(self, year: int):
+        """Returns number of days of candidate months of the year that match day rules. Cached by year shape
+        """
+        key = (first_weekday(year, 1), isleap(year))
+        if key in self.year_days_cache:
+            return self.year_days_cache[key]
+
+        month_first_weekday, leap = key
+        year_days = 0
+        for month in range(1, 13):
+            n_days_in_month = MONTH_LENGTHS[month] + (1 if leap and month == 2 else 0)
+            if month in self.candidate_sets[self.fractions.month.value]:
+                month_days = self.month_shape_days(month_first_weekday, n_days_in_month)
+                year_days += len(month_days) if month_days is not None else 0
+            month_first_weekday = (month_first_weekday + n_days_in_month) % 7
+
+        self.year_days_cache[key] = year_days
+        return year_days
+
+    def count_between(self, start: datetime, end: datetime):
+        """Returns number of execution times from start (inclusive) to end (exclusive), naive datetimes in the time
+           of the rules. Every matching day has the same number of execution times, so they are counted
+           as matching days of every year and month times hours, minutes and seconds, without searching
+        """
+        if start >= end:
+            return 0
+        count = self._count_before_in_year(end) - self._count_before_in_year(start)
+        years = self.candidate_sets[self.fractions.year.value]
+        year = years.next(start.year)
+        while year is not None and year < end.year:
+            count += self.year_days(year) * self._day_count()
+            year = years.next(year + 1)
+        return count
+
+    def _day_count(self):
+        """Returns number of execution times of every matching day
+        """
+        minutes = self.candidate_sets[self.fractions.minute.value]
+        hours = self.candidate_sets[self.fractions.hour.value]
+        return len(hours) * len(minutes) * (len(self.seconds) if self.seconds is not None else 1)
+
+    def _count_before_in_year(self, dt: datetime):
+        """Returns number of execution times of the year of the datetime that are before it
+        """
+        if dt.year not in self.candidate_sets[self.fractions.year.value]:
+            return 0
+        year_months = self.year_months(dt.year)
+        if year_months is None:
+            return 0
+
+        days = 0
+        for month in year_months:
+            if month >= dt.month:
+                break
+            days += len(self.month_days(dt.year, month))
+        count = 0
+        if dt.month in year_months:
+            month_days = self.month_days(dt.year, dt.month)
+            days += month_days.count_below(dt.day)
+            if dt.day in month_days:
+                count = self._count_before_in_day(dt)
+        return days * self._day_count() + count
+
+    def _count_before_in_day(self, dt: datetime):
+        """Returns number of execution times of a matching day that are before the time of the datetime
+        """
+        minutes = self.candidate_sets[self.fractions.minute.value]
+        hours = self.candidate_sets[self.fractions.hour.value]
+        n_seconds = len(self.seconds) if self.seconds is not None else 1
+        count = hours.count_below(dt.hour) * len(minutes) * n_seconds
+        if dt.hour in hours:
+            count += minutes.count_below(dt.minute) * n_seconds
+            if dt.minute in minutes:
+                if self.seconds is None:
+                    count += 1 if dt.second or dt.microsecond else 0
+                else:
+                    count += self.seconds.count_below(dt.second) + (1 if dt.microsecond and dt.second in self.seconds
+                                                                    else 0)
+        return count
+
+
+def compile_schedule(minutes=None, hours=None, days=None, days_of_week=None, days_of_week_num=None, weeks=None,
+                     months=None, years=None, nearest_weekday=False, seconds=None):
+    """Returns CompiledSchedule of the rules. Equal rules return the same schedule while it's referenced,
+       so any number of tasks with the same rules share a single copy of compiled candidates and caches
+    """
+    rules = tuple(_normalize_rule(candidates) for candidates in (minutes, hours, days, days_of_week,
+                                                                 days_of_week_num, weeks, months, years, seconds))
+    # Nearest weekday only applies to days of month strategy
+    nearest_weekday = bool(nearest_weekday) and days_of_week is None and weeks is None
+    return _intern_schedule(rules, nearest_weekday)
+
+
+def get_schedule(task):
+    """Returns CompiledSchedule of the ScheduledTask, or the given CompiledSchedule. Used by the indexes that
+       match schedules in the time of the rules, so tasks with timezone raise ValueError
+    """
+    if isinstance(task, CompiledSchedule):
+        return task
+    if task.tz is not None:
+        raise ValueError("tasks with timezone are not supported")
+    return task.schedule
+
+
+def _normalize_rule(candidates):
+    """Returns hashable candidates that compare equal for equal rules: ranges are kept, lists are sorted tuples
+    """
+    if candidates is None or type(candidates) == range:
+        return candidates
+    if type(candidates) in (list, tuple):
+        return tuple(sorted(set(candidates)))
+    raise ValueError("iter must be of type list or range")
+
+
+def _intern_schedule(rules: tuple, nearest_weekday: bool):
+    key = (rules, nearest_weekday)
+    schedule = _schedules.get(key)
+    if schedule is None:
+        schedule = CompiledSchedule(rules, nearest_weekday)
+        _schedules[key] = schedule
+    return schedule
+
+
+class ScheduledTask:
+    """Task executed at the times matching its rules. The rules are compiled into a CompiledSchedule shared with
+       every other task with equal rules, the task only keeps its own search settings
+    """
+    __slots__ = ['schedule', 'max_iterations', 'engine', 'cache', 'stats', 'tz', '_search_by_month', '_transitions',
+                 '_interval', '__weakref__']
+
+    def __init__(self, minutes=None, hours=None, days=None, days_of_week=None, days_of_week_num=None, weeks=None,
+                 months=None, years=None, max_iterations=100, cache_size=None, stats: StatsCollector = None,
+                 engine: SearchEngine = SearchEngine.fraction, nearest_weekday=False, schedule: CompiledSchedule = None,
+                 tz: tzinfo = None, seconds=None):
+        """
+        :param seconds:Seconds rule (0-59). By default tasks are executed at second 0, with minute resolution
+        :param schedule:Already compiled schedule, rules are ignored if it's given
+        :param tz:Timezone of the rules, i.e. zoneinfo.ZoneInfo. If it's given, results are aware datetimes
+                  and naive current datetimes are considered to be UTC
+        """
+        if schedule is None:
+            schedule = compile_schedule(minutes, hours, days, days_of_week, days_of_week_num, weeks, months, years,
+                                        nearest_weekday, seconds)
+        self.schedule = schedule
 
         # Settings
         self.max_iterations = max_iterations
+        self.engine = engine
+        # Rules that depend on the month shape are only supported by the search walking months
+        self._search_by_month = engine is SearchEngine.compiled or schedule.strategy != TaskStrategy.days_of_month \
+            or bool(schedule.days_from_end) or schedule.nearest_weekday
+
+        # Opt-in cache of intervals between adjacent execution times, shared by the tasks of the same schedule
+        self.cache = schedule.get_occurrence_cache(cache_size) if cache_size else None
+
+        # Opt-in search statistics, collector can be shared by many tasks
+        self.stats = stats
+
+        # Optional timezone, UTC offsets are cached per zone and year
+        self.tz = tz
+        self._transitions = transition_table(tz) if tz is not None else None
+
+        # Interval between execution times around the last reference of next_time_cached / is_due
+        self._interval = None
+
+    def __reduce__(self):
+        """Tasks are pickled as their schedule and settings, the schedule as its rules. Search statistics are not
+           pickled, neither are the cached intervals, only the cache size
+        """
+        return _restore_task, (self.schedule, self.max_iterations, self.engine, self.tz,
+                               self.cache.maxsize if self.cache is not None else None)
+
+    @property
+    def strategy(self):
+        return self.schedule.strategy
+
+    @property
+    def fractions(self):
+        return self.schedule.fractions
+
+    @property
+    def candidates(self):
+        return self.schedule.candidates
+
+    @property
+    def candidate_sets(self):
+        return self.schedule.candidate_sets
+
+    @property
+    def days_from_end(self):
+        return self.schedule.days_from_end
+
+    @property
+    def nearest_weekday(self):
+        return self.schedule.nearest_weekday
+
+    @property
+    def highest_fraction(self):
+        return self.schedule.highest_fraction
+
+    @property
+    def resolution(self):
+        """Time between two adjacent times the task can be executed at, one second if it has seconds rule
+        """
+        return _MINUTE if self.schedule.seconds is None else _SECOND
+
+    @classmethod
+    def from_cron(cls, expression: str, **kwargs):
+        """Creates task from cron expression, see cron.parse_cron for the supported syntax.
+           Every call returns a new task, equal expressions share the compiled schedule while it's referenced
+        :param kwargs:Settings passed to the constructor, i.e. max_iterations, cache_size, stats, engine
+        """
+        expression = normalize_cron(expression)
+        schedule = _cron_schedules.get(expression)
+        if schedule is None:
+            schedule = compile_schedule(**parse_cron(expression))
+            _cron_schedules[expression] = schedule
+        return cls(schedule=schedule, **kwargs)
 
     def _datetimeholder_valid(self, datetimeholder: DateTimeHolder, fraction: Enum):
         """Check if date time holder is valid for current fraction
            i.e. if fraction is days, check if current day exists in the month
         """
+        return self._datetimeholder_invalid_reason(datetimeholder, fraction) is None
+
+    def _datetimeholder_invalid_reason(self, datetimeholder: DateTimeHolder, fraction: Enum):
+        """Returns the reason why date time holder is not valid for current fraction, or None if it's valid
+        """
         # Check min value
         if self.strategy == TaskStrategy.days_of_month:
             min_value = 1 if fraction in [self.fractions.day, self.fractions.month, self.fractions.year] else 0
@@ -125,20 +666,20 @@ class ScheduledTask:
             min_value = 1 if fraction in [self.fractions.month, self.fractions.year] else 0
 
         if datetimeholder[fraction.name] < min_value:
-            return False
+            return 'below_minimum'
 
         # Check if day exceeds number of days in that month
         if self.strategy == TaskStrategy.days_of_month and fraction == self.fractions.day:
             n_days_in_month = num_days_in_month(datetimeholder.year, datetimeholder.month)
             if datetimeholder.day > n_days_in_month:
-                return False
+                return 'day_exceeds_month'
 
         # Check if day of week number exceeds number of day of weeks for this month
         if self.strategy == TaskStrategy.days_of_week_num and fraction == self.fractions.day_of_week_num:
             # Since we don't know what day of week we are validating,
             # assume that this number can't be more than max week number
             if datetimeholder.day_of_week_num > max_week_num(datetimeholder.year, datetimeholder.month):
-                return False
+                return 'weekday_num_exceeds_month'
 
         # Check if day of week and day of week number exceeds maximum day of week number for this month
         if self.strategy == TaskStrategy.days_of_week_num and fraction == self.fractions.day_of_week:
@@ -146,12 +687,12 @@ class ScheduledTask:
                                          datetimeholder.day_of_week)
             n_days_in_month = num_days_in_month(datetimeholder.year, datetimeholder.month)
             if day > n_days_in_month:
-                return False
+                return 'weekday_exceeds_month'
 
         # Check if month has n weeks
         if self.strategy == TaskStrategy.days_of_week and fraction == self.fractions.week:
             if datetimeholder.week > max_week_num(datetimeholder.year, datetimeholder.month):
-                return False
+                return 'week_exceeds_month'
 
         # Check if weekday and week number combination
         if self.strategy == TaskStrategy.days_of_week and fraction == self.fractions.day_of_week:
@@ -159,68 +700,87 @@ class ScheduledTask:
                                           datetimeholder.day_of_week)
             n_days_in_month = num_days_in_month(datetimeholder.year, datetimeholder.month)
             if day > n_days_in_month:
-                return False
+                return 'weekday_not_in_week'
 
         # All checks are passed
-        return True
+        return None
 
     def _datetimeholders_equal(self, a: DateTimeHolder, b: DateTimeHolder, from_fraction: Enum):
         """Partially check a and b date time holders for equality, starting with fraction.
            For example, if the fraction is DAY, compare only DAY, MONTH and YEAR
         """
-        return all([a[self.fractions(fv).name] == b[self.fractions(fv).name] for fv
-                    in range(from_fraction.value, self.highest_fraction.value+1)])
+        for name in self.schedule.fraction_names[from_fraction.value:]:
+            if getattr(a, name) != getattr(b, name):
+                return False
+        return True
 
     def _datetimeholders_compare(self, a: DateTimeHolder, b: DateTimeHolder, from_fraction: Enum):
         """Partially compare a and b date time holders, starting with fraction.
            For example, if the fraction is DAY, compare only DAY, MONTH and YEAR
         """
-        _a = DateTimeHolder()
-        _b = DateTimeHolder()
-        for fraction_value in range(from_fraction.value, self.highest_fraction.value+1):
-            fraction = self.fractions(fraction_value)
-            _a[fraction.name] = a[fraction.name]
-            _b[fraction.name] = b[fraction.name]
-        if _a > _b:
-            return 1
-        elif _a == _b:
-            return 0
-        else:
-            return -1
+        for name in self.schedule.compared_fractions[from_fraction.value]:
+            if name == 'day':
+                a_value, b_value = a.day_of_month(), b.day_of_month()
+            else:
+                a_value, b_value = getattr(a, name), getattr(b, name)
+            if a_value != b_value:
+                return 1 if a_value > b_value else -1
+        return 0
 
-    def _increase_fraction(self, result: DateTimeHolder, fraction: Enum, increment: int, current: DateTimeHolder):
+    def _increase_fraction(self, result: DateTimeHolder, fraction: Enum, increment: int, current: DateTimeHolder,
+                           search_stats: SearchStats = None):
         """Increase fraction on the datetimeholder
         :param result:Value to increase
         :param fraction:Fraction to increase
         :param current:Original value - used to reset if we can't increase
-        :return:Number of fractions increased (to know from which to recalculate)
+        :param search_stats:Statistics of the current search, if enabled
+        :return:Number of fractions increased (to know from which to recalculate), None if there are no candidates
         """
-        # If candidates are range, perform step-aware increment
-        if type(self.candidates[fraction.value]) == list:
-            new_value = result[fraction.name] + increment
-        elif type(self.candidates[fraction.value]) == range:
-            new_value = result[fraction.name] + increment * self.candidates[fraction.value].step
-        else:
-            raise ValueError("candidate must be of type list or range")
+        if search_stats is not None:
+            search_stats.backtracks[fraction.name] += 1
 
-        datetimeholder_increased = copy(result)
-        datetimeholder_increased[fraction.name] = new_value
+        # Step to the adjacent candidate, this is step-aware for ranges and skips gaps in lists
+        candidate_set = self.candidate_sets[fraction.value]
         if increment > 0:  # 1
-            in_range = get_smallest_value_greater_or_equal_to(self.candidates[fraction.value],
-                                                          datetimeholder_increased[fraction.name]) is not None
+            new_value = candidate_set.next(result[fraction.name] + 1)
         else:  # -1
-            in_range = get_biggest_value_less_or_equal_to(self.candidates[fraction.value],
-                                                          datetimeholder_increased[fraction.name]) is not None
+            new_value = candidate_set.previous(result[fraction.name] - 1)
+        in_range = new_value is not None
 
-        if self._datetimeholder_valid(datetimeholder_increased, fraction) and in_range:
+        datetimeholder_increased = copy(result)
+        datetimeholder_increased[fraction.name] = new_value
+        reason = self._datetimeholder_invalid_reason(datetimeholder_increased, fraction) if in_range else 'no_candidate'
+        if reason is None:
             result[fraction.name] = new_value
             return 1
         else:
+            if search_stats is not None:
+                search_stats.invalid[reason] += 1
             if fraction == self.highest_fraction:
-                raise ValueError("Can't increase fraction - current " + self.highest_fraction +
-                                 " is " + result[fraction.value])
+                return None  # No candidates left, there is no such execution time
             result[fraction.name] = current[fraction.name]
-            return 1 + self._increase_fraction(result, self.fractions(fraction.value + 1), increment, current)
+            increased = self._increase_fraction(result, self.fractions(fraction.value + 1), increment, current,
+                                                search_stats)
+            return None if increased is None else 1 + increased
+
+    def _datetime_to_datetimeholder(self, current_datetime: datetime):
+        """Converts datetime into the date time holder using fractions of the current strategy
+        """
+        if self.strategy == TaskStrategy.days_of_month:
+            return DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
+                                  day=current_datetime.day, month=current_datetime.month, year=current_datetime.year)
+
+        elif self.strategy == TaskStrategy.days_of_week:
+            return DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
+                                  day_of_week=current_datetime.weekday(),
+                                  week=week_num(current_datetime),
+                                  month=current_datetime.month, year=current_datetime.year)
+
+        else:
+            return DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
+                                  day_of_week=current_datetime.weekday(),
+                                  day_of_week_num=weekday_num(current_datetime),
+                                  month=current_datetime.month, year=current_datetime.year)
 
     def get_next_time(self, current_datetime: datetime = None):
         """Returns next task execution time nearest to the given datetime
@@ -228,24 +788,45 @@ class ScheduledTask:
         if current_datetime is None:
             current_datetime = datetime.utcnow()
 
-        if self.strategy == TaskStrategy.days_of_month:
-            current = DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
-                                     day=current_datetime.day, month=current_datetime.month, year=current_datetime.year)
+        if self._transitions is not None:
+            return self._get_zoned_time(current_datetime, +1)[0]
+        if current_datetime.tzinfo is not None:  # Rules apply to the wall time
+            current_datetime = current_datetime.replace(tzinfo=None)
+        return self._get_next_wall_time(current_datetime)
 
-        elif self.strategy == TaskStrategy.days_of_week:
-            current = DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
-                                     day_of_week=current_datetime.weekday(),
-                                     week=week_num(current_datetime),
-                                     month=current_datetime.month, year=current_datetime.year)
+    def _get_next_wall_time(self, current_datetime: datetime):
+        """Returns next task execution time nearest to the given naive datetime in the time of the rules.
+           Seconds are stepped arithmetically within the minute found by the search
+        """
+        seconds = self.schedule.seconds
+        if seconds is None:
+            return self._get_next_minute_time(current_datetime)
 
-        else:
-            current = DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
-                                     day_of_week=current_datetime.weekday(),
-                                     day_of_week_num=weekday_num(current_datetime),
-                                     month=current_datetime.month, year=current_datetime.year)
+        result = self._get_next_minute_time(current_datetime)
+        if result is not None and result == current_datetime.replace(second=0, microsecond=0):
+            second = seconds.next(current_datetime.second)
+            if second is not None:
+                return result.replace(second=second)
+            try:
+                result = self._get_next_minute_time(result + timedelta(minutes=1))
+            except OverflowError:
+                return None
+        return result.replace(second=seconds.first) if result is not None else None
+
+    def _get_next_minute_time(self, current_datetime: datetime):
+        """Returns next task execution time nearest to the given naive datetime, with minute resolution
+        """
+        if self.cache is not None:
+            previous_time, next_time = self._get_cached_interval(current_datetime)
+            return previous_time if previous_time == current_datetime.replace(second=0, microsecond=0) else next_time
+
+        if self.engine is SearchEngine.compiled and self.stats is None:
+            result = self._compiled_next_time(current_datetime.year, current_datetime.month, current_datetime.day,
+                                              current_datetime.hour, current_datetime.minute)
+            return datetime(*result) if result is not None else None
 
-        result = self._get_next_time(current)
-        return result.datetime
+        result = self._get_next_time(self._datetime_to_datetimeholder(current_datetime))
+        return result.datetime if result is not None else None
 
     def get_previous_time(self, current_datetime: datetime = None):
         """Returns previous task execution time nearest to the given datetime
@@ -253,89 +834,716 @@ class ScheduledTask:
         if current_datetime is None:
             current_datetime = datetime.utcnow()
 
-        if self.strategy == TaskStrategy.days_of_month:
-            current = DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
-                                     day=current_datetime.day, month=current_datetime.month, year=current_datetime.year)
+        if self._transitions is not None:
+            return self._get_zoned_time(current_datetime, -1)[0]
+        if current_datetime.tzinfo is not None:  # Rules apply to the wall time
+            current_datetime = current_datetime.replace(tzinfo=None)
+        return self._get_previous_wall_time(current_datetime)
 
-        elif self.strategy == TaskStrategy.days_of_week:
-            current = DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
-                                     day_of_week=current_datetime.weekday(),
-                                     week=week_num(current_datetime),
-                                     month=current_datetime.month, year=current_datetime.year)
+    def _get_previous_wall_time(self, current_datetime: datetime):
+        """Returns previous task execution time nearest to the given naive datetime in the time of the rules.
+           Seconds are stepped arithmetically within the minute found by the search
+        """
+        seconds = self.schedule.seconds
+        if seconds is None:
+            return self._get_previous_minute_time(current_datetime)
+
+        result = self._get_previous_minute_time(current_datetime)
+        if result is not None and result == current_datetime.replace(second=0, microsecond=0):
+            second = seconds.previous(current_datetime.second)
+            if second is not None:
+                return result.replace(second=second)
+            try:
+                result = self._get_previous_minute_time(result - timedelta(minutes=1))
+            except OverflowError:
+                return None
+        return result.replace(second=seconds.last) if result is not None else None
+
+    def _get_previous_minute_time(self, current_datetime: datetime):
+        """Returns previous task execution time nearest to the given naive datetime, with minute resolution
+        """
+        if self.cache is not None:
+            previous_time, next_time = self._get_cached_interval(current_datetime)
+            return next_time if next_time == current_datetime.replace(second=0, microsecond=0) else previous_time
+
+        if self.engine is SearchEngine.compiled and self.stats is None:
+            result = self._compiled_previous_time(current_datetime.year, current_datetime.month, current_datetime.day,
+                                                  current_datetime.hour, current_datetime.minute)
+            return datetime(*result) if result is not None else None
+
+        result = self._get_previous_time(self._datetime_to_datetimeholder(current_datetime))
+        return result.datetime if result is not None else None
+
+    def next_time_cached(self, current_datetime: datetime = None):
+        """Returns the same time as get_next_time. Previous and next execution time around the given datetime
+           are remembered, so until the datetime passes the next one the result is returned after a comparison
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+        interval = self._checked_interval(current_datetime)
+        if interval is None:
+            return self.get_next_time(current_datetime)
+        reference = as_utc(current_datetime) if self._transitions is not None else current_datetime
+        return interval[3] if reference < interval[1] else interval[4]
+
+    def is_due(self, current_datetime: datetime = None, last_run: datetime = None):
+        """Returns whether the task has an execution time after last_run up to the given datetime (inclusive),
+           or any execution time up to the given datetime if last_run is None. Uses the interval of next_time_cached
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+        interval = self._checked_interval(current_datetime)
+        if interval is None:  # Searched from last_run instead
+            if last_run is None:
+                return self.get_previous_time(current_datetime) is not None
+            try:
+                following_time = self.get_next_time(last_run + self.resolution)
+            except OverflowError:
+                return False
+            if following_time is None:
+                return False
+            if self._transitions is not None:
+                return as_utc(following_time) <= as_utc(current_datetime)
+            return following_time <= current_datetime
+        if interval[3] is None:
+            return False
+        if last_run is None:
+            return True
+        return interval[0] > (as_utc(last_run) if self._transitions is not None else last_run)
+
+    def _checked_interval(self, current_datetime: datetime):
+        """Returns the remembered interval around the given datetime, searching a new one if the datetime passed it
+           or the clock jumped back. Returns None if the searched interval doesn't contain the datetime,
+           it's not remembered then
+        """
+        reference = as_utc(current_datetime) if self._transitions is not None else current_datetime
+        interval = self._interval
+        if interval is not None and interval[0] <= reference < interval[2]:
+            return interval
+        interval = self._get_interval(current_datetime)
+        if not interval[0] <= reference < interval[2]:
+            return None
+        self._interval = interval
+        return interval
+
+    def _get_interval(self, current_datetime: datetime):
+        """Returns (start, end of the start minute or second, end, previous time, next time): the task is executed at
+           previous time (start) and next time (end) and nowhere between. Start and end are naive, UTC for tasks
+           with timezone, and datetime.min / datetime.max if there's no such execution time
+        """
+        previous_time = self.get_previous_time(current_datetime)
+        if previous_time is None:
+            start = previous_end = datetime.min
+            next_time = self.get_next_time(current_datetime)
+        else:
+            start = as_utc(previous_time) if self._transitions is not None else previous_time
+            try:
+                previous_end = start + self.resolution
+                next_time = self.get_next_time(previous_end)
+            except OverflowError:
+                previous_end, next_time = datetime.max, None
+        if next_time is None:
+            end = datetime.max
+        else:
+            end = as_utc(next_time) if self._transitions is not None else next_time
+        return start, previous_end, end, previous_time, next_time
+
+    def _get_zoned_time(self, current_datetime: datetime, increment: int):
+        """Returns (aware datetime, naive UTC datetime) of the nearest task execution time in the task timezone,
+           or (None, None). Wall times skipped when DST starts are executed at the end of the gap,
+           wall times repeated when DST ends are executed once, at their first occurrence
+        """
+        transitions = self._transitions
+        utc = as_utc(current_datetime)
+        wall = transitions.to_local(utc).replace(microsecond=0)
+        repeated_until = transitions.repeated_until(utc)  # Second occurrences of repeated wall times are skipped
+        if increment > 0:
+            result = self._get_next_wall_time(repeated_until if repeated_until is not None else wall)
+        else:
+            result = self._get_previous_wall_time(repeated_until - self.resolution
+                                                  if repeated_until is not None else wall)
+        if result is None:
+            return None, None
+        result_utc = transitions.to_utc(result)
+        return transitions.to_local(result_utc).replace(tzinfo=self.tz), result_utc
+
+    def _iter_zoned_times(self, current_datetime: datetime, until: datetime, count: int, increment: int):
+        """Lazily yields consecutive task execution times in the task timezone, see iter_next_times
+        """
+        until_utc = as_utc(until) if until is not None else None
+        result, result_utc = self._get_zoned_time(current_datetime, increment)
+        n = 0
+        while result is not None and (count is None or n < count):
+            if until_utc is not None and (result_utc > until_utc if increment > 0 else result_utc < until_utc):
+                return
+            yield result
+            n += 1
+            try:
+                result, result_utc = self._get_zoned_time(result_utc + self.resolution * increment, increment)
+            except OverflowError:
+                return
+
+    def _get_cached_interval(self, current_datetime: datetime):
+        """Returns (previous, next) execution times around the given datetime, using the cache
+        """
+        reference = current_datetime.replace(second=0, microsecond=0)
+        interval = self.cache.lookup(reference)
+        if interval is None:
+            current = self._datetime_to_datetimeholder(reference)
+            previous_result = self._get_previous_time(current)
+            if previous_result is not None and previous_result.datetime == reference:
+                # Reference is an execution time, store the interval from it to the following one
+                next_result = self._get_next_time(self._datetime_to_datetimeholder(reference + _MINUTE))
+                interval = (reference, next_result.datetime if next_result is not None else None)
+                self.cache.store(*interval)
+                return interval
+            next_result = self._get_next_time(current)
+            interval = (previous_result.datetime if previous_result is not None else None,
+                        next_result.datetime if next_result is not None else None)
+            if interval[0] is not None and interval[1] is not None:
+                # The interval is shared by every task of the schedule, only store adjacent execution times
+                following = self._get_next_time(self._datetime_to_datetimeholder(interval[0] + _MINUTE))
+                if following is None or following.datetime != interval[1]:
+                    return interval
+            self.cache.store(*interval)
+        return interval
+
+    def cache_info(self):
+        """Returns (hits, misses, maxsize, currsize) of the occurrence cache, or None if cache is disabled
+        """
+        return self.cache.info() if self.cache is not None else None
+
+    def get_next_times(self, datetimes):
+        """Returns next task execution time nearest to every given datetime.
+           Accepts a sequence of datetimes or a NumPy datetime64 array (result is then a datetime64[m] array)
+        """
+        return self._get_times(datetimes, +1)
+
+    def get_previous_times(self, datetimes):
+        """Returns previous task execution time nearest to every given datetime.
+           Accepts a sequence of datetimes or a NumPy datetime64 array (result is then a datetime64[m] array)
+        """
+        return self._get_times(datetimes, -1)
+
+    def _get_times(self, datetimes, increment: int):
+        """Batch search. Reference datetimes are visited in sorted order, so every reference that falls
+           between the previous reference and its result reuses that result without searching again
+        """
+        is_array = hasattr(datetimes, 'dtype')
+        if self._transitions is not None:
+            return self._get_zoned_times(datetimes, increment, is_array)
+        if is_array:
+            return self._get_array_times(datetimes, increment)
 
+        # Like get_next_time, rules without timezone apply to the wall time of aware datetimes.
+        # Most references are whole minutes, they are kept as they are
+        if self.schedule.seconds is None:
+            references = [dt.replace(second=0, microsecond=0, tzinfo=None)
+                          if dt is not None and (dt.second or dt.microsecond or dt.tzinfo is not None) else dt
+                          for dt in datetimes]
         else:
-            current = DateTimeHolder(minute=current_datetime.minute, hour=current_datetime.hour,
-                                     day_of_week=current_datetime.weekday(),
-                                     day_of_week_num=weekday_num(current_datetime),
-                                     month=current_datetime.month, year=current_datetime.year)
+            references = [dt.replace(microsecond=0, tzinfo=None)
+                          if dt is not None and (dt.microsecond or dt.tzinfo is not None) else dt
+                          for dt in datetimes]
+
+        results = [None] * len(references)
+        order = sorted((i for i, reference in enumerate(references) if reference is not None),
+                       key=references.__getitem__, reverse=increment < 0)
+        result = None
+        searched = False
+        for i in order:
+            reference = references[i]
+            if not searched or (result is not None and (reference > result if increment > 0 else reference < result)):
+                result = self._get_next_wall_time(reference) if increment > 0 else \
+                    self._get_previous_wall_time(reference)
+                searched = True
+            results[i] = result
+        return results
+
+    def _get_array_times(self, datetimes, increment: int):
+        """Batch search of a NumPy datetime64 array, on int64 minutes (seconds). References are sorted with argsort,
+           every search result is written to all of the sorted references that reuse it at once
+        """
+        import numpy
+        unit = 'datetime64[m]' if self.schedule.seconds is None else 'datetime64[s]'
+        step = self.resolution
+        references = datetimes.astype(unit)
+        values = references.view(numpy.int64)
+        results = numpy.full(values.shape, numpy.iinfo(numpy.int64).min, dtype=numpy.int64)  # NaT by default
+        valid = numpy.flatnonzero(~numpy.isnat(references))
+        order = valid[numpy.argsort(values[valid], kind='stable')]
+        ordered = values[order]
+
+        if increment > 0:
+            start = 0
+            while start < len(ordered):
+                result = self._get_next_wall_time(_EPOCH + step * int(ordered[start]))
+                if result is None:
+                    break
+                result_value = (result - _EPOCH) // step
+                end = numpy.searchsorted(ordered, result_value, side='right')  # References up to the result
+                results[order[start:end]] = result_value
+                start = end
+        else:
+            end = len(ordered)
+            while end > 0:
+                result = self._get_previous_wall_time(_EPOCH + step * int(ordered[end - 1]))
+                if result is None:
+                    break
+                result_value = (result - _EPOCH) // step
+                start = numpy.searchsorted(ordered, result_value, side='left')  # References from the result
+                results[order[start:end]] = result_value
+                end = start
+        return results.view(unit)
+
+    def _get_zoned_times(self, datetimes, increment: int, is_array: bool):
+        """Batch search in the task timezone. Datetimes of NumPy arrays are UTC, so are the resulting datetimes
+        """
+        references = datetimes.astype('datetime64[us]').tolist() if is_array else datetimes
+        results = [self._get_zoned_time(reference, increment) if reference is not None else (None, None)
+                   for reference in references]
+        if is_array:
+            import numpy
+            return numpy.array([result_utc for _, result_utc in results],
+                               dtype='datetime64[m]' if self.schedule.seconds is None else 'datetime64[s]')
+        return [result for result, _ in results]
+
+    def iter_next_times(self, current_datetime: datetime = None, until: datetime = None, count: int = None):
+        """Lazily yields consecutive task execution times, starting with the one nearest to the given datetime.
+           Stops after the time passes until (inclusive) or count times were yielded
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+
+        if self._transitions is not None:
+            yield from self._iter_zoned_times(current_datetime, until, count, +1)
+            return
+
+        result = self._get_first_result(current_datetime, +1)
+        n = 0
+        while result is not None and (count is None or n < count):
+            result_datetime = result.datetime
+            if until is not None and result_datetime > until:
+                return
+            yield result_datetime
+            n += 1
+            result = self._advance(result, result_datetime, +1)
+
+    def iter_previous_times(self, current_datetime: datetime = None, until: datetime = None, count: int = None):
+        """Lazily yields consecutive task execution times going back in time, starting with the one nearest to the
+           given datetime. Stops after the time passes until (inclusive) or count times were yielded
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+
+        if self._transitions is not None:
+            yield from self._iter_zoned_times(current_datetime, until, count, -1)
+            return
 
-        result = self._get_previous_time(current)
-        return result.datetime
+        result = self._get_first_result(current_datetime, -1)
+        n = 0
+        while result is not None and (count is None or n < count):
+            result_datetime = result.datetime
+            if until is not None and result_datetime < until:
+                return
+            yield result_datetime
+            n += 1
+            result = self._advance(result, result_datetime, -1)
+
+    def occurrences_between(self, start: datetime, end: datetime):
+        """Lazily yields task execution times from start (inclusive) to end (exclusive)
+        """
+        if self._transitions is not None:
+            start, end = as_utc(start), as_utc(end)
+        for result in self.iter_next_times(start):
+            result_utc = as_utc(result) if self._transitions is not None else result
+            if result_utc >= end:
+                return
+            if result_utc >= start:  # Search is inclusive of the whole minute (second) of the start
+                yield result
+
+    def count_between(self, start: datetime, end: datetime):
+        """Returns number of task execution times from start (inclusive) to end (exclusive).
+           Computed from the rules per year and month, so the cost doesn't depend on the number of execution times
+        """
+        if self._transitions is None:
+            return self.schedule.count_between(start, end)
+
+        transitions = self._transitions
+        start_utc, end_utc = as_utc(start), as_utc(end)
+        if start_utc >= end_utc:
+            return 0
+        # Repeated wall times are only executed at their first occurrence
+        wall_start = transitions.repeated_until(start_utc) or transitions.to_local(start_utc)
+        wall_end = transitions.repeated_until(end_utc) or transitions.to_local(end_utc)
+        count = self.schedule.count_between(wall_start, wall_end)
+        # Skipped wall times are all executed once, at the end of the gap, together with the time there
+        for gap_start, gap_end in transitions.gaps_between(start_utc, end_utc):
+            skipped = self.schedule.count_between(gap_start, gap_end)
+            if skipped:
+                count -= skipped
+                if not self.schedule.count_between(gap_end, gap_end + self.resolution):
+                    count += 1
+        return count
+
+    def get_missed_runs(self, last_run: datetime, current_datetime: datetime = None):
+        """Returns MissedRuns: execution times after last_run up to the given datetime (inclusive),
+           i.e. the runs missed during a downtime
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+        return MissedRuns(self, last_run, current_datetime)
+
+    def _get_first_result(self, current_datetime: datetime, increment: int):
+        """Returns date time holder of the task execution time nearest to the given datetime, or None
+        """
+        current = self._datetime_to_datetimeholder(current_datetime)
+        result = self._get_next_time(current) if increment > 0 else self._get_previous_time(current)
+        seconds = self.schedule.seconds
+        if seconds is None or result is None:
+            return result
+
+        if result == current:  # Same minute, only seconds on the right side of the current one are left
+            second = seconds.next(current_datetime.second) if increment > 0 else \
+                seconds.previous(current_datetime.second)
+            if second is None:
+                result['second'] = current_datetime.second
+                return self._advance(result, result.datetime, increment)
+            result['second'] = second
+        else:
+            result['second'] = seconds.first if increment > 0 else seconds.last
+        return result
+
+    def _advance(self, result: DateTimeHolder, result_datetime: datetime, increment: int):
+        """Moves result to the adjacent task execution time in the given direction.
+           Seconds, minute and hour are stepped in place since they never affect validity of the day.
+           Day fractions are not stepped: past the last time of the day the full search is restarted from the
+           adjacent day, so a task executed once a day costs a full search per occurrence
+        """
+        seconds = self.schedule.seconds
+        if seconds is None:
+            return self._advance_minute(result, result_datetime, increment)
+
+        second = seconds.next(result.second + 1) if increment > 0 else seconds.previous(result.second - 1)
+        if second is not None:
+            result['second'] = second
+            return result
+        result = self._advance_minute(result, result_datetime, increment)
+        if result is not None:
+            result['second'] = seconds.first if increment > 0 else seconds.last
+        return result
+
+    def _advance_minute(self, result: DateTimeHolder, result_datetime: datetime, increment: int):
+        """Moves result to the adjacent minute the task is executed at
+        """
+        minutes = self.candidate_sets[self.fractions.minute.value]
+        hours = self.candidate_sets[self.fractions.hour.value]
+        if increment > 0:  # 1
+            minute = minutes.next(result.minute + 1)
+            if minute is not None:
+                result['minute'] = minute
+                return result
+            hour = hours.next(result.hour + 1)
+            if hour is not None:
+                result['hour'] = hour
+                result['minute'] = minutes.first
+                return result
+            try:
+                current_datetime = result_datetime.replace(hour=0, minute=0, second=0) + timedelta(days=1)
+            except OverflowError:
+                return None
+            return self._get_next_time(self._datetime_to_datetimeholder(current_datetime))
+        else:  # -1
+            minute = minutes.previous(result.minute - 1)
+            if minute is not None:
+                result['minute'] = minute
+                return result
+            hour = hours.previous(result.hour - 1)
+            if hour is not None:
+                result['hour'] = hour
+                result['minute'] = minutes.last
+                return result
+            try:
+                current_datetime = result_datetime.replace(hour=0, minute=0, second=0) - timedelta(minutes=1)
+            except OverflowError:
+                return None
+            return self._get_previous_time(self._datetime_to_datetimeholder(current_datetime))
 
     def _get_next_time(self, current: DateTimeHolder):
+        """Calculates next task time using current, recording search statistics if enabled
+        """
+        if self.stats is None:
+            return self._search_next_time(current, None)
+
+        search_stats = SearchStats(+1)
+        started = perf_counter()
+        try:
+            return self._search_next_time(current, search_stats)
+        except Exception:
+            search_stats.failed = True
+            raise
+        finally:
+            search_stats.wall_time = perf_counter() - started
+            self.stats.record(self, search_stats)
+
+    def _search_next_time(self, current: DateTimeHolder, search_stats: SearchStats):
         """Calculates next task time using current
         """
+        if self._search_by_month:
+            return self._get_next_time_by_month(current, search_stats)
+
         result = DateTimeHolder()
         fraction_value = self.highest_fraction.value
         i = 0
         while fraction_value != -1:  # From year to minute
             i += 1
-            if i > self.max_iterations:  # Max iteration check
-                raise ValueError("maximum number of iterations exceeded. You found a bug with scheduledtask. Dump: " +
-                                 "candidates: {}, ".format(self.candidates) +
-                                 "current: {}, max_iterations: {}".format(current, self.max_iterations))
+            self._check_iterations(i, current)
+            if search_stats is not None:
+                search_stats.iterations = i
 
             fraction = self.fractions(fraction_value)
             if fraction is self.highest_fraction \
                     or self._datetimeholders_equal(result, current, self.fractions(fraction_value+1)):
-                result[fraction.name] = get_smallest_value_greater_or_equal_to(self.candidates[fraction_value],
-                                                                               current[fraction.name])
+                result[fraction.name] = self.candidate_sets[fraction_value].next(current[fraction.name])
             else:
-                result[fraction.name] = first(self.candidates[fraction_value])
+                result[fraction.name] = self.candidate_sets[fraction_value].first
 
-            if result[fraction.name] is None \
-                    or not self._datetimeholder_valid(result, fraction) \
-                    or not self._datetimeholders_compare(result, current, fraction) > -1:  # In case with day_of_week_num
+            if result[fraction.name] is None:
+                reason = 'no_candidate'
+            else:
+                reason = self._datetimeholder_invalid_reason(result, fraction)
+                if reason is None and not self._datetimeholders_compare(result, current, fraction) > -1:
+                    reason = 'before_current'  # In case with day_of_week_num
+
+            if reason is not None:
+                if search_stats is not None:
+                    search_stats.invalid[reason] += 1
                 if fraction == self.highest_fraction:
                     return None  # Can't find highest fraction match, event never happened in the past
 
                 # Decrease higher fractions on result datetime, recalculate starting from that fraction-1
-                fraction_value += self._increase_fraction(result, self.fractions(fraction_value + 1), +1, current) - 1
+                increased = self._increase_fraction(result, self.fractions(fraction_value + 1), +1, current,
+                                                    search_stats)
+                if increased is None:
+                    return None
+                fraction_value += increased - 1
                 continue
 
             fraction_value -= 1
         return result
 
     def _get_previous_time(self, current: DateTimeHolder):
+        """Calculates previous task time using current, recording search statistics if enabled
+        """
+        if self.stats is None:
+            return self._search_previous_time(current, None)
+
+        search_stats = SearchStats(-1)
+        started = perf_counter()
+        try:
+            return self._search_previous_time(current, search_stats)
+        except Exception:
+            search_stats.failed = True
+            raise
+        finally:
+            search_stats.wall_time = perf_counter() - started
+            self.stats.record(self, search_stats)
+
+    def _search_previous_time(self, current: DateTimeHolder, search_stats: SearchStats):
         """Calculates previous task time using current
         """
+        if self._search_by_month:
+            return self._get_previous_time_by_month(current, search_stats)
+
         result = DateTimeHolder()
         fraction_value = self.highest_fraction.value
         i = 0
         while fraction_value != -1:  # From year to minute
             i += 1
-            if i > self.max_iterations:  # Max iteration check
-                raise ValueError("maximum number of iterations exceeded. You found a bug with scheduledtask. Dump: " +
-                                 "candidates: {}, ".format(self.candidates) +
-                                 "current: {}, max_iterations: {}".format(current, self.max_iterations))
+            self._check_iterations(i, current)
+            if search_stats is not None:
+                search_stats.iterations = i
 
             fraction = self.fractions(fraction_value)
             if fraction is self.highest_fraction \
                     or self._datetimeholders_equal(result, current, self.fractions(fraction_value + 1)):
-                result[fraction.name] = get_biggest_value_less_or_equal_to(self.candidates[fraction_value],
-                                                                           current[fraction.name])
+                result[fraction.name] = self.candidate_sets[fraction_value].previous(current[fraction.name])
+            else:
+                result[fraction.name] = self.candidate_sets[fraction_value].last
+
+            if result[fraction.name] is None:
+                reason = 'no_candidate'
             else:
-                result[fraction.name] = last(self.candidates[fraction_value])
+                reason = self._datetimeholder_invalid_reason(result, fraction)
+                while reason in _EXCEEDS_MONTH:  # Clamp to the last candidate within the month
+                    if search_stats is not None:
+                        search_stats.invalid[reason] += 1
+                    result[fraction.name] = self.candidate_sets[fraction_value].previous(result[fraction.name] - 1)
+                    if result[fraction.name] is None:
+                        reason = 'no_candidate'
+                    else:
+                        reason = self._datetimeholder_invalid_reason(result, fraction)
+                if reason is None and not self._datetimeholders_compare(result, current, fraction) < 1:
+                    reason = 'after_current'  # In case with day_of_week_num
 
-            if result[fraction.name] is None \
-                    or not self._datetimeholder_valid(result, fraction) \
-                    or not self._datetimeholders_compare(result, current, fraction) < 1:  # In case with day_of_week_num
+            if reason is not None:
+                if search_stats is not None:
+                    search_stats.invalid[reason] += 1
                 if fraction == self.highest_fraction:
                     return None  # Can't find highest fraction match, event never happened in the past
 
                 # Decrease higher fractions on result datetime, recalculate starting from that fraction-1
-                fraction_value += self._increase_fraction(result, self.fractions(fraction_value + 1), -1, current) - 1
+                increased = self._increase_fraction(result, self.fractions(fraction_value + 1), -1, current,
+                                                    search_stats)
+                if increased is None:
+                    return None
+                fraction_value += increased - 1
                 continue
 
             fraction_value -= 1
         return result
+
+    def _time_to_datetimeholder(self, year: int, month: int, day: int, hour: int, minute: int):
+        """Creates date time holder of the task strategy from the day of month
+        """
+        if self.strategy == TaskStrategy.days_of_month:
+            return DateTimeHolder(minute=minute, hour=hour, day=day, month=month, year=year)
+
+        month_first_weekday = first_weekday(year, month)
+        day_of_week = (month_first_weekday + day - 1) % 7
+        if self.strategy == TaskStrategy.days_of_week_num:
+            return DateTimeHolder(minute=minute, hour=hour, day_of_week=day_of_week, day_of_week_num=(day - 1) // 7,
+                                  month=month, year=year)
+        else:
+            return DateTimeHolder(minute=minute, hour=hour, day_of_week=day_of_week,
+                                  week=(day + month_first_weekday - 1) // 7, month=month, year=year)
+
+    def _check_iterations(self, i: int, current):
+        if i > self.max_iterations:  # Max iteration check
+            raise ValueError("maximum number of iterations exceeded. You found a bug with scheduledtask. Dump: " +
+                             "candidates: {}, ".format(self.candidates) +
+                             "current: {}, max_iterations: {}".format(current, self.max_iterations))
+
+    def _get_next_time_by_month(self, current: DateTimeHolder, search_stats: SearchStats = None):
+        """Calculates next task time using current with the compiled search
+        """
+        result = self._compiled_next_time(current.year, current.month, current.day_of_month(), current.hour,
+                                          current.minute, search_stats)
+        return self._time_to_datetimeholder(*result) if result is not None else None
+
+    def _get_previous_time_by_month(self, current: DateTimeHolder, search_stats: SearchStats = None):
+        """Calculates previous task time using current with the compiled search
+        """
+        result = self._compiled_previous_time(current.year, current.month, current.day_of_month(), current.hour,
+                                              current.minute, search_stats)
+        return self._time_to_datetimeholder(*result) if result is not None else None
+
+    def _compiled_next_time(self, year: int, month: int, day: int, hour: int, minute: int,
+                            search_stats: SearchStats = None):
+        """Calculates next task time as (year, month, day, hour, minute) tuple, or None.
+           Walks candidate months, resolving day, hour and minute of every month through fixed-index lookup tables
+        """
+        schedule = self.schedule
+        next_hour = schedule.next_hour
+        next_minute = schedule.next_minute
+        i = 0
+        while True:
+            i += 1
+            self._check_iterations(i, (year, month, day, hour, minute))
+            if search_stats is not None:
+                search_stats.iterations = i
+
+            year_month = schedule.next_year_month(year, month)
+            if year_month is None:
+                return None  # Event will never happen in the future
+            if year_month[0] != year or year_month[1] != month:
+                (year, month), day, hour, minute = year_month, 1, 0, 0
+
+            next_day = schedule.month_day_tables(year, month)[0][day]
+            if next_day < 0:
+                if search_stats is not None:
+                    search_stats.backtracks['month'] += 1
+                year, month, day, hour, minute = (year, month + 1, 1, 0, 0) if month < 12 else (year + 1, 1, 1, 0, 0)
+                continue
+            if next_day != day:
+                day, hour, minute = next_day, 0, 0
+
+            found_hour = next_hour[hour]
+            if found_hour == hour:
+                found_minute = next_minute[minute]
+                if found_minute >= 0:
+                    return year, month, day, hour, found_minute
+                found_hour = next_hour[hour + 1]
+            if found_hour < 0:
+                if search_stats is not None:
+                    search_stats.backtracks['day'] += 1
+                day, hour, minute = day + 1, 0, 0
+                continue
+            return year, month, day, found_hour, next_minute[0]
+
+    def _compiled_previous_time(self, year: int, month: int, day: int, hour: int, minute: int,
+                                search_stats: SearchStats = None):
+        """Calculates previous task time as (year, month, day, hour, minute) tuple, or None.
+           Walks candidate months back, resolving day, hour and minute of every month through fixed-index lookup tables
+        """
+        schedule = self.schedule
+        previous_hour = schedule.previous_hour
+        previous_minute = schedule.previous_minute
+        i = 0
+        while True:
+            i += 1
+            self._check_iterations(i, (year, month, day, hour, minute))
+            if search_stats is not None:
+                search_stats.iterations = i
+
+            year_month = schedule.previous_year_month(year, month)
+            if year_month is None:
+                return None  # Event never happened in the past
+            if year_month[0] != year or year_month[1] != month:
+                (year, month), day, hour, minute = year_month, 31, 23, 59
+
+            previous_day = schedule.month_day_tables(year, month)[1][day]
+            if previous_day < 0:
+                if search_stats is not None:
+                    search_stats.backtracks['month'] += 1
+                year, month, day, hour, minute = (year, month - 1, 31, 23, 59) if month > 1 else \
+                    (year - 1, 12, 31, 23, 59)
+                continue
+            if previous_day != day:
+                day, hour, minute = previous_day, 23, 59
+
+            found_hour = previous_hour[hour]
+            if found_hour == hour:
+                found_minute = previous_minute[minute]
+                if found_minute >= 0:
+                    return year, month, day, hour, found_minute
+                found_hour = previous_hour[hour - 1] if hour > 0 else -1
+            if found_hour < 0:
+                if search_stats is not None:
+                    search_stats.backtracks['day'] += 1
+                day, hour, minute = day - 1, 23, 59
+                continue
+            return year, month, day, found_hour, previous_minute[59]
+
+
+def _restore_task(schedule: CompiledSchedule, max_iterations: int, engine: SearchEngine, tz: tzinfo,
+                  cache_size: int):
+    return ScheduledTask(schedule=schedule, max_iterations=max_iterations, engine=engine, tz=tz,
+                         cache_size=cache_size)
+
+
+def _mask(values, offset: int = 0):
+    if isinstance(values, CandidateSet) and values.mask is not None:
+        return values.mask >> offset
+    mask = 0
+    for value in values:
+        mask |= 1 << (value - offset)
+    return mask
+
+
+def _or_minus_one(value):
+    return -1 if value is None else value
+
+
+_schedules = WeakValueDictionary()  # Interned schedules created by compile_schedule
+_cron_schedules = WeakValueDictionary()  # Normalized cron expression -> schedule, see ScheduledTask.from_cron
@@ -0,0 +1,56 @@
+from collections import Counter
+
+
+class SearchStats:
+    """Statistics of a single next/previous time search
+    """
+    __slots__ = ['direction', 'iterations', 'backtracks', 'invalid', 'wall_time', 'failed']
+
+    def __init__(self, direction: int):
+        self.direction = direction  # +1 for next time search, -1 for previous time search
+        self.iterations = 0
+        self.backtracks = Counter()  # Fraction name -> number of times the search moved that fraction
+        self.invalid = Counter()  # Reason -> number of rejected candidates
+        self.wall_time = 0.0  # Seconds
+        self.failed = False  # Search raised, e.g. exceeded max_iterations
+
+    def __repr__(self):
+        return "SearchStats(direction={}, iterations={}, backtracks={}, invalid={}, wall_time={}, failed={})".format(
+            self.direction, self.iterations, dict(self.backtracks), dict(self.invalid), self.wall_time, self.failed)
+
+
+class StatsCollector:
+    """Aggregates statistics of searches of every task it's passed to.
+       One collector can be shared by many tasks to collect global statistics
+    """
+    def __init__(self, hook=None):
+        """
+        :param hook:Optional callable hook(task, search_stats) called after every search, including failed ones,
+                    e.g. to export metrics
+        """
+        self.hook = hook
+        self.reset()
+
+    def reset(self):
+        self.searches = 0
+        self.failures = 0  # Searches that raised
+        self.iterations = 0
+        self.max_iterations = 0  # Iterations of the longest search
+        self.backtracks = Counter()
+        self.invalid = Counter()
+        self.wall_time = 0.0
+
+    def record(self, task, search_stats: SearchStats):
+        self.searches += 1
+        self.failures += search_stats.failed
+        self.iterations += search_stats.iterations
+        self.max_iterations = max(self.max_iterations, search_stats.iterations)
+        self.backtracks.update(search_stats.backtracks)
+        self.invalid.update(search_stats.invalid)
+        self.wall_time += search_stats.wall_time
+        if self.hook is not None:
+            self.hook(task, search_stats)
+
+    @property
+    def iterations_per_search(self):
+        return self.iterations / self.searches if self.searches else 0.0
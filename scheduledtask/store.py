@@ -0,0 +1,191 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from .misfire import MisfirePolicy
+from .scheduledtask import ScheduledTask, SearchEngine, compile_schedule
+from .tz import as_utc
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class ScheduleStore:
+    """Scheduled tasks persisted in SQLite together with their next execution times, indexed by that time.
+       A restarted process finds due tasks with an index lookup instead of searching every stored schedule,
+       only the tasks that fire are loaded and rescheduled. Tasks are stored by name as JSON of their rules
+       and settings. Timezones must be zoneinfo.ZoneInfo or datetime.timezone, search statistics are not stored
+    """
+    def __init__(self, path: str = ':memory:'):
+        """
+        :param path:SQLite database file, created if it doesn't exist
+        """
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS tasks "
+                                     "(name TEXT PRIMARY KEY, task TEXT NOT NULL, next_time TEXT)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS tasks_next_time ON tasks (next_time)")
+        self._tasks = {}  # Name -> loaded task
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def __contains__(self, name: str):
+        return self._connection.execute("SELECT 1 FROM tasks WHERE name = ?", (name,)).fetchone() is not None
+
+    def add(self, name: str, task: ScheduledTask, current_datetime: datetime = None):
+        """Stores task under the name, replacing the task stored under it, with its next execution time nearest
+           to the given datetime. Returns that time, None if the task will never be executed
+        """
+        next_time = task.get_next_time(current_datetime)
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO tasks (name, task, next_time) VALUES (?, ?, ?)",
+                                     (name, _dump_task(task), _to_key(next_time)))
+        self._tasks[name] = task
+        return next_time
+
+    def add_many(self, tasks, current_datetime: datetime = None):
+        """Stores many (name, task) pairs like add, in a single transaction
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+        rows = []
+        for name, task in tasks:
+            rows.append((name, _dump_task(task), _to_key(task.get_next_time(current_datetime))))
+            self._tasks[name] = task
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO tasks (name, task, next_time) VALUES (?, ?, ?)", rows)
+
+    def remove(self, name: str):
+        """Removes task stored under the name. Raises KeyError if there's no such task
+        """
+        with self._connection:
+            if self._connection.execute("DELETE FROM tasks WHERE name = ?", (name,)).rowcount == 0:
+                raise KeyError(name)
+        self._tasks.pop(name, None)
+
+    def get(self, name: str):
+        """Returns task stored under the name. Raises KeyError if there's no such task
+        """
+        task = self._tasks.get(name)
+        if task is None:
+            row = self._connection.execute("SELECT task FROM tasks WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                raise KeyError(name)
+            task = self._tasks[name] = _load_task(row[0])
+        return task
+
+    def get_next_time(self, name: str):
+        """Returns stored next execution time of the task, None if it will never be executed
+        """
+        row = self._connection.execute("SELECT next_time FROM tasks WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return _from_key(row[0], self.get(name)) if row[0] is not None else None
+
+    def peek_next(self):
+        """Returns (next_time, name) tuple of the task that will be executed first, or None if nothing is scheduled
+        """
+        row = self._connection.execute("SELECT name, next_time FROM tasks WHERE next_time IS NOT NULL "
+                                       "ORDER BY next_time, name LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return _from_key(row[1], self.get(row[0])), row[0]
+
+    def pop_due(self, current_datetime: datetime = None, misfire: MisfirePolicy = MisfirePolicy.fire_all):
+        """Returns list of (time, name, task) tuples for all tasks due at the given datetime, ordered by time.
+           Like TaskIndex.pop_due, every returned task is rescheduled to its next execution time after the time
+           it was due, all of them in one transaction. With fire_all every missed execution time is returned,
+           fire_once returns every due task once, for its last execution time until the given datetime,
+           skip only reschedules due tasks after the given datetime
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+
+        due = []
+        key = _to_key(current_datetime)
+        with self._connection:
+            while True:
+                rows = self._connection.execute("SELECT name, next_time FROM tasks WHERE next_time <= ? "
+                                                "ORDER BY next_time, name", (key,)).fetchall()
+                if not rows:
+                    break
+                updates = []
+                for name, next_key in rows:
+                    task = self.get(name)
+                    if misfire == MisfirePolicy.fire_all:
+                        next_time = _from_key(next_key, task)
+                    else:
+                        next_time = task.get_previous_time(current_datetime)
+                    if misfire != MisfirePolicy.skip:
+                        due.append((next_time, name, task))
+                    try:
+                        following_time = task.get_next_time(next_time + task.resolution)
+                    except OverflowError:
+                        following_time = None
+                    updates.append((_to_key(following_time), name))
+                self._connection.executemany("UPDATE tasks SET next_time = ? WHERE name = ?", updates)
+        due.sort(key=lambda entry: (_to_key(entry[0]), entry[1]))
+        return due
+
+
+def _dump_task(task: ScheduledTask):
+    """Returns JSON of the rules and settings of the task. Ranges are kept as start, stop and step
+    """
+    rules = {name: {'start': candidates.start, 'stop': candidates.stop, 'step': candidates.step}
+             if type(candidates) == range else candidates for name, candidates in task.schedule.kwargs.items()}
+    return json.dumps({'rules': rules, 'max_iterations': task.max_iterations, 'engine': task.engine.name,
+                       'cache_size': task.cache.maxsize if task.cache is not None else None,
+                       'tz': _dump_tz(task.tz)}, sort_keys=True)
+
+
+def _load_task(text: str):
+    data = json.loads(text)
+    rules = {name: range(candidates['start'], candidates['stop'], candidates['step'])
+             if isinstance(candidates, dict) else candidates for name, candidates in data['rules'].items()}
+    return ScheduledTask(schedule=compile_schedule(**rules), max_iterations=data['max_iterations'],
+                         engine=SearchEngine[data['engine']], cache_size=data['cache_size'], tz=_load_tz(data['tz']))
+
+
+def _dump_tz(tz):
+    if tz is None:
+        return None
+    if isinstance(tz, timezone):
+        return {'utc_offset': tz.utcoffset(None) // timedelta(seconds=1)}
+    key = getattr(tz, 'key', None)  # zoneinfo.ZoneInfo
+    if key is None:
+        raise ValueError("only zoneinfo.ZoneInfo and datetime.timezone timezones can be stored")
+    return {'key': key}
+
+
+def _load_tz(data):
+    if data is None:
+        return None
+    if 'utc_offset' in data:
+        return timezone(timedelta(seconds=data['utc_offset']))
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(data['key'])
+
+
+def _to_key(dt: datetime):
+    """Stored time: naive UTC datetime as text, which sorts in time order
+    """
+    if dt is None:
+        return None
+    dt = as_utc(dt)  # Not strftime, it doesn't pad years before 1000 on every platform
+    return '{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}'.format(dt.year, dt.month, dt.day,
+                                                               dt.hour, dt.minute, dt.second)
+
+
+def _from_key(key: str, task: ScheduledTask):
+    dt = datetime.strptime(key, _TIME_FORMAT)
+    if task.tz is None:
+        return dt
+    return dt.replace(tzinfo=timezone.utc).astimezone(task.tz)
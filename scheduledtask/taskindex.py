@@ -0,0 +1,94 @@
+import heapq
+from datetime import datetime
+from itertools import count
+from .misfire import MisfirePolicy
+from .scheduledtask import ScheduledTask
+from .tz import as_utc
+
+
+class TaskIndex:
+    """Keeps many scheduled tasks in a min-heap keyed by their next execution time.
+       Times are ordered in UTC, naive datetimes are considered to be UTC
+    """
+    def __init__(self):
+        self._heap = []  # [UTC time, sequence, task, next_time], task is None for removed entries
+        self._entries = {}  # task -> heap entry
+        self._sequence = count()  # Tie breaker, tasks themselves are not comparable
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, task: ScheduledTask):
+        return task in self._entries
+
+    def add(self, task: ScheduledTask, current_datetime: datetime = None):
+        """Adds task to the index using its next execution time nearest to the given datetime.
+           Returns that time, or None if the task will never be executed (task is not added then)
+        """
+        if task in self._entries:
+            self.remove(task)
+        next_time = task.get_next_time(current_datetime)
+        if next_time is not None:
+            self._push(task, next_time)
+        return next_time
+
+    def remove(self, task: ScheduledTask):
+        """Removes task from the index. Entry is dropped lazily when it reaches the top of the heap
+        """
+        entry = self._entries.pop(task)
+        entry[2] = None
+
+    def peek_next(self):
+        """Returns (next_time, task) tuple of the task that will be executed first, or None if index is empty
+        """
+        self._drop_removed()
+        if not self._heap:
+            return None
+        _, _, task, next_time = self._heap[0]
+        return next_time, task
+
+    def pop_due(self, current_datetime: datetime = None, misfire: MisfirePolicy = MisfirePolicy.fire_all):
+        """Returns list of (time, task) tuples for all tasks due at the given datetime, ordered by time.
+           Every returned task is re-inserted with its next execution time after the time it was due.
+           With fire_all every missed execution time is returned, so after a long downtime a frequent task
+           returns as many entries as it missed. fire_once returns every due task once, for its last execution
+           time until the given datetime, skip only re-inserts due tasks after the given datetime
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+
+        end = as_utc(current_datetime)
+        due = []
+        while True:
+            self._drop_removed()
+            if not self._heap or self._heap[0][0] > end:
+                break
+            _, _, task, next_time = self._heap[0]
+            if misfire != MisfirePolicy.fire_all:
+                next_time = task.get_previous_time(current_datetime)
+            if misfire != MisfirePolicy.skip:
+                due.append((next_time, task))
+
+            try:
+                following_time = task.get_next_time(next_time + task.resolution)
+            except OverflowError:
+                following_time = None
+            if following_time is not None:
+                entry = [as_utc(following_time), next(self._sequence), task, following_time]
+                self._entries[task] = entry
+                heapq.heapreplace(self._heap, entry)
+            else:
+                del self._entries[task]
+                heapq.heappop(self._heap)
+        if misfire != MisfirePolicy.fire_all:
+            due.sort(key=lambda entry: as_utc(entry[0]))
+        return due
+
+    def _push(self, task: ScheduledTask, next_time: datetime):
+        entry = [as_utc(next_time), next(self._sequence), task, next_time]
+        self._entries[task] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _drop_removed(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
@@ -0,0 +1,115 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+_DAY = timedelta(days=1)
+_MINUTE = timedelta(minutes=1)
+_MARGIN = timedelta(days=2)  # Tables of adjacent years overlap, so wall times near the new year need one table
+
+
+class TransitionTable:
+    """UTC offsets of a timezone. Offset changes (DST and other transitions) of every year are found once
+       and cached, so converting between UTC and wall clock time is a bisect instead of a zone lookup.
+       Works with any tzinfo implementing fromutc, i.e. zoneinfo.ZoneInfo or datetime.timezone
+    """
+    __slots__ = ['tz', '_years']
+
+    def __init__(self, tz):
+        self.tz = tz
+        # Year -> (instants, offsets, wall_bounds): offsets[i] is the offset in effect before UTC instants[i],
+        # wall_bounds[i] is the wall clock time of instants[i] in that offset
+        self._years = {}
+
+    def _year(self, year: int):
+        table = self._years.get(year)
+        if table is None:
+            table = self._years[year] = self._find_transitions(year)
+        return table
+
+    def _zone_offset(self, utc: datetime):
+        return self.tz.fromutc(utc.replace(tzinfo=self.tz)).utcoffset()
+
+    def _find_transitions(self, year: int):
+        """Samples the offset every day of the year (with a margin) and bisects every change down to the minute
+        """
+        instants = []
+        start = datetime(year, 1, 1) - _MARGIN if year > 1 else datetime.min
+        offsets = [self._zone_offset(start)]
+        end = datetime(year + 1, 1, 1) + _MARGIN if year < 9999 else datetime.max.replace(second=0, microsecond=0)
+        while start < end:
+            stop = min(start + _DAY, end)
+            offset = self._zone_offset(stop)
+            if offset != offsets[-1]:
+                low, high = start, stop  # Offset changes after low, at or before high
+                while high - low > _MINUTE:
+                    middle = (low + (high - low) // 2).replace(second=0, microsecond=0)
+                    if self._zone_offset(middle) == offsets[-1]:
+                        low = middle
+                    else:
+                        high = middle
+                instants.append(high)
+                offsets.append(offset)
+            start = stop
+        wall_bounds = [instant + offset for instant, offset in zip(instants, offsets)]
+        return instants, offsets, wall_bounds
+
+    def utc_offset(self, utc: datetime):
+        """Returns offset of the timezone at naive UTC datetime
+        """
+        instants, offsets, _ = self._year(utc.year)
+        return offsets[bisect_right(instants, utc)]
+
+    def to_local(self, utc: datetime):
+        """Converts naive UTC datetime into naive wall clock time
+        """
+        return utc + self.utc_offset(utc)
+
+    def to_utc(self, wall: datetime):
+        """Converts naive wall clock time into naive UTC datetime.
+           Repeated wall time (i.e. DST ends) resolves to its first occurrence,
+           skipped wall time (i.e. DST starts) resolves to the end of the gap, so the conversion keeps the order
+        """
+        instants, offsets, wall_bounds = self._year(wall.year)
+        i = bisect_right(wall_bounds, wall)  # Transitions whose wall clock time (before them) is not later
+        if i > 0 and wall < instants[i - 1] + offsets[i]:
+            return instants[i - 1]  # Skipped by the transition
+        return wall - offsets[i]
+
+    def repeated_until(self, utc: datetime):
+        """Returns wall clock time at which the repeated wall times end, if the naive UTC datetime is the second
+           occurrence of a repeated wall time, None otherwise
+        """
+        instants, offsets, wall_bounds = self._year(utc.year)
+        i = bisect_right(instants, utc)
+        if i > 0 and offsets[i - 1] > offsets[i] and utc + offsets[i] < wall_bounds[i - 1]:
+            return wall_bounds[i - 1]
+        return None
+
+    def gaps_between(self, start: datetime, end: datetime):
+        """Yields (start, end) wall clock times of every gap of skipped wall times (i.e. DST starts)
+           whose transition is after start and before end, naive UTC datetimes
+        """
+        for year in range(start.year, end.year + 1):
+            instants, offsets, wall_bounds = self._year(year)
+            for i in range(bisect_right(instants, start), bisect_left(instants, end)):
+                if instants[i].year == year and offsets[i + 1] > offsets[i]:  # Margins of adjacent years overlap
+                    yield wall_bounds[i], instants[i] + offsets[i + 1]
+
+
+_tables = {}  # Timezone -> TransitionTable
+
+
+def transition_table(tz):
+    """Returns TransitionTable of the timezone, shared by every task using it
+    """
+    table = _tables.get(tz)
+    if table is None:
+        table = _tables[tz] = TransitionTable(tz)
+    return table
+
+
+def as_utc(dt: datetime):
+    """Converts aware datetime into naive UTC datetime, naive datetime is considered to be UTC already
+    """
+    if dt.tzinfo is None:
+        return dt
+    return dt.replace(tzinfo=None) - dt.utcoffset()
@@ -1,11 +1,113 @@
-from datetime import datetime
-from calendar import monthrange
+from array import array
+from calendar import isleap
+from datetime import date, datetime, MINYEAR, MAXYEAR
+
+
+class CandidateSet:
+    """Immutable compiled set of candidate values for a single fraction.
+       Ranges are kept as start/stop/step and resolved arithmetically, lists are packed into an integer bitmask,
+       so next/previous lookups never allocate intermediate lists
+    """
+    __slots__ = ['start', 'stop', 'step', 'mask', 'first', 'last']
+
+    def __init__(self, iter: list or range):
+        if type(iter) == range and iter.step < 0:
+            iter = list(iter)
+
+        if type(iter) == range:
+            if len(iter) == 0:
+                raise ValueError("candidates must not be empty")
+            self.start = iter.start
+            self.stop = iter.stop
+            self.step = iter.step
+            self.mask = None
+            self.first = iter.start
+            self.last = iter.stop - (iter.stop - 1 - iter.start) % iter.step - 1  # Step-aware last element
+        elif type(iter) in (list, tuple):
+            if len(iter) == 0:
+                raise ValueError("candidates must not be empty")
+            mask = 0
+            for value in iter:
+                if value < 0:
+                    raise ValueError("candidates must not be negative")
+                mask |= 1 << value
+            self.start = self.stop = self.step = None
+            self.mask = mask
+            self.first = (mask & -mask).bit_length() - 1
+            self.last = mask.bit_length() - 1
+        else:
+            raise ValueError("iter must be of type list or range")
+
+    def next(self, value: int):
+        """Returns the smallest candidate that is greater or equal to the value. Return None if not found
+        """
+        if value <= self.first:
+            return self.first
+        if value > self.last:
+            return None
+        if self.mask is None:
+            return value + (self.step - ((value - self.start) % self.step)) % self.step
+        mask = self.mask >> value
+        return value + (mask & -mask).bit_length() - 1
+
+    def previous(self, value: int):
+        """Returns the biggest candidate that is less or equal to the value. Return None if not found
+        """
+        if value >= self.last:
+            return self.last
+        if value < self.first:
+            return None
+        if self.mask is None:
+            return value - ((value - self.start) % self.step)
+        return (self.mask & ((2 << value) - 1)).bit_length() - 1
+
+    def count_below(self, value: int):
+        """Returns number of candidates less than the value
+        """
+        if value <= self.first:
+            return 0
+        if value > self.last:
+            return len(self)
+        if self.mask is None:
+            return (value - 1 - self.first) // self.step + 1
+        return bin(self.mask & ((1 << value) - 1)).count('1')
+
+    def __contains__(self, value):
+        if value < self.first or value > self.last:
+            return False
+        if self.mask is None:
+            return (value - self.start) % self.step == 0
+        return bool(self.mask >> value & 1)
+
+    def __iter__(self):
+        if self.mask is None:
+            return iter(range(self.first, self.last + 1, self.step))
+        return (value for value in range(self.first, self.last + 1) if self.mask >> value & 1)
+
+    def __len__(self):
+        if self.mask is None:
+            return (self.last - self.first) // self.step + 1
+        return bin(self.mask).count('1')
+
+    def __eq__(self, other):
+        return isinstance(other, CandidateSet) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        if self.mask is None:
+            return "CandidateSet(range({}, {}, {}))".format(self.start, self.stop, self.step)
+        return "CandidateSet({})".format(list(self))
 
 
 def get_biggest_value_less_or_equal_to(iter: list or range, value):
     """Returns the biggest element from the list that is less or equal to the value. Return None if not found
     """
-    if type(iter) == list:
+    if type(iter) == CandidateSet:
+        return iter.previous(value)
+
+    elif type(iter) == list:
         i = [x for x in iter if x <= value]
         return max(i) if i else None
 
@@ -24,7 +126,10 @@ def get_biggest_value_less_or_equal_to(iter: list or range, value):
 def get_smallest_value_greater_or_equal_to(iter: list or range, value):
     """Returns the smallest element from the list that is greater or equal to the value. Return None if not found
     """
-    if type(iter) == list:
+    if type(iter) == CandidateSet:
+        return iter.next(value)
+
+    elif type(iter) == list:
         i = [x for x in iter if x >= value]
         return min(i) if i else None
 
@@ -43,7 +148,9 @@ def get_smallest_value_greater_or_equal_to(iter: list or range, value):
 def last(iter: list or range):
     """Returns the last element from the list or range
     """
-    if type(iter) == list:
+    if type(iter) == CandidateSet:
+        return iter.last
+    elif type(iter) == list:
         return iter[len(iter)-1]
     elif type(iter) == range:
         return iter.stop - (iter.stop - 1 - iter.start) % iter.step - 1  # Step-aware last element
@@ -54,7 +161,9 @@ def last(iter: list or range):
 def first(iter: list or range):
     """Returns first element from the list or range
     """
-    if type(iter) == list:
+    if type(iter) == CandidateSet:
+        return iter.first
+    elif type(iter) == list:
         return iter[0]
     elif type(iter) == range:
         return iter.start
@@ -62,8 +171,55 @@ def first(iter: list or range):
         raise ValueError("iter must be of type list or range")
 
 
+# Calendar table: first weekday, number of days and max week number of every month of years MINYEAR-MAXYEAR,
+# indexed by year * 12 + month - 1. Filled a year at a time when the year is first used, -1 means not filled yet.
+# One more year is allocated and never filled, so MAXYEAR + 1 (i.e. searching past the range) raises ValueError
+_first_weekdays = array('b', [-1]) * ((MAXYEAR + 2) * 12)
+_month_lengths = array('b', [-1]) * ((MAXYEAR + 2) * 12)
+_max_week_nums = array('b', [-1]) * ((MAXYEAR + 2) * 12)
+_MONTH_LENGTHS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _fill_year(year: int, month: int):
+    """Fills the calendar table with months of the year
+    """
+    if not MINYEAR <= year <= MAXYEAR or not 1 <= month <= 12:
+        raise ValueError("month {}/{} is out of the supported range".format(month, year))
+    month_first_weekday = date(year, 1, 1).weekday()
+    for i, n_days_in_month in enumerate(_MONTH_LENGTHS):
+        if i == 1 and isleap(year):
+            n_days_in_month += 1
+        _first_weekdays[year * 12 + i] = month_first_weekday
+        _max_week_nums[year * 12 + i] = (n_days_in_month + month_first_weekday - 1) // 7
+        _month_lengths[year * 12 + i] = n_days_in_month  # Written last, marks the year as filled
+        month_first_weekday = (month_first_weekday + n_days_in_month) % 7
+
+
 def num_days_in_month(year: int, month: int):
-    return monthrange(year, month)[1]
+    index = year * 12 + month - 1
+    if not 0 < month < 13 or _month_lengths[index] < 0:
+        _fill_year(year, month)
+    return _month_lengths[index]
+
+
+def first_weekday(year: int, month: int):
+    """Returns day of week of the first day of month, Monday is 0
+    """
+    index = year * 12 + month - 1
+    if not 0 < month < 13 or _month_lengths[index] < 0:
+        _fill_year(year, month)
+    return _first_weekdays[index]
+
+
+def nearest_weekday(day: int, month_first_weekday: int, n_days_in_month: int):
+    """Returns the weekday (Monday to Friday) nearest to the day of month, without leaving the month
+    """
+    weekday = (month_first_weekday + day - 1) % 7
+    if weekday == 5:  # Saturday, Friday before unless it's in the previous month
+        return day - 1 if day > 1 else day + 2
+    if weekday == 6:  # Sunday, Monday after unless it's in the next month
+        return day + 1 if day < n_days_in_month else day - 2
+    return day
 
 
 def weekday_num(dt: datetime):
@@ -75,18 +231,18 @@ def weekday_num(dt: datetime):
 def weekday_and_num_to_day(year: int, month: int, weekday_number: int, weekday: int):
     """Converts current year, month, weekday and weekday number into the day of month
     """
-    dt_first = datetime(year, month, 1)
-    dt_first_weekday = dt_first.weekday()
+    dt_first_weekday = first_weekday(year, month)
     return 1 - dt_first_weekday + weekday + ((0 if weekday >= dt_first_weekday else 1) + weekday_number) * 7
 
 
 def weekday_and_week_to_day(year: int, month: int, week: int, weekday: int):
     """Converts current year, month, weekday and week number into the day of month
     """
-    dt_first = datetime(year, month, 1)
-    dt_first_weekday = dt_first.weekday()
-    result = week * 7 + weekday - dt_first_weekday + 1
-    if result < 1 or result > num_days_in_month(year, month):
+    index = year * 12 + month - 1
+    if not 0 < month < 13 or _month_lengths[index] < 0:
+        _fill_year(year, month)
+    result = week * 7 + weekday - _first_weekdays[index] + 1
+    if result < 1 or result > _month_lengths[index]:
         return None
     else:
         return result
@@ -95,13 +251,14 @@ def weekday_and_week_to_day(year: int, month: int, week: int, weekday: int):
 def week_num(dt: datetime):
     """Returns week number of the given day
     """
-    dt_first = dt.replace(day=1)
-    dt_first_weekday = dt_first.weekday()
-    return int((dt.day + dt_first_weekday - 1) / 7)
+    return (dt.day + first_weekday(dt.year, dt.month) - 1) // 7
 
 
 def max_week_num(year: int, month: int):
     """Returns number of weeks (Monday to Friday) that month contains
     """
     # The same thing as week number for the last day of month
-    return week_num(datetime(year, month, num_days_in_month(year, month)))
+    index = year * 12 + month - 1
+    if not 0 < month < 13 or _month_lengths[index] < 0:
+        _fill_year(year, month)
+    return _max_week_nums[index]
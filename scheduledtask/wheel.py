@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+from .misfire import MisfirePolicy
+from .scheduledtask import ScheduledTask
+from .tz import as_utc
+
+_MINUTE = timedelta(minutes=1)
+_HOUR = timedelta(hours=1)
+_DAY = timedelta(days=1)
+
+
+class TimingWheel:
+    """Keeps many scheduled tasks in a hierarchical timing wheel keyed by their next execution time: slots of
+       the minutes of the current hour, of the hours of the current day and a ring of lookahead_days days.
+       Adding, removing and firing a task is a dict operation on its slot instead of a heap push and pop.
+       As the wheel turns into an hour or a day, entries of its slot move to the finer slots. Entries later than
+       the ring wait in the slot of their day for the round of their date, so lookahead_days should cover
+       the intervals of most tasks. Times are ordered in UTC, naive datetimes are considered to be UTC
+    """
+    def __init__(self, current_datetime: datetime = None, lookahead_days: int = 7):
+        """
+        :param current_datetime:Time the wheel starts at, current UTC time if not given
+        :param lookahead_days:Number of day slots
+        """
+        if lookahead_days < 1:
+            raise ValueError("lookahead_days must be positive")
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+        self._now = current_datetime  # Time next execution times of added tasks are searched from
+        self._minute = as_utc(current_datetime).replace(second=0, microsecond=0)  # Earlier minutes are fired
+        self._hour_end = self._minute.replace(minute=0) + _HOUR
+        self._day_end = self._minute.replace(hour=0, minute=0) + _DAY
+        self._levels = ([{} for _ in range(60)], [{} for _ in range(24)], [{} for _ in range(lookahead_days)])
+        self._counts = [0, 0, 0]  # Entries of every level, empty levels are skipped as the wheel turns
+        self._slots = {}  # Task -> (level, slot), slot maps the task to (UTC time, next_time)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, task: ScheduledTask):
+        return task in self._slots
+
+    def add(self, task: ScheduledTask, current_datetime: datetime = None):
+        """Adds task to the wheel using its next execution time nearest to the given datetime, the time the wheel
+           was turned to by default. Replaces the entry of the task if it's already added.
+           Returns that time, or None if the task will never be executed (task is not added then)
+        """
+        if task in self._slots:
+            self.remove(task)
+        next_time = task.get_next_time(self._now if current_datetime is None else current_datetime)
+        if next_time is not None:
+            self._insert(task, next_time)
+        return next_time
+
+    def remove(self, task: ScheduledTask):
+        """Removes task from the wheel. Raises KeyError if there's no such task
+        """
+        level, slot = self._slots.pop(task)
+        del slot[task]
+        self._counts[level] -= 1
+
+    def pop_due(self, current_datetime: datetime = None, misfire: MisfirePolicy = MisfirePolicy.fire_all):
+        """Turns the wheel to the given datetime, returns list of (time, task) tuples for all tasks due until then,
+           ordered by time. Every returned task is re-inserted with its next execution time after the time it was due.
+           Like TaskIndex.pop_due, fire_all returns every missed execution time, fire_once returns every due task
+           once, for its last execution time until the given datetime, skip only re-inserts due tasks after it
+        """
+        if current_datetime is None:
+            current_datetime = datetime.utcnow()
+        end = as_utc(current_datetime)
+        end_minute = end.replace(second=0, microsecond=0)
+
+        due = []
+        minutes = self._levels[0]
+        while True:
+            slot = minutes[self._minute.minute]
+            if slot:
+                self._fire(slot, end, due, current_datetime, misfire)
+            if self._minute >= end_minute:
+                break
+            self._turn(end_minute)
+        if end > as_utc(self._now):
+            self._now = current_datetime
+        if misfire != MisfirePolicy.fire_all:  # Tasks fired in the minute of their first missed time
+            due.sort(key=lambda entry: as_utc(entry[0]))
+        return due
+
+    def _fire(self, slot: dict, end: datetime, due: list, current_datetime: datetime, misfire: MisfirePolicy):
+        fired = []
+        while True:
+            # Tasks with seconds rule may be re-inserted into the same minute
+            slot_due = [(task, entry) for task, entry in slot.items() if entry[0] <= end]
+            if not slot_due:
+                break
+            for task, entry in slot_due:
+                del slot[task]
+                del self._slots[task]
+                self._counts[0] -= 1
+                next_time = entry[1]
+                if misfire != MisfirePolicy.fire_all:
+                    next_time = task.get_previous_time(current_datetime)
+                    entry = (as_utc(next_time), next_time)
+                if misfire != MisfirePolicy.skip:
+                    fired.append((entry, task))
+
+                try:
+                    following_time = task.get_next_time(next_time + task.resolution)
+                except OverflowError:
+                    following_time = None
+                if following_time is not None:
+                    self._insert(task, following_time)
+        fired.sort(key=lambda fired_entry: fired_entry[0][0])
+        due.extend((entry[1], task) for entry, task in fired)
+
+    def _turn(self, end_minute: datetime):
+        """Turns the wheel to the following minute that can have entries, but not past end_minute
+        """
+        if self._counts[0]:
+            minute = self._minute + _MINUTE
+        elif self._counts[1]:
+            minute = self._hour_end
+        else:
+            minute = self._day_end
+        if minute > end_minute:  # Within the current hour or day, no entries until then
+            self._minute = end_minute
+            return
+
+        self._minute = minute
+        if minute >= self._hour_end:
+            self._hour_end = minute + _HOUR
+            if minute >= self._day_end:
+                self._day_end = minute + _DAY
+                self._cascade(2, minute.toordinal() % len(self._levels[2]))
+            self._cascade(1, minute.hour)
+
+    def _cascade(self, level: int, index: int):
+        """Moves entries of the slot that are due before the end of the current hour or day to the finer level
+        """
+        slot = self._levels[level][index]
+        moved = [(task, entry) for task, entry in slot.items() if entry[0] < self._day_end]
+        for task, entry in moved:
+            del slot[task]
+        self._counts[level] -= len(moved)
+        for task, (utc_time, next_time) in moved:
+            self._insert(task, next_time, utc_time)
+
+    def _insert(self, task: ScheduledTask, next_time: datetime, utc_time: datetime = None):
+        if utc_time is None:
+            utc_time = as_utc(next_time)
+        if utc_time < self._hour_end:
+            level, index = 0, max(utc_time, self._minute).minute
+        elif utc_time < self._day_end:
+            level, index = 1, utc_time.hour
+        else:
+            level, index = 2, utc_time.toordinal() % len(self._levels[2])
+        slot = self._levels[level][index]
+        slot[task] = (utc_time, next_time)
+        self._slots[task] = (level, slot)
+        self._counts[level] += 1
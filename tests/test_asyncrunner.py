@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+from scheduledtask import ScheduledTask
+from scheduledtask.asyncrunner import AsyncRunner, OverlapPolicy
+from datetime import datetime, timedelta
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+
+class TestAsyncRunner(unittest.TestCase):
+    def setUp(self):
+        self.current_time = datetime(2016, 11, 12, 23, 59)
+        self.runner = AsyncRunner(now=lambda: self.current_time)
+        self.calls = []
+
+    def _run(self, scenario):
+        """Runs the runner together with the scenario coroutine, stops the runner after the scenario is done
+        """
+        async def main():
+            runner = asyncio.ensure_future(self.runner.run())
+            await asyncio.sleep(0)
+            await scenario()
+            self.runner.stop()
+            await runner
+        loop = asyncio.new_event_loop()  # Not asyncio.run, it's not available before Python 3.7
+        try:
+            loop.run_until_complete(main())
+        finally:
+            loop.close()
+
+    async def _tick(self, minutes=1):
+        """Moves the clock and wakes up the runner
+        """
+        self.current_time += timedelta(minutes=minutes)
+        self.runner._notify()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    def test_fires_when_due(self):
+        async def callback(due_time):
+            self.calls.append(due_time)
+
+        async def scenario():
+            self.runner.register(ScheduledTask(minutes=[0]), callback)
+            await self._tick()
+            await self._tick(30)
+            await self._tick(30)
+
+        self._run(scenario)
+        self.assertEqual(self.calls, [datetime(2016, 11, 13, 0, 0), datetime(2016, 11, 13, 1, 0)])
+
+    @unittest.skipIf(ZoneInfo is None, "zoneinfo is not available")
+    def test_timezone(self):
+        """Tasks with timezone fire at their UTC time while the clock returns naive UTC datetimes
+        """
+        async def callback(due_time):
+            self.calls.append(due_time)
+
+        tz = ZoneInfo('Europe/Berlin')
+
+        async def scenario():
+            self.runner.register(ScheduledTask(minutes=[0], tz=tz), callback)
+            self.runner.register(ScheduledTask(minutes=[30]), callback)
+            await self._tick()
+            await self._tick(30)
+
+        self._run(scenario)
+        self.assertEqual(self.calls, [datetime(2016, 11, 13, 1, 0, tzinfo=tz), datetime(2016, 11, 13, 0, 30)])
+
+    def test_cancel(self):
+        async def callback(due_time):
+            self.calls.append(due_time)
+
+        async def scenario():
+            registration = self.runner.register(ScheduledTask(minutes=[0]), callback)
+            self.runner.cancel(registration)
+            await self._tick()
+
+        self._run(scenario)
+        self.assertEqual(self.calls, [])
+
+    def _test_overlap(self, overlap):
+        release = []  # Event is created in the loop it's used in
+
+        async def callback(due_time):
+            self.calls.append(due_time)
+            await release[0].wait()
+
+        async def scenario():
+            release.append(asyncio.Event())
+            self.runner.register(ScheduledTask(), callback, overlap=overlap)
+            await self._tick()
+            await self._tick()
+            release[0].set()
+            for _ in range(5):
+                await asyncio.sleep(0)
+
+        self._run(scenario)
+
+    def test_overlap_skip(self):
+        self._test_overlap(OverlapPolicy.skip)
+        self.assertEqual(self.calls, [datetime(2016, 11, 12, 23, 59)])
+
+    def test_overlap_queue(self):
+        self._test_overlap(OverlapPolicy.queue)
+        self.assertEqual(self.calls, [datetime(2016, 11, 12, 23, 59), datetime(2016, 11, 13, 0, 0),
+                                      datetime(2016, 11, 13, 0, 1)])
+
+    def test_overlap_concurrent(self):
+        self._test_overlap(OverlapPolicy.concurrent)
+        self.assertEqual(self.calls, [datetime(2016, 11, 12, 23, 59), datetime(2016, 11, 13, 0, 0),
+                                      datetime(2016, 11, 13, 0, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from scheduledtask import ScheduledTask
+from scheduledtask.bulk import bulk_next_times, bulk_previous_times
+from scheduledtask.scheduledtask import SearchEngine
+
+
+class TestBulk(unittest.TestCase):
+    def setUp(self):
+        self.tasks = [ScheduledTask(minutes=[i % 60], hours=[i % 24], days=[1 + i % 31],
+                                    engine=SearchEngine.compiled if i % 2 else SearchEngine.fraction)
+                      for i in range(100)]
+        self.current_datetime = datetime(2016, 11, 17, 10, 30)
+
+    def test_bulk_next_times(self):
+        chunks = list(bulk_next_times(iter(self.tasks), self.current_datetime, max_workers=2, chunk_size=30))
+        self.assertEqual([len(chunk) for chunk in chunks], [30, 30, 30, 10])
+        self.assertEqual([result for chunk in chunks for result in chunk],
+                         [task.get_next_time(self.current_datetime) for task in self.tasks])
+
+    def test_bulk_previous_times(self):
+        chunks = bulk_previous_times(self.tasks, self.current_datetime, max_workers=2, chunk_size=40)
+        self.assertEqual([result for chunk in chunks for result in chunk],
+                         [task.get_previous_time(self.current_datetime) for task in self.tasks])
+
+    def test_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            chunks = list(bulk_next_times(self.tasks[:5], self.current_datetime, executor=executor))
+        self.assertEqual(chunks, [[task.get_next_time(self.current_datetime) for task in self.tasks[:5]]])
+
+    def test_no_tasks(self):
+        self.assertEqual(list(bulk_next_times([], self.current_datetime, max_workers=1)), [])
+
+    def test_chunk_size(self):
+        with self.assertRaises(ValueError):
+            list(bulk_next_times(self.tasks, chunk_size=0))
@@ -0,0 +1,162 @@
+import unittest
+from scheduledtask import ScheduledTask
+from scheduledtask.cache import OccurrenceCache, CacheInfo, MonotonicDeadline
+from scheduledtask.scheduledtask import SearchEngine
+from datetime import datetime, timedelta
+
+
+class TestOccurrenceCache(unittest.TestCase):
+    def test_lookup(self):
+        cache = OccurrenceCache(10)
+        cache.store(datetime(2016, 11, 12, 0, 15), datetime(2016, 11, 12, 0, 45))
+        self.assertIsNone(cache.lookup(datetime(2016, 11, 12, 0, 14)))
+        self.assertEqual(cache.lookup(datetime(2016, 11, 12, 0, 15)),
+                         (datetime(2016, 11, 12, 0, 15), datetime(2016, 11, 12, 0, 45)))
+        self.assertEqual(cache.lookup(datetime(2016, 11, 12, 0, 45)),
+                         (datetime(2016, 11, 12, 0, 15), datetime(2016, 11, 12, 0, 45)))
+        self.assertIsNone(cache.lookup(datetime(2016, 11, 12, 0, 46)))
+        self.assertEqual(cache.info(), CacheInfo(hits=2, misses=2, maxsize=10, currsize=1))
+
+    def test_lookup_unbounded_interval(self):
+        cache = OccurrenceCache(10)
+        cache.store(datetime(2016, 11, 12, 0, 15), None)
+        self.assertEqual(cache.lookup(datetime(9999, 1, 1)), (datetime(2016, 11, 12, 0, 15), None))
+
+    def test_lru_eviction(self):
+        cache = OccurrenceCache(2)
+        cache.store(datetime(2016, 11, 12, 0, 0), datetime(2016, 11, 12, 1, 0))
+        cache.store(datetime(2016, 11, 12, 1, 0), datetime(2016, 11, 12, 2, 0))
+        cache.lookup(datetime(2016, 11, 12, 0, 30))  # First interval is now the most recently used
+        cache.store(datetime(2016, 11, 12, 2, 0), datetime(2016, 11, 12, 3, 0))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.lookup(datetime(2016, 11, 12, 0, 30)))
+        self.assertIsNone(cache.lookup(datetime(2016, 11, 12, 1, 30)))
+        self.assertIsNotNone(cache.lookup(datetime(2016, 11, 12, 2, 30)))
+
+
+class TestScheduledTaskCache(unittest.TestCase):
+    def test_cached_results(self):
+        """Cached task returns the same results as the task without cache
+        """
+        task = ScheduledTask(minutes=[15, 45], hours=[0, 12], days=range(0, 31, 2))
+        cached_task = ScheduledTask(minutes=[15, 45], hours=[0, 12], days=range(0, 31, 2), cache_size=16)
+        for i in range(0, 60 * 24 * 5, 7):
+            current_time = datetime(2016, 11, 12, 0, 0, 30) + timedelta(minutes=i)
+            self.assertEqual(cached_task.get_next_time(current_time), task.get_next_time(current_time))
+            self.assertEqual(cached_task.get_previous_time(current_time), task.get_previous_time(current_time))
+        info = cached_task.cache_info()
+        self.assertGreater(info.hits, info.misses)
+        self.assertLessEqual(info.currsize, 16)
+
+    def test_cached_month_end(self):
+        """Interval found from the first day of a month doesn't hide executions of the previous month
+        """
+        task = ScheduledTask(minutes=[0], hours=[9], cache_size=16)
+        self.assertEqual(task.get_previous_time(datetime(2016, 12, 1, 8, 0)), datetime(2016, 11, 30, 9, 0))
+        self.assertEqual(task.get_next_time(datetime(2016, 11, 15, 8, 0)), datetime(2016, 11, 15, 9, 0))
+        self.assertEqual(task.get_next_time(datetime(2016, 11, 30, 9, 30)), datetime(2016, 12, 1, 9, 0))
+
+    def test_cached_dense(self):
+        """References at execution times are cached too, so dense schedules hit the cache
+        """
+        for rules in [{}, {'minutes': range(0, 60, 5)}]:
+            task = ScheduledTask(cache_size=128, **rules)
+            uncached_task = ScheduledTask(**rules)
+            for i in range(600):
+                current_time = datetime(2016, 11, 12, 0, 0, 30) + timedelta(minutes=i)
+                self.assertEqual(task.get_next_time(current_time), uncached_task.get_next_time(current_time))
+                self.assertEqual(task.get_previous_time(current_time), uncached_task.get_previous_time(current_time))
+            info = task.cache_info()
+            self.assertGreater(info.hits, 2 * info.misses)
+            self.assertGreater(info.currsize, 0)
+
+    def test_cache_disabled(self):
+        self.assertIsNone(ScheduledTask(minutes=[0]).cache_info())
+
+
+class TestNextTimeCached(unittest.TestCase):
+    def setUp(self):
+        self.task = ScheduledTask(minutes=[0, 30], hours=[9])
+
+    def test_next_time_cached(self):
+        """Matches get_next_time, including references moving back in time
+        """
+        for minutes in list(range(0, 60 * 24 * 3, 7)) + list(range(60 * 24 * 3, 0, -13)):
+            current_time = datetime(2016, 11, 12, 0, 0, 30) + timedelta(minutes=minutes)
+            self.assertEqual(self.task.next_time_cached(current_time), self.task.get_next_time(current_time))
+
+    def test_is_due(self):
+        self.assertFalse(self.task.is_due(datetime(2016, 11, 12, 9, 29, 59), last_run=datetime(2016, 11, 12, 9, 0)))
+        self.assertTrue(self.task.is_due(datetime(2016, 11, 12, 9, 30), last_run=datetime(2016, 11, 12, 9, 0)))
+        self.assertTrue(self.task.is_due(datetime(2016, 11, 12, 12, 0), last_run=datetime(2016, 11, 11, 9, 30)))
+        self.assertFalse(self.task.is_due(datetime(2016, 11, 12, 12, 0), last_run=datetime(2016, 11, 12, 9, 30)))
+        self.assertTrue(self.task.is_due(datetime(2016, 11, 12, 12, 0)))
+        self.assertFalse(ScheduledTask(years=[2100]).is_due(datetime(2016, 11, 12)))
+
+    def test_month_end(self):
+        """Matches get_next_time and the executions after last_run for references around the end of every month
+        """
+        self.assertEqual(self.task.next_time_cached(datetime(2016, 12, 1, 8, 0)), datetime(2016, 12, 1, 9, 0))
+        self.assertTrue(self.task.is_due(datetime(2016, 12, 1, 8, 0), last_run=datetime(2016, 11, 29, 9, 0)))
+        for engine in SearchEngine:
+            for rules in [{'minutes': [0], 'hours': [9]}, {'minutes': [0], 'hours': [9], 'days': [-1]},
+                          {'minutes': [0], 'hours': [9], 'days_of_week': [4], 'days_of_week_num': [-1]}]:
+                task = ScheduledTask(engine=engine, **rules)
+                for month in range(1, 13):
+                    for hours in range(-60, 60, 5):
+                        current_time = datetime(2016, month, 1) + timedelta(hours=hours)
+                        last_run = current_time - timedelta(days=2)
+                        self.assertEqual(task.next_time_cached(current_time), task.get_next_time(current_time))
+                        self.assertEqual(task.is_due(current_time, last_run),
+                                         task.get_next_time(last_run + timedelta(minutes=1)) <= current_time)
+
+    def test_interval_not_containing_reference(self):
+        """Interval is not trusted if the previous time search returns a time of an earlier month
+        """
+        class EarlyPreviousTask(ScheduledTask):
+            def get_previous_time(self, current_datetime=None):
+                return super().get_previous_time(current_datetime - timedelta(days=31))
+
+        task = EarlyPreviousTask(minutes=[0], hours=[9])
+        for _ in range(2):
+            self.assertEqual(task.next_time_cached(datetime(2016, 12, 1, 8, 0)), datetime(2016, 12, 1, 9, 0))
+            self.assertTrue(task.is_due(datetime(2016, 12, 1, 8, 0), last_run=datetime(2016, 11, 29, 9, 0)))
+            self.assertFalse(task.is_due(datetime(2016, 12, 1, 8, 0), last_run=datetime(2016, 11, 30, 9, 0)))
+        self.assertIsNone(task._interval)
+
+
+class TestMonotonicDeadline(unittest.TestCase):
+    def setUp(self):
+        self.wall = datetime(2016, 11, 12, 8, 50)
+        self.seconds = 1000.0
+        self.deadline = MonotonicDeadline(ScheduledTask(minutes=[0, 30], hours=[9]),
+                                          now=lambda: self.wall, monotonic=lambda: self.seconds)
+
+    def _sleep(self, seconds: float):
+        self.wall += timedelta(seconds=seconds)
+        self.seconds += seconds
+
+    def test_pop_due(self):
+        self.assertIsNone(self.deadline.pop_due())
+        self._sleep(600)
+        self.assertEqual(self.deadline.pop_due(), datetime(2016, 11, 12, 9, 0))
+        self.assertIsNone(self.deadline.pop_due())
+        self._sleep(1800)
+        self.assertEqual(self.deadline.pop_due(), datetime(2016, 11, 12, 9, 30))
+        self.assertEqual(self.deadline.next_time, datetime(2016, 11, 13, 9, 0))
+
+    def test_wall_clock_jump(self):
+        """Wall clock jumping forward doesn't make the task due early, jumping back doesn't make it due twice
+        """
+        self.wall += timedelta(hours=1)
+        self.assertIsNone(self.deadline.pop_due())
+        self._sleep(600)
+        self.assertEqual(self.deadline.pop_due(), datetime(2016, 11, 12, 9, 0))
+        self.assertEqual(self.deadline.next_time, datetime(2016, 11, 13, 9, 0))  # 9:30 has passed on the wall clock
+        self.wall -= timedelta(hours=2)
+        self._sleep(3600 * 24)
+        self.assertEqual(self.deadline.pop_due(), datetime(2016, 11, 13, 9, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from scheduledtask.cron import normalize_cron, parse_cron
+
+
+class TestCron(unittest.TestCase):
+    def test_every_minute(self):
+        self.assertEqual(parse_cron('* * * * *'), {})
+        self.assertEqual(parse_cron('? * ? * ?'), {})
+
+    def test_values_and_lists(self):
+        self.assertEqual(parse_cron('0,30 9 1,15 * *'), {'minutes': [0, 30], 'hours': [9], 'days': [1, 15]})
+        self.assertEqual(parse_cron('5,1-3 * * * *'), {'minutes': [1, 2, 3, 5]})
+
+    def test_ranges_and_steps(self):
+        self.assertEqual(parse_cron('*/15 9-17 * * *'), {'minutes': range(0, 60, 15), 'hours': range(9, 18)})
+        self.assertEqual(parse_cron('10/20 0-12/6 * * *'), {'minutes': range(10, 60, 20), 'hours': range(0, 13, 6)})
+        self.assertEqual(parse_cron('0 0 1 */3 * 2020-2030/2'),
+                         {'minutes': [0], 'hours': [0], 'days': [1], 'months': range(1, 13, 3),
+                          'years': range(2020, 2031, 2)})
+
+    def test_names(self):
+        self.assertEqual(parse_cron('0 0 * JAN,jul *'), {'minutes': [0], 'hours': [0], 'months': [1, 7]})
+        self.assertEqual(parse_cron('0 0 * * MON-FRI'), {'minutes': [0], 'hours': [0], 'days_of_week': [0, 1, 2, 3, 4]})
+
+    def test_sunday(self):
+        """Cron Sunday is 0 or 7, ScheduledTask Sunday is 6
+        """
+        self.assertEqual(parse_cron('0 0 * * 0')['days_of_week'], [6])
+        self.assertEqual(parse_cron('0 0 * * 7')['days_of_week'], [6])
+        self.assertEqual(parse_cron('0 0 * * 5-7')['days_of_week'], [4, 5, 6])
+
+    def test_macros(self):
+        self.assertEqual(parse_cron('@yearly'), parse_cron('0 0 1 1 *'))
+        self.assertEqual(parse_cron('@weekly'), {'minutes': [0], 'hours': [0], 'days_of_week': [6]})
+        self.assertEqual(parse_cron('@HOURLY'), {'minutes': [0]})
+        self.assertEqual(normalize_cron(' @daily '), '0 0 * * *')
+
+    def test_last_day(self):
+        self.assertEqual(parse_cron('0 0 L * *')['days'], [-1])
+        self.assertEqual(parse_cron('0 0 L-2 * *')['days'], [-3])
+        self.assertEqual(parse_cron('0 0 LW * *'),
+                         {'minutes': [0], 'hours': [0], 'days': [-1], 'nearest_weekday': True})
+
+    def test_nearest_weekday(self):
+        self.assertEqual(parse_cron('0 0 15W * *'),
+                         {'minutes': [0], 'hours': [0], 'days': [15], 'nearest_weekday': True})
+
+    def test_day_of_week_num(self):
+        self.assertEqual(parse_cron('0 0 * * 5L'), {'minutes': [0], 'hours': [0], 'days_of_week': [4],
+                                                    'days_of_week_num': [-1]})
+        self.assertEqual(parse_cron('0 0 * 11 MON#1'), {'minutes': [0], 'hours': [0], 'months': [11],
+                                                        'days_of_week': [0], 'days_of_week_num': [0]})
+        self.assertEqual(parse_cron('0 0 * * 2#3,4#3')['days_of_week'], [1, 3])
+
+    def test_invalid(self):
+        for expression in ['* * * *', '* * * * * * *', '60 * * * *', '* 24 * * *', '* * 0 * *', '* * * 13 *',
+                           '* * * * 8', '5-1 * * * *', '*/0 * * * *', 'a * * * *', '* * 1 * 1', '* * * * 1,2L',
+                           '* * * * 1#1,2#2', '* * * * 1#6', '* * 32W * *']:
+            with self.assertRaises(ValueError, msg=expression):
+                parse_cron(expression)
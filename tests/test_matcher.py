@@ -0,0 +1,72 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from scheduledtask import ScheduledTask, compile_schedule
+from scheduledtask.matcher import TaskMatcher
+from scheduledtask.scheduledtask import SearchEngine
+
+
+class TestTaskMatcher(unittest.TestCase):
+    def setUp(self):
+        self.rules = [dict(minutes=[0, 30]),
+                      dict(minutes=[0], hours=[9], days=[1, -1]),
+                      dict(minutes=[0], hours=[9], days_of_week=[4], days_of_week_num=[-1]),
+                      dict(minutes=[0], hours=[9], days_of_week=[0, 1, 2, 3, 4], weeks=[0]),
+                      dict(minutes=[0], hours=[9], days=[1], nearest_weekday=True),
+                      dict(minutes=[0], hours=[9], months=[1, 7], years=[2016, 2018]),
+                      dict(minutes=[0], hours=[9], days=range(1, 32, 2), years=range(2016, 2030, 4)),
+                      dict(minutes=[0, 30], hours=[9], days_of_week=[4], days_of_week_num=[0, 2]),
+                      dict(minutes=[0], hours=[9], years=[2017])]
+        self.tasks = [ScheduledTask(engine=SearchEngine.compiled, **rules) for rules in self.rules]
+        self.matcher = TaskMatcher()
+        self.ids = self.matcher.add_many(self.tasks)
+
+    def test_add(self):
+        self.assertEqual(self.ids, list(range(len(self.tasks))))
+        self.assertEqual(self.matcher.add(compile_schedule(minutes=[15])), len(self.tasks))
+        self.assertEqual(len(self.matcher), len(self.tasks) + 1)
+        self.assertEqual(self.matcher.match(datetime(2016, 1, 1, 10, 15)), [len(self.tasks)])
+
+    def test_match(self):
+        self.assertEqual(self.matcher.match(datetime(2016, 1, 1, 9, 0, 30)), [0, 1, 3, 4, 5, 6, 7])
+        self.assertEqual(self.matcher.match(datetime(2016, 1, 29, 9, 0)), [0, 2, 5, 6])
+        # Monday, the weekday nearest to Saturday 1st
+        self.assertEqual(self.matcher.match(datetime(2016, 10, 3, 9, 0)), [0, 4, 6])
+        self.assertEqual(self.matcher.match(datetime(2016, 1, 1, 9, 1)), [])
+
+    def test_match_matches_search(self):
+        """Every task matches exactly at its execution times, over a year of hours
+        """
+        for hours in range(0, 24 * 366, 5):
+            current_time = datetime(2016, 1, 1, 9, 0) + timedelta(hours=hours)
+            self.assertEqual(self.matcher.match(current_time),
+                             [task_id for task_id, task in enumerate(self.tasks)
+                              if task.get_next_time(current_time) == current_time])
+
+    def test_shared_schedule(self):
+        matcher = TaskMatcher()
+        ids = matcher.add_many([ScheduledTask(minutes=[0], hours=[9]) for _ in range(100)])
+        self.assertEqual(matcher.match(datetime(2016, 1, 1, 9, 0)), ids)
+
+    def test_remove(self):
+        self.matcher.remove(0)
+        self.assertNotIn(0, self.matcher)
+        self.assertEqual(self.matcher.match(datetime(2016, 1, 1, 9, 0)), [1, 3, 4, 5, 6, 7])
+        self.assertEqual(len(self.matcher), len(self.tasks) - 1)
+        with self.assertRaises(KeyError):
+            self.matcher.remove(0)
+        with self.assertRaises(KeyError):
+            self.matcher.remove(len(self.tasks))
+
+    def test_remove_clears_bits(self):
+        """Removed tasks don't stay in the bitsets, so they don't grow with removed ids
+        """
+        for task_id in self.ids:
+            self.matcher.remove(task_id)
+        self.assertEqual(len(self.matcher), 0)
+        self.assertFalse(any(bits for field_values in self.matcher._values.values() for bits in field_values))
+        self.assertFalse(any(self.matcher._full.values()))
+        self.assertEqual(self.matcher.match(datetime(2016, 1, 1, 9, 0)), [])
+
+    def test_timezone_not_supported(self):
+        with self.assertRaises(ValueError):
+            self.matcher.add(ScheduledTask(minutes=[0], tz=timezone.utc))
@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime
+from scheduledtask import ScheduledTask
+from scheduledtask.misfire import MisfirePolicy
+from scheduledtask.scheduledtask import SearchEngine
+
+
+class TestMissedRuns(unittest.TestCase):
+    def setUp(self):
+        self.task = ScheduledTask(minutes=[0, 30])
+        self.missed = self.task.get_missed_runs(datetime(2016, 11, 17, 10, 0), datetime(2016, 11, 17, 16, 0))
+
+    def test_missed_runs(self):
+        """Last run is excluded, current time is included
+        """
+        self.assertEqual(len(self.missed), 12)
+        self.assertEqual(self.missed.first, datetime(2016, 11, 17, 10, 30))
+        self.assertEqual(self.missed.last, datetime(2016, 11, 17, 16, 0))
+        self.assertEqual(list(self.missed)[:2], [datetime(2016, 11, 17, 10, 30), datetime(2016, 11, 17, 11, 0)])
+
+    def test_long_downtime(self):
+        missed = ScheduledTask().get_missed_runs(datetime(2016, 1, 1, 0, 0, 30), datetime(2017, 1, 1))
+        self.assertEqual(missed.count, 366 * 24 * 60)
+        self.assertEqual((missed.first, missed.last), (datetime(2016, 1, 1, 0, 1), datetime(2017, 1, 1)))
+
+    def test_month_end(self):
+        """First and last missed run are within the counted runs when the downtime crosses the end of month
+        """
+        for engine in SearchEngine:
+            task = ScheduledTask(minutes=[0], hours=[9], engine=engine)
+            missed = task.get_missed_runs(datetime(2016, 11, 28, 9, 0), datetime(2016, 12, 1, 8, 0))
+            self.assertEqual((missed.count, missed.first, missed.last),
+                             (2, datetime(2016, 11, 29, 9, 0), datetime(2016, 11, 30, 9, 0)))
+            missed = task.get_missed_runs(datetime(2016, 11, 29, 9, 0), datetime(2016, 12, 1, 8, 0))
+            self.assertEqual((missed.count, missed.first, missed.last),
+                             (1, datetime(2016, 11, 30, 9, 0), datetime(2016, 11, 30, 9, 0)))
+
+    def test_nothing_missed(self):
+        missed = self.task.get_missed_runs(datetime(2016, 11, 17, 10, 0), datetime(2016, 11, 17, 10, 29, 59))
+        self.assertFalse(missed)
+        self.assertEqual((missed.first, missed.last), (None, None))
+        self.assertEqual(list(missed.due_times(MisfirePolicy.fire_once)), [])
+
+    def test_due_times(self):
+        self.assertEqual(list(self.missed.due_times(MisfirePolicy.skip)), [])
+        self.assertEqual(list(self.missed.due_times(MisfirePolicy.fire_once)), [datetime(2016, 11, 17, 16, 0)])
+        self.assertEqual(list(self.missed.due_times(MisfirePolicy.fire_all)), list(self.missed))
@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from scheduledtask import ScheduledTask, compile_schedule
+from scheduledtask.scheduledtask import SearchEngine
+
+try:
+    import numpy
+    from scheduledtask.registry import TaskRegistry
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestTaskRegistry(unittest.TestCase):
+    def setUp(self):
+        self.rules = [dict(minutes=[0, 30]),
+                      dict(minutes=[0], hours=[9], days=[1, -1]),
+                      dict(minutes=[0], hours=[9], days_of_week=[4], days_of_week_num=[-1]),
+                      dict(minutes=[0], hours=[9], days_of_week=[0, 1, 2, 3, 4], weeks=[0]),
+                      dict(minutes=[0], hours=[9], days=[1], nearest_weekday=True),
+                      dict(minutes=[0], hours=[9], months=[1, 7], years=[2016, 2018]),
+                      dict(minutes=[0], hours=[9], days=range(1, 32, 2), years=range(2016, 2030, 4))]
+        self.tasks = [ScheduledTask(engine=SearchEngine.compiled, **rules) for rules in self.rules]
+        self.registry = TaskRegistry(capacity=2)
+        self.rows = self.registry.add_many(self.tasks)
+
+    def test_add(self):
+        self.assertEqual(self.rows.tolist(), list(range(len(self.tasks))))
+        self.assertEqual(self.registry.add(compile_schedule(minutes=[15])), len(self.tasks))
+        self.assertEqual(len(self.registry), len(self.tasks) + 1)
+
+    def test_due_at(self):
+        self.assertEqual(self.registry.due_at(datetime(2016, 1, 1, 9, 0, 30)).tolist(), [0, 1, 3, 4, 5, 6])
+        self.assertEqual(self.registry.due_at(datetime(2016, 1, 29, 9, 0)).tolist(), [0, 2, 5, 6])
+        # Monday, the weekday nearest to Saturday 1st
+        self.assertEqual(self.registry.due_at(datetime(2016, 10, 3, 9, 0)).tolist(), [0, 4, 6])
+        self.assertEqual(self.registry.due_at(datetime(2016, 1, 1, 9, 1)).tolist(), [])
+
+    def test_due_at_matches_search(self):
+        """Every row is due exactly at the execution times of its task, over a year of hours
+        """
+        for hours in range(0, 24 * 366, 5):
+            current_time = datetime(2016, 1, 1, 9, 0) + timedelta(hours=hours)
+            self.assertEqual(self.registry.due_at(current_time).tolist(),
+                             [row for row, task in enumerate(self.tasks)
+                              if task.get_next_time(current_time) == current_time])
+
+    def test_remove(self):
+        self.registry.remove(0)
+        self.assertEqual(self.registry.due_at(datetime(2016, 1, 1, 9, 0)).tolist(), [1, 3, 4, 5, 6])
+        self.assertEqual(len(self.registry), len(self.tasks) - 1)
+        with self.assertRaises(KeyError):
+            self.registry.remove(0)
+
+    def test_timezone_not_supported(self):
+        with self.assertRaises(ValueError):
+            self.registry.add(ScheduledTask(minutes=[0], tz=timezone.utc))
@@ -1,23 +1,38 @@
+import pickle
 import unittest
-from scheduledtask import ScheduledTask
-from datetime import datetime
+from copy import copy
+from scheduledtask import ScheduledTask, compile_schedule
+from scheduledtask.scheduledtask import DateTimeHolder, SearchEngine
+from datetime import datetime, timedelta, timezone
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class TestScheduledTask(unittest.TestCase):
+    engine = SearchEngine.fraction
+
     def _test_previous(self, minutes=None, hours=None, days=None, days_of_week=None, days_of_week_num=None, weeks=None,
                        months=None, years=None, current_time=None, expected_result=None):
         """Common wrapper for get_previous_time test
         """
-        task = ScheduledTask(minutes, hours, days, days_of_week, days_of_week_num, weeks, months, years)
+        task = ScheduledTask(minutes, hours, days, days_of_week, days_of_week_num, weeks, months, years,
+                             engine=self.engine)
         self.assertEqual(task.get_previous_time(current_time), expected_result)
 
     def _test_next(self, minutes=None, hours=None, days=None, days_of_week=None, days_of_week_num=None, weeks=None,
                    months=None, years=None, current_time=None, expected_result=None):
         """Common wrapper for get_next_time test
         """
-        task = ScheduledTask(minutes, hours, days, days_of_week, days_of_week_num, weeks, months, years)
+        task = ScheduledTask(minutes, hours, days, days_of_week, days_of_week_num, weeks, months, years,
+                             engine=self.engine)
         self.assertEqual(task.get_next_time(current_time), expected_result)
 
+    def _task(self, **rules):
+        return ScheduledTask(engine=self.engine, **rules)
+
     def test_previous_same_day(self):
         """0:45 same day
         """
@@ -140,6 +155,14 @@ class TestScheduledTask(unittest.TestCase):
                             current_time=datetime(2017, 1, 31, 00, 00),  # 00:00 31/01/2017 Tuesday
                             expected_result=datetime(2016, 11, 30, 0, 0))  # 00:00 30/11/2016 Wednesday
 
+    def test_previous_2nd_odd_weekday_of_month(self):
+        """Every 2nd Tuesday, Thursday and Saturday of January, July, October and November
+        """
+        self._test_previous(minutes=None, hours=None, days_of_week=range(1, 7, 2), days_of_week_num=[1],
+                            months=[1, 7, 10, 11], years=None,
+                            current_time=datetime(2023, 10, 9, 12, 40),  # 12:40 9/10/2023 Monday
+                            expected_result=datetime(2023, 7, 13, 23, 59))  # 23:59 13/7/2023 Thursday
+
     def test_previous_every_even_day(self):   # Every even day at 00:00
         """Every even day at 00:00
         """
@@ -240,6 +263,14 @@ class TestScheduledTask(unittest.TestCase):
                         current_time=datetime(2016, 1, 31, 15, 0),  # 15:00 31/1/2016
                         expected_result=datetime(2016, 3, 31, 0, 0))  # 00:00 31/3/2016
 
+    def test_next_31st_day_of_month_skip_months_between_candidates(self):
+        """31st day of January or July, when current month is January, 31st (should not stop at March, 31st)
+        """
+        self._test_next(minutes=[0], hours=[0], days=[31], months=[1, 7], years=None,
+                        # Every 31st day of January and July, at 00:00
+                        current_time=datetime(2016, 1, 31, 15, 0),  # 15:00 31/1/2016
+                        expected_result=datetime(2016, 7, 31, 0, 0))  # 00:00 31/7/2016
+
     def test_next_every_wednesday(self):
         """Every Wednesday at 00:00, check this week
         """
@@ -286,6 +317,28 @@ class TestScheduledTask(unittest.TestCase):
                         current_time=datetime(2016, 10, 1, 00, 00),  # 00:00 1/10/2017 Saturday
                         expected_result=datetime(2016, 11, 30, 0, 0))  # 00:00 30/11/2016 Wednesday
 
+    def test_next_weekdays_in_autumn(self):
+        """Every Tuesday, Wednesday, Friday and Sunday of September and October at 17:00
+        """
+        self._test_next(minutes=None, hours=[17], days_of_week=[1, 2, 4, 6], months=[9, 10], years=None,
+                        current_time=datetime(2016, 7, 11, 1, 52),  # 1:52 11/7/2016 Monday
+                        expected_result=datetime(2016, 9, 2, 17, 0))  # 17:00 2/9/2016 Friday
+
+    def test_next_5th_wednesday_of_february(self):
+        """Every 5th (n=4) Wednesday of February, next one is 28 years ahead
+        """
+        self._test_next(minutes=[0], hours=[0], days_of_week=[2], days_of_week_num=[4], months=[2], years=None,
+                        current_time=datetime(2012, 3, 1, 0, 0),  # 00:00 1/3/2012 Thursday
+                        expected_result=datetime(2040, 2, 29, 0, 0))  # 00:00 29/2/2040 Wednesday
+
+    def test_next_5th_wednesday_of_february_skips_years(self):
+        """Years without 5th Wednesday of February are skipped without search iterations
+        """
+        task = self._task(minutes=[0], hours=[0], days_of_week=[2], days_of_week_num=[4], months=[2],
+                          years=range(1848, 9999, 4), max_iterations=2)
+        self.assertEqual(task.get_next_time(datetime(2012, 3, 1)), datetime(2040, 2, 29, 0, 0))
+        self.assertEqual(task.get_previous_time(datetime(2040, 2, 28)), datetime(2012, 2, 29, 0, 0))
+
     def test_next_every_even_day(self):  # Every even day at 00:00
         """Every even day at 00:00
         """
@@ -311,6 +364,321 @@ class TestScheduledTask(unittest.TestCase):
                         current_time=datetime(2016, 11, 17, 15, 30),  # 15:30 17/11/2016 Wednesday
                         expected_result=datetime(2020, 11, 2, 0, 0))  # 00:00 2/11/2020 Monday
 
+    def test_next_last_day_of_month(self):
+        """Negative days count from the end of month
+        """
+        task = self._task(minutes=[0], hours=[0], days=[-1])
+        self.assertEqual(list(task.iter_next_times(datetime(2016, 1, 15), count=3)),
+                         [datetime(2016, 1, 31), datetime(2016, 2, 29), datetime(2016, 3, 31)])
+        self.assertEqual(task.get_previous_time(datetime(2017, 3, 1)), datetime(2017, 2, 28))
+
+    def test_next_second_to_last_day_and_15th(self):
+        task = self._task(minutes=[0], hours=[0], days=[15, -2])
+        self.assertEqual(list(task.iter_next_times(datetime(2016, 2, 1), count=3)),
+                         [datetime(2016, 2, 15), datetime(2016, 2, 28), datetime(2016, 3, 15)])
+
+    def test_next_last_friday(self):
+        """days_of_week_num=-1 is the last weekday of month
+        """
+        task = self._task(minutes=[0], hours=[0], days_of_week=[4], days_of_week_num=[-1])
+        self.assertEqual(list(task.iter_next_times(datetime(2016, 1, 1), count=3)),
+                         [datetime(2016, 1, 29), datetime(2016, 2, 26), datetime(2016, 3, 25)])
+        self.assertEqual(task.get_previous_time(datetime(2016, 1, 28)), datetime(2015, 12, 25))
+
+    def test_next_nearest_weekday(self):
+        """1st of May 2016 is Sunday, the nearest weekday is Monday 2nd
+        """
+        task = self._task(minutes=[0], hours=[0], days=[1], nearest_weekday=True)
+        self.assertEqual(task.get_next_time(datetime(2016, 4, 30)), datetime(2016, 5, 2))
+        self.assertEqual(task.get_previous_time(datetime(2016, 5, 3)), datetime(2016, 5, 2))
+        self.assertEqual(task.get_next_time(datetime(2016, 10, 1)), datetime(2016, 10, 3))  # Saturday 1/10/2016
+
+    def test_from_cron(self):
+        task = ScheduledTask.from_cron('30 9 * * MON-FRI', engine=self.engine)
+        self.assertEqual(task.get_next_time(datetime(2016, 11, 18, 10, 0)), datetime(2016, 11, 21, 9, 30))
+        same = ScheduledTask.from_cron(' 30  9 * * mon-fri', engine=self.engine)
+        self.assertIsNot(same, task)  # Tasks are separate, i.e. both can be added to a TaskIndex
+        self.assertIs(same.schedule, task.schedule)
+        self.assertEqual(ScheduledTask.from_cron('30 9 * * MON-FRI', max_iterations=10).max_iterations, 10)
+        self.assertEqual(task.max_iterations, 100)
+
+    def test_iter_next_times(self):
+        """Every 30 minutes between 23:00 and 0:59, crossing the day boundary
+        """
+        task = self._task(minutes=[0, 30], hours=[0, 23])
+        self.assertEqual(list(task.iter_next_times(datetime(2016, 11, 12, 23, 15), count=4)),
+                         [datetime(2016, 11, 12, 23, 30), datetime(2016, 11, 13, 0, 0),
+                          datetime(2016, 11, 13, 0, 30), datetime(2016, 11, 13, 23, 0)])
+
+    def test_iter_next_times_until(self):
+        """Every first Monday of November until 2028, every 4rth year starting from 1848
+        """
+        task = self._task(minutes=[0], hours=[0], days_of_week=[0], days_of_week_num=[0], months=[11],
+                          years=range(1848, 9999, 4))
+        self.assertEqual(list(task.iter_next_times(datetime(2016, 11, 17, 15, 30), until=datetime(2028, 11, 6))),
+                         [datetime(2020, 11, 2, 0, 0), datetime(2024, 11, 4, 0, 0), datetime(2028, 11, 6, 0, 0)])
+
+    def test_iter_previous_times(self):
+        """Every even day at 00:00 and 12:00, going back
+        """
+        task = self._task(minutes=[0], hours=[0, 12], days=range(0, 31, 2))
+        self.assertEqual(list(task.iter_previous_times(datetime(2016, 11, 3, 15, 0), count=3)),
+                         [datetime(2016, 11, 2, 12, 0), datetime(2016, 11, 2, 0, 0), datetime(2016, 10, 30, 12, 0)])
+
+    def test_iter_previous_times_until(self):
+        """Every 31st day of month until the end of summer
+        """
+        task = self._task(minutes=[0], hours=[0], days=[31])
+        self.assertEqual(list(task.iter_previous_times(datetime(2016, 12, 15, 0, 0), until=datetime(2016, 8, 31))),
+                         [datetime(2016, 10, 31, 0, 0), datetime(2016, 8, 31, 0, 0)])
+
+    def test_get_next_times(self):
+        """Batch result matches get_next_time for every reference, including unsorted and repeated ones
+        """
+        task = self._task(minutes=[0, 30], hours=range(0, 24, 3), days=[1, 15, 31])
+        references = [datetime(2016, 1, 1) + timedelta(minutes=7919 * i % 200000) for i in range(200)] + [None]
+        self.assertEqual(task.get_next_times(references),
+                         [task.get_next_time(reference) for reference in references[:-1]] + [None])
+
+    def test_get_previous_times(self):
+        """Batch result matches get_previous_time for every reference, including unsorted and repeated ones
+        """
+        task = self._task(minutes=[0, 30], hours=range(0, 24, 3), days=[1, 15, 31])
+        references = [datetime(2016, 1, 1) + timedelta(minutes=7919 * i % 200000) for i in range(200)]
+        self.assertEqual(task.get_previous_times(references),
+                         [task.get_previous_time(reference) for reference in references])
+
+    def test_get_times_aware(self):
+        """Rules without timezone apply to the wall time of aware references, like in get_next_time
+        """
+        tz = timezone(timedelta(hours=2))
+        references = [datetime(2016, 1, 1, tzinfo=timezone.utc), datetime(2016, 1, 1, 0, 30, 10, 5, tzinfo=tz),
+                      datetime(2016, 1, 1, 0, 15)]
+        for task in [self._task(minutes=[0]), self._task(seconds=[0, 30], minutes=[0, 30])]:
+            self.assertEqual(task.get_next_times(references),
+                             [task.get_next_time(reference) for reference in references])
+            self.assertEqual(task.get_previous_times(references),
+                             [task.get_previous_time(reference) for reference in references])
+
+    def test_next_every_10_seconds(self):
+        task = self._task(seconds=range(0, 60, 10))
+        self.assertEqual(task.get_next_time(datetime(2016, 11, 17, 10, 0, 15)), datetime(2016, 11, 17, 10, 0, 20))
+        self.assertEqual(task.get_next_time(datetime(2016, 11, 17, 10, 0, 20, 500)), datetime(2016, 11, 17, 10, 0, 20))
+        self.assertEqual(task.get_next_time(datetime(2016, 12, 31, 23, 59, 55)), datetime(2017, 1, 1, 0, 0, 0))
+        self.assertEqual(task.get_previous_time(datetime(2016, 11, 17, 10, 0, 5)), datetime(2016, 11, 17, 10, 0, 0))
+        self.assertEqual(task.get_previous_time(datetime(2017, 1, 1)), datetime(2017, 1, 1))
+
+    def test_seconds_move_to_next_minute(self):
+        """Seconds after the last candidate of a matching minute continue in the next matching minute
+        """
+        task = self._task(seconds=[15, 45], minutes=[0], hours=[9], days=[-1])
+        self.assertEqual(task.get_next_time(datetime(2016, 2, 29, 9, 0, 50)), datetime(2016, 3, 31, 9, 0, 15))
+        self.assertEqual(task.get_previous_time(datetime(2016, 3, 31, 9, 0, 10)), datetime(2016, 2, 29, 9, 0, 45))
+
+    def test_iter_seconds(self):
+        task = self._task(seconds=[0, 30], minutes=[0, 1])
+        self.assertEqual(list(task.iter_next_times(datetime(2016, 11, 17, 10, 1, 10), count=4)),
+                         [datetime(2016, 11, 17, 10, 1, 30), datetime(2016, 11, 17, 11, 0, 0),
+                          datetime(2016, 11, 17, 11, 0, 30), datetime(2016, 11, 17, 11, 1, 0)])
+        self.assertEqual(list(task.iter_previous_times(datetime(2016, 11, 17, 10, 0, 20),
+                                                       until=datetime(2016, 11, 17, 9, 1))),
+                         [datetime(2016, 11, 17, 10, 0, 0), datetime(2016, 11, 17, 9, 1, 30),
+                          datetime(2016, 11, 17, 9, 1, 0)])
+
+    def test_get_next_times_seconds(self):
+        task = self._task(seconds=range(5, 60, 20), minutes=range(0, 60, 7))
+        references = [datetime(2016, 1, 1) + timedelta(seconds=7919 * i % 200000) for i in range(200)]
+        self.assertEqual(task.get_next_times(references), [task.get_next_time(reference) for reference in references])
+        self.assertEqual(task.get_previous_times(references),
+                         [task.get_previous_time(reference) for reference in references])
+
+    def test_count_between(self):
+        """Every minute over a quarter, counted without enumerating
+        """
+        task = self._task()
+        self.assertEqual(task.count_between(datetime(2024, 1, 1), datetime(2024, 4, 1)), 91 * 24 * 60)
+        self.assertEqual(task.count_between(datetime(2024, 1, 1, 0, 0, 30), datetime(2024, 1, 1, 0, 3)), 2)
+        self.assertEqual(task.count_between(datetime(2024, 4, 1), datetime(2024, 1, 1)), 0)
+
+    def test_count_between_matches_occurrences(self):
+        """Counts match enumerated occurrences for every day strategy, across years
+        """
+        start, end = datetime(2015, 11, 17, 10, 20, 30), datetime(2018, 2, 3, 7, 0)
+        for rules in (dict(minutes=[0, 30], hours=[6, 18], days=[1, 15, 31]),
+                      dict(minutes=[0], hours=[9], days=[-1], nearest_weekday=True),
+                      dict(minutes=[15], hours=[0], days_of_week=[4], days_of_week_num=[-1], months=[2, 11]),
+                      dict(minutes=[0], hours=[12], days_of_week=[0, 6], weeks=[0], years=range(2016, 2030, 2)),
+                      dict(seconds=[0, 20], minutes=[5], hours=[5], days=[29], months=[2])):
+            task = self._task(**rules)
+            self.assertEqual(task.count_between(start, end), len(list(task.occurrences_between(start, end))))
+
+    def test_occurrences_between(self):
+        task = self._task(minutes=[0, 30], hours=[0])
+        start, end = datetime(2016, 11, 12, 0, 0, 30), datetime(2016, 11, 13, 0, 30)
+        self.assertEqual(list(task.occurrences_between(start, end)),
+                         [datetime(2016, 11, 12, 0, 30), datetime(2016, 11, 13, 0, 0)])
+
+    def test_get_previous_time_month_end(self):
+        """Day past the end of the month is clamped to its last day instead of skipping the month
+        """
+        task = self._task(minutes=[0], hours=[9])
+        self.assertEqual(task.get_previous_time(datetime(2016, 12, 1, 8, 0)), datetime(2016, 11, 30, 9, 0))
+        task = self._task(minutes=[0], hours=[9], months=[3, 6, 10])
+        self.assertEqual(task.get_previous_time(datetime(2017, 7, 27)), datetime(2017, 6, 30, 9, 0))
+        task = self._task(minutes=[0], hours=[9], days_of_week=[1, 4], weeks=range(6))
+        self.assertEqual(task.get_previous_time(datetime(2016, 12, 1, 8, 0)), datetime(2016, 11, 29, 9, 0))
+        task = self._task(minutes=[0], hours=[9], days=[27], years=range(2014, 2100, 3))
+        self.assertIsNone(task.get_previous_time(datetime(2014, 1, 27, 8, 0)))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_get_next_times_numpy(self):
+        """datetime64 array in, datetime64[m] array out
+        """
+        task = self._task(minutes=[15, 45], hours=[0])
+        references = numpy.array(['2016-11-12T00:30', '2016-11-12T00:50:30'], dtype='datetime64[s]')
+        self.assertEqual(task.get_next_times(references).tolist(),
+                         [datetime(2016, 11, 12, 0, 45), datetime(2016, 11, 13, 0, 15)])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_get_times_numpy_matches_list(self):
+        """Array search matches the search of the same references as datetimes, including unsorted ones and NaT
+        """
+        task = self._task(minutes=[0, 30], hours=range(0, 24, 3), days=[1, 15, -1])
+        references = numpy.datetime64('2016-01-01T00:00') + \
+            (numpy.arange(500) * 7919 % 200000).astype('timedelta64[m]')
+        references[::50] = numpy.datetime64('NaT')
+        datetimes = [None if numpy.isnat(reference) else reference.astype(datetime) for reference in references]
+        self.assertEqual(task.get_next_times(references).tolist(), task.get_next_times(datetimes))
+        self.assertEqual(task.get_previous_times(references).tolist(), task.get_previous_times(datetimes))
+
+
+class TestScheduledTaskCompiledEngine(TestScheduledTask):
+    """Runs every ScheduledTask test against the compiled search
+    """
+    engine = SearchEngine.compiled
+
+    def test_compiled_matches_fraction(self):
+        """Both engines agree on every 7th minute over a week, including month and year boundaries
+        """
+        rules = dict(minutes=[0, 30], hours=range(0, 24, 5), days=[1, 29, 30, 31])
+        fraction_task = ScheduledTask(engine=SearchEngine.fraction, **rules)
+        compiled_task = ScheduledTask(engine=SearchEngine.compiled, **rules)
+        for i in range(0, 60 * 24 * 7, 7):
+            current_time = datetime(2016, 12, 28) + timedelta(minutes=i)
+            self.assertEqual(compiled_task.get_next_time(current_time), fraction_task.get_next_time(current_time))
+
+    def test_compiled_matches_fraction_previous(self):
+        """Both engines agree on previous times around every month end of a year, for every strategy
+        """
+        for rules in [dict(minutes=[0], hours=[9]), dict(minutes=[0], hours=[9], days=[1, 15, 30, 31]),
+                      dict(minutes=[0], hours=[9], months=[2, 6, 10]),
+                      dict(minutes=[0], hours=[9], days_of_week=[1, 4], weeks=[0, 4, 5]),
+                      dict(minutes=[0], hours=[9], days_of_week=[2, 6], days_of_week_num=[0, 3, 4])]:
+            fraction_task = ScheduledTask(engine=SearchEngine.fraction, **rules)
+            compiled_task = ScheduledTask(engine=SearchEngine.compiled, **rules)
+            for month in range(1, 13):
+                for hours in range(-50, 50, 7):
+                    current_time = datetime(2016, month, 1) + timedelta(hours=hours)
+                    self.assertEqual(fraction_task.get_previous_time(current_time),
+                                     compiled_task.get_previous_time(current_time), (rules, current_time))
+
+
+class TestDateTimeHolder(unittest.TestCase):
+    def test_key_order(self):
+        """Keys order holders the same way as their datetimes, including weekday fractions
+        """
+        holders = [DateTimeHolder(minute=59, hour=23, day=31, month=12, year=2015),
+                   DateTimeHolder(minute=0, hour=0, day_of_week=1, day_of_week_num=0, month=11, year=2016),  # 1/11
+                   DateTimeHolder(minute=30, hour=0, day=1, month=11, year=2016),
+                   DateTimeHolder(minute=0, hour=12, day_of_week=5, week=0, month=11, year=2016),  # 5/11
+                   DateTimeHolder(minute=0, hour=0, day_of_week=0, day_of_week_num=1, month=11, year=2016)]  # 14/11
+        self.assertEqual(sorted(holders, key=lambda holder: holder.key), holders)
+        self.assertEqual(sorted(holders, key=lambda holder: holder.datetime), holders)
+        self.assertTrue(holders[1] < holders[2] <= holders[3])
+        self.assertTrue(holders[4] > holders[3] >= holders[2])
+        self.assertEqual(holders[1], DateTimeHolder(minute=0, hour=0, day=1, month=11, year=2016))
+
+    def test_second(self):
+        holder = DateTimeHolder(second=30, minute=59, hour=23, day=31, month=12, year=2015)
+        self.assertEqual(holder.datetime, datetime(2015, 12, 31, 23, 59, 30))
+        self.assertTrue(DateTimeHolder(minute=59, hour=23, day=31, month=12, year=2015) < holder)
+        self.assertTrue(holder < DateTimeHolder(minute=0, hour=0, day=1, month=1, year=2016))
+
+    def test_key_cache(self):
+        holder = DateTimeHolder(minute=0, hour=0, day_of_week=1, day_of_week_num=0, month=11, year=2016)
+        key = holder.key
+        copied = copy(holder)
+        holder['day_of_week_num'] = 1
+        self.assertEqual(holder.key, DateTimeHolder(minute=0, hour=0, day=8, month=11, year=2016).key)
+        self.assertEqual(copied.key, key)
+        copied['minute'] = 30
+        self.assertTrue(holder > copied > DateTimeHolder(minute=0, hour=0, day=1, month=11, year=2016))
+
+
+class TestCompiledSchedule(unittest.TestCase):
+    def test_interned(self):
+        """Equal rules share a single schedule
+        """
+        a = ScheduledTask(minutes=[30, 0], hours=[0])
+        b = ScheduledTask(minutes=[0, 30, 30], hours=[0], engine=SearchEngine.compiled)
+        self.assertIs(a.schedule, b.schedule)
+        self.assertIs(compile_schedule(minutes=range(0, 60, 5)), compile_schedule(minutes=range(0, 56, 5)))
+        self.assertIsNot(a.schedule, ScheduledTask(minutes=[0, 30], hours=[1]).schedule)
+
+    def test_hashable(self):
+        a = compile_schedule(minutes=[0], days=[1, -1])
+        b = compile_schedule(minutes=[0], days=[1, -1], nearest_weekday=True)
+        self.assertEqual(a, compile_schedule(minutes=[0], days=[-1, 1]))
+        self.assertNotEqual(a, b)
+        self.assertEqual(len({a, b, compile_schedule(minutes=[0], days=[-1, 1])}), 2)
+
+    def test_immutable(self):
+        schedule = compile_schedule(minutes=[0])
+        with self.assertRaises(AttributeError):
+            schedule.candidates = ()
+        with self.assertRaises(AttributeError):
+            schedule.extra = 1
+
+    def test_kwargs(self):
+        schedule = compile_schedule(minutes=range(0, 60, 15), days=[15, 1], nearest_weekday=True)
+        self.assertEqual(schedule.kwargs, {'minutes': range(0, 60, 15), 'days': [1, 15], 'nearest_weekday': True})
+        self.assertIs(ScheduledTask(**schedule.kwargs).schedule, schedule)
+
+    def test_pickle(self):
+        """Unpickled schedule is the interned one
+        """
+        schedule = compile_schedule(minutes=[0], hours=[9], days_of_week=[4], days_of_week_num=[-1])
+        self.assertIs(pickle.loads(pickle.dumps(schedule)), schedule)
+
+    def test_task_from_schedule(self):
+        schedule = compile_schedule(minutes=[0], hours=[0], days=[1])
+        task = ScheduledTask(schedule=schedule)
+        self.assertIs(task.schedule, schedule)
+        self.assertEqual(task.get_next_time(datetime(2016, 11, 17)), datetime(2016, 12, 1))
+
+    def test_shared_occurrence_cache(self):
+        """Tasks of the same schedule share the cached intervals
+        """
+        a = ScheduledTask(minutes=[0], hours=[0], days=[1], cache_size=4)
+        b = ScheduledTask(minutes=[0], hours=[0], days=[1], cache_size=8, engine=SearchEngine.compiled)
+        self.assertIs(a.cache, b.cache)
+        self.assertEqual(a.cache.maxsize, 8)
+        a.get_next_time(datetime(2016, 11, 17))
+        self.assertEqual(b.get_next_time(datetime(2016, 11, 20)), datetime(2016, 12, 1))
+        self.assertEqual(b.cache_info().hits, 1)
+
+    def test_pickle_task(self):
+        """Task is pickled as its schedule and settings, tasks of the same schedule share it
+        """
+        tasks = [ScheduledTask(minutes=[0], hours=[0], days=[1], engine=SearchEngine.compiled, cache_size=4)] * 2 + \
+            [ScheduledTask(minutes=[0], hours=[0], days=[1], max_iterations=10)]
+        restored = pickle.loads(pickle.dumps(tasks))
+        self.assertIs(restored[0].schedule, tasks[0].schedule)
+        self.assertIs(restored[2].schedule, tasks[0].schedule)
+        self.assertEqual((restored[0].engine, restored[0].cache.maxsize), (SearchEngine.compiled, 4))
+        self.assertEqual(restored[2].max_iterations, 10)
+        self.assertEqual(restored[2].get_next_time(datetime(2016, 11, 17)), datetime(2016, 12, 1))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from scheduledtask import ScheduledTask
+from scheduledtask.stats import StatsCollector
+from datetime import datetime
+
+
+class TestStats(unittest.TestCase):
+    def test_days_of_month_search(self):
+        """31st day of month, when current month is January, 31st: February is rejected, search moves to March
+        """
+        collector = StatsCollector()
+        task = ScheduledTask(minutes=[0], hours=[0], days=[31], stats=collector)
+        self.assertEqual(task.get_next_time(datetime(2016, 1, 31, 15, 0)), datetime(2016, 3, 31, 0, 0))
+        self.assertEqual(collector.searches, 1)
+        self.assertGreater(collector.iterations, 5)
+        self.assertEqual(collector.max_iterations, collector.iterations)
+        self.assertEqual(collector.invalid['day_exceeds_month'], 1)
+        self.assertGreater(collector.backtracks['month'], 0)
+        self.assertGreater(collector.wall_time, 0)
+
+    def test_weekday_search(self):
+        """Every 5th Wednesday: months without 5th Wednesday are skipped
+        """
+        collector = StatsCollector()
+        task = ScheduledTask(minutes=[0], hours=[0], days_of_week=[2], days_of_week_num=[4], stats=collector)
+        self.assertEqual(task.get_next_time(datetime(2016, 11, 30, 1, 0)), datetime(2017, 3, 29, 0, 0))
+        self.assertEqual(collector.iterations, 3)
+        self.assertEqual(collector.backtracks['day'], 1)
+        self.assertEqual(collector.backtracks['month'], 1)
+
+    def test_hook(self):
+        """Hook receives every search, collector is shared by tasks
+        """
+        searches = []
+        collector = StatsCollector(hook=lambda task, search_stats: searches.append((task, search_stats)))
+        hourly = ScheduledTask(minutes=[0], stats=collector)
+        daily = ScheduledTask(minutes=[0], hours=[0], stats=collector)
+        hourly.get_next_time(datetime(2016, 11, 12, 23, 10))
+        daily.get_previous_time(datetime(2016, 11, 12, 23, 10))
+        self.assertEqual([(task, search_stats.direction) for task, search_stats in searches],
+                         [(hourly, 1), (daily, -1)])
+        self.assertEqual(collector.searches, 2)
+        self.assertEqual(collector.iterations, sum(search_stats.iterations for _, search_stats in searches))
+
+    def test_failed_search(self):
+        """Searches exceeding max_iterations are recorded as failed
+        """
+        searches = []
+        collector = StatsCollector(hook=lambda task, search_stats: searches.append(search_stats))
+        task = ScheduledTask(days=[30], months=[2], stats=collector)
+        with self.assertRaises(ValueError):
+            task.get_next_time(datetime(2016, 1, 1))
+        self.assertEqual((collector.searches, collector.failures), (1, 1))
+        self.assertEqual(collector.iterations, task.max_iterations)
+        self.assertTrue(searches[0].failed)
+
+    def test_disabled(self):
+        self.assertIsNone(ScheduledTask(minutes=[0]).stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone, tzinfo
+from scheduledtask import ScheduledTask
+from scheduledtask.misfire import MisfirePolicy
+from scheduledtask.scheduledtask import SearchEngine
+from scheduledtask.store import ScheduleStore
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+
+class TestScheduleStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'schedule.sqlite')
+        self.store = ScheduleStore(self.path)
+        self.store.add('every_30_minutes', ScheduledTask(minutes=[0, 30]), datetime(2016, 11, 12, 23, 10))
+        self.store.add('hourly', ScheduledTask(minutes=[0]), datetime(2016, 11, 12, 23, 10))
+        self.store.add('daily', ScheduledTask(minutes=[0], hours=[0]), datetime(2016, 11, 12, 23, 10))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_peek_next(self):
+        self.assertEqual(self.store.peek_next(), (datetime(2016, 11, 12, 23, 30), 'every_30_minutes'))
+        self.assertEqual(len(self.store), 3)
+        self.assertIn('daily', self.store)
+
+    def test_pop_due(self):
+        due = self.store.pop_due(datetime(2016, 11, 13, 0, 30))
+        self.assertEqual([(time, name) for time, name, _ in due],
+                         [(datetime(2016, 11, 12, 23, 30), 'every_30_minutes'),
+                          (datetime(2016, 11, 13, 0, 0), 'daily'), (datetime(2016, 11, 13, 0, 0), 'every_30_minutes'),
+                          (datetime(2016, 11, 13, 0, 0), 'hourly'),
+                          (datetime(2016, 11, 13, 0, 30), 'every_30_minutes')])
+        self.assertEqual(self.store.get_next_time('daily'), datetime(2016, 11, 14, 0, 0))
+        self.assertEqual(self.store.pop_due(datetime(2016, 11, 13, 0, 59)), [])
+
+    def test_pop_due_fire_once(self):
+        """After a downtime every due task is returned once, for its last missed execution time
+        """
+        due = self.store.pop_due(datetime(2016, 11, 14, 10, 45), MisfirePolicy.fire_once)
+        self.assertEqual([(time, name) for time, name, _ in due],
+                         [(datetime(2016, 11, 14, 0, 0), 'daily'), (datetime(2016, 11, 14, 10, 0), 'hourly'),
+                          (datetime(2016, 11, 14, 10, 30), 'every_30_minutes')])
+        self.assertEqual(self.store.peek_next(), (datetime(2016, 11, 14, 11, 0), 'every_30_minutes'))
+
+    def test_pop_due_skip(self):
+        self.assertEqual(self.store.pop_due(datetime(2016, 11, 14, 10, 45), MisfirePolicy.skip), [])
+        self.assertEqual(self.store.get_next_time('daily'), datetime(2016, 11, 15, 0, 0))
+        due = self.store.pop_due(datetime(2016, 11, 14, 11, 0))
+        self.assertEqual([(time, name) for time, name, _ in due],
+                         [(datetime(2016, 11, 14, 11, 0), 'every_30_minutes'),
+                          (datetime(2016, 11, 14, 11, 0), 'hourly')])
+
+    def test_reopen(self):
+        """Restarted store loads due tasks with the stored next execution times
+        """
+        self.store.pop_due(datetime(2016, 11, 13, 0, 0))
+        self.store.close()
+        self.store = ScheduleStore(self.path)
+        self.assertEqual(self.store.peek_next(), (datetime(2016, 11, 13, 0, 30), 'every_30_minutes'))
+        due = self.store.pop_due(datetime(2016, 11, 13, 1, 0))
+        self.assertEqual([(time, name) for time, name, _ in due],
+                         [(datetime(2016, 11, 13, 0, 30), 'every_30_minutes'),
+                          (datetime(2016, 11, 13, 1, 0), 'every_30_minutes'), (datetime(2016, 11, 13, 1, 0), 'hourly')])
+        self.assertEqual(self.store.get('hourly').candidates[0], [0])
+
+    def test_stored_rules(self):
+        """Tasks are stored as JSON of their rules and settings and rebuilt from them after reopening
+        """
+        task = ScheduledTask(seconds=[0, 30], minutes=range(0, 60, 15), days=[-1], nearest_weekday=True,
+                             max_iterations=50, engine=SearchEngine.compiled, cache_size=8,
+                             tz=timezone(timedelta(hours=-5)))
+        self.store.add('quarterly', task, datetime(2016, 11, 12, 23, 10))
+        self.store.close()
+        self.store = ScheduleStore(self.path)
+        loaded = self.store.get('quarterly')
+        self.assertIs(loaded.schedule, task.schedule)
+        self.assertEqual((loaded.max_iterations, loaded.engine, loaded.tz, loaded.cache.maxsize),
+                         (50, SearchEngine.compiled, timezone(timedelta(hours=-5)), 8))
+        stored = self.store._connection.execute("SELECT task FROM tasks WHERE name = 'quarterly'").fetchone()[0]
+        self.assertEqual(json.loads(stored)['rules'],
+                         {'seconds': [0, 30], 'minutes': {'start': 0, 'stop': 60, 'step': 15}, 'days': [-1],
+                          'nearest_weekday': True})
+
+    def test_unsupported_timezone(self):
+        class Zone(tzinfo):
+            def utcoffset(self, dt):
+                return timedelta(hours=1)
+
+            def dst(self, dt):
+                return timedelta(0)
+
+        with self.assertRaises(ValueError):
+            self.store.add('zone', ScheduledTask(minutes=[0], tz=Zone()), datetime(2016, 11, 12, 23, 10))
+        self.assertNotIn('zone', self.store)
+
+    def test_add_replaces(self):
+        self.store.add('daily', ScheduledTask(minutes=[0], hours=[6]), datetime(2016, 11, 12, 23, 10))
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.get_next_time('daily'), datetime(2016, 11, 13, 6, 0))
+
+    def test_add_many(self):
+        self.store.add_many([('a', ScheduledTask(minutes=[15])), ('b', ScheduledTask(minutes=[20]))],
+                            datetime(2016, 11, 12, 23, 10))
+        self.assertEqual(len(self.store), 5)
+        self.assertEqual(self.store.peek_next(), (datetime(2016, 11, 12, 23, 15), 'a'))
+
+    def test_remove(self):
+        self.store.remove('every_30_minutes')
+        self.assertNotIn('every_30_minutes', self.store)
+        self.assertEqual(self.store.peek_next(), (datetime(2016, 11, 13, 0, 0), 'daily'))
+        with self.assertRaises(KeyError):
+            self.store.remove('every_30_minutes')
+
+    def test_never_executed(self):
+        self.assertIsNone(self.store.add('past', ScheduledTask(years=[2000]), datetime(2016, 11, 12)))
+        self.assertEqual(self.store.peek_next(), (datetime(2016, 11, 12, 23, 30), 'every_30_minutes'))
+
+    @unittest.skipIf(ZoneInfo is None, "zoneinfo is not available")
+    def test_timezone(self):
+        """Times of tasks with timezone are stored in UTC and returned in the task timezone
+        """
+        tz = ZoneInfo('Europe/Berlin')
+        self.store.add('berlin', ScheduledTask(minutes=[0], hours=[0], tz=tz), datetime(2016, 11, 12, 22, 50))
+        self.assertEqual(self.store.peek_next(), (datetime(2016, 11, 13, 0, 0, tzinfo=tz), 'berlin'))
+        due = self.store.pop_due(datetime(2016, 11, 12, 23, 30, tzinfo=timezone.utc))
+        self.assertEqual([name for _, name, _ in due], ['berlin', 'every_30_minutes'])
+        self.assertEqual(self.store.get_next_time('berlin'), datetime(2016, 11, 14, 0, 0, tzinfo=tz))
+        self.store.close()
+        self.store = ScheduleStore(self.path)
+        self.assertEqual(self.store.get('berlin').tz, tz)
+        self.assertEqual(self.store.get_next_time('berlin'), datetime(2016, 11, 14, 0, 0, tzinfo=tz))
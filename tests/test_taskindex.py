@@ -0,0 +1,96 @@
+import unittest
+from scheduledtask import ScheduledTask, TaskIndex
+from scheduledtask.misfire import MisfirePolicy
+from datetime import datetime, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+
+class TestTaskIndex(unittest.TestCase):
+    def setUp(self):
+        self.every_30_minutes = ScheduledTask(minutes=[0, 30])
+        self.hourly = ScheduledTask(minutes=[0])
+        self.daily = ScheduledTask(minutes=[0], hours=[0])
+        self.index = TaskIndex()
+        for task in [self.daily, self.hourly, self.every_30_minutes]:
+            self.index.add(task, datetime(2016, 11, 12, 23, 10))
+
+    def test_peek_next(self):
+        self.assertEqual(self.index.peek_next(), (datetime(2016, 11, 12, 23, 30), self.every_30_minutes))
+        self.assertEqual(len(self.index), 3)
+
+    def test_pop_due_nothing_due(self):
+        self.assertEqual(self.index.pop_due(datetime(2016, 11, 12, 23, 29)), [])
+
+    def test_pop_due(self):
+        self.assertEqual(self.index.pop_due(datetime(2016, 11, 13, 0, 0)),
+                         [(datetime(2016, 11, 12, 23, 30), self.every_30_minutes),
+                          (datetime(2016, 11, 13, 0, 0), self.daily),
+                          (datetime(2016, 11, 13, 0, 0), self.hourly),
+                          (datetime(2016, 11, 13, 0, 0), self.every_30_minutes)])
+        # Tasks are re-inserted with their following execution time
+        self.assertEqual(self.index.peek_next(), (datetime(2016, 11, 13, 0, 30), self.every_30_minutes))
+        self.assertEqual(len(self.index), 3)
+
+    def test_remove(self):
+        self.index.remove(self.every_30_minutes)
+        self.assertNotIn(self.every_30_minutes, self.index)
+        self.assertEqual(self.index.peek_next(), (datetime(2016, 11, 13, 0, 0), self.daily))
+        self.assertEqual(len(self.index), 2)
+
+    def test_add_never_executed(self):
+        task = ScheduledTask(minutes=[0], hours=[0], days=[1], months=[1], years=[2015])
+        self.assertIsNone(self.index.add(task, datetime(2016, 11, 12, 23, 10)))
+        self.assertNotIn(task, self.index)
+
+    def test_pop_due_fire_once(self):
+        """After a downtime every due task is returned once, for its last missed execution time
+        """
+        self.assertEqual(self.index.pop_due(datetime(2016, 11, 14, 10, 45), MisfirePolicy.fire_once),
+                         [(datetime(2016, 11, 14, 0, 0), self.daily),
+                          (datetime(2016, 11, 14, 10, 0), self.hourly),
+                          (datetime(2016, 11, 14, 10, 30), self.every_30_minutes)])
+        self.assertEqual(self.index.peek_next()[0], datetime(2016, 11, 14, 11, 0))
+        self.assertEqual(len(self.index), 3)
+
+    def test_pop_due_skip(self):
+        self.assertEqual(self.index.pop_due(datetime(2016, 11, 14, 10, 45), MisfirePolicy.skip), [])
+        self.assertEqual(self.index.pop_due(datetime(2016, 11, 14, 11, 0)),
+                         [(datetime(2016, 11, 14, 11, 0), self.every_30_minutes),
+                          (datetime(2016, 11, 14, 11, 0), self.hourly)])
+
+    def test_pop_due_seconds(self):
+        """Tasks with seconds rule are re-inserted with the following second they are executed at
+        """
+        heartbeat = ScheduledTask(seconds=range(0, 60, 20))
+        index = TaskIndex()
+        index.add(heartbeat, datetime(2016, 11, 12, 23, 10, 5))
+        self.assertEqual(index.pop_due(datetime(2016, 11, 12, 23, 11)),
+                         [(datetime(2016, 11, 12, 23, 10, 20), heartbeat),
+                          (datetime(2016, 11, 12, 23, 10, 40), heartbeat),
+                          (datetime(2016, 11, 12, 23, 11, 0), heartbeat)])
+        self.assertEqual(index.peek_next(), (datetime(2016, 11, 12, 23, 11, 20), heartbeat))
+
+    @unittest.skipIf(ZoneInfo is None, "zoneinfo is not available")
+    def test_timezone(self):
+        """Tasks with timezone are ordered in UTC together with naive tasks and returned in their timezone
+        """
+        tz = ZoneInfo('Europe/Berlin')
+        berlin = ScheduledTask(minutes=[0], hours=[0], tz=tz)
+        self.index.add(berlin, datetime(2016, 11, 12, 22, 50))
+        self.assertEqual(self.index.peek_next(), (datetime(2016, 11, 13, 0, 0, tzinfo=tz), berlin))
+        self.assertEqual(self.index.pop_due(datetime(2016, 11, 12, 23, 30, tzinfo=timezone.utc)),
+                         [(datetime(2016, 11, 13, 0, 0, tzinfo=tz), berlin),
+                          (datetime(2016, 11, 12, 23, 30), self.every_30_minutes)])
+        self.assertEqual(self.index.pop_due(datetime(2016, 11, 14, 0, 0), MisfirePolicy.fire_once),
+                         [(datetime(2016, 11, 14, 0, 0, tzinfo=tz), berlin),  # 23:00 UTC
+                          (datetime(2016, 11, 14, 0, 0), self.daily),
+                          (datetime(2016, 11, 14, 0, 0), self.hourly),
+                          (datetime(2016, 11, 14, 0, 0), self.every_30_minutes)])
+
+
+if __name__ == '__main__':
+    unittest.main()
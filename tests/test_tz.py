@@ -0,0 +1,137 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from scheduledtask import ScheduledTask
+from scheduledtask.scheduledtask import SearchEngine
+from scheduledtask.tz import TransitionTable, as_utc
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+
+@unittest.skipIf(ZoneInfo is None, "zoneinfo is not available")
+class TestTransitionTable(unittest.TestCase):
+    def setUp(self):
+        self.table = TransitionTable(ZoneInfo('Europe/Berlin'))
+
+    def test_utc_offset(self):
+        self.assertEqual(self.table.utc_offset(datetime(2021, 1, 15)), timedelta(hours=1))
+        self.assertEqual(self.table.utc_offset(datetime(2021, 3, 28, 0, 59)), timedelta(hours=1))
+        self.assertEqual(self.table.utc_offset(datetime(2021, 3, 28, 1, 0)), timedelta(hours=2))
+        self.assertEqual(self.table.utc_offset(datetime(2021, 10, 31, 1, 0)), timedelta(hours=1))
+
+    def test_to_utc(self):
+        self.assertEqual(self.table.to_utc(datetime(2021, 6, 1, 12, 0)), datetime(2021, 6, 1, 10, 0))
+        self.assertEqual(self.table.to_utc(datetime(2021, 3, 28, 2, 30)), datetime(2021, 3, 28, 1, 0))  # Skipped
+        self.assertEqual(self.table.to_utc(datetime(2021, 10, 31, 2, 30)), datetime(2021, 10, 31, 0, 30))  # Repeated
+
+    def test_repeated_until(self):
+        self.assertEqual(self.table.repeated_until(datetime(2021, 10, 31, 0, 30)), None)  # 2:30 CEST
+        self.assertEqual(self.table.repeated_until(datetime(2021, 10, 31, 1, 30)), datetime(2021, 10, 31, 3, 0))
+        self.assertEqual(self.table.repeated_until(datetime(2021, 10, 31, 2, 0)), None)  # 3:00 CET
+
+    def test_new_year(self):
+        """Wall times near the new year are converted with a single year table
+        """
+        table = TransitionTable(ZoneInfo('Pacific/Kiritimati'))  # UTC+14
+        self.assertEqual(table.to_utc(datetime(2021, 1, 1, 6, 0)), datetime(2020, 12, 31, 16, 0))
+        self.assertEqual(table.to_local(datetime(2020, 12, 31, 16, 0)), datetime(2021, 1, 1, 6, 0))
+
+    def test_fixed_offset(self):
+        table = TransitionTable(timezone(timedelta(hours=-5)))
+        self.assertEqual(table.to_utc(datetime(2021, 3, 14, 2, 30)), datetime(2021, 3, 14, 7, 30))
+
+    def test_as_utc(self):
+        self.assertEqual(as_utc(datetime(2021, 6, 1, 12, tzinfo=ZoneInfo('Europe/Berlin'))), datetime(2021, 6, 1, 10))
+        self.assertEqual(as_utc(datetime(2021, 6, 1, 12, 0)), datetime(2021, 6, 1, 12, 0))
+
+
+@unittest.skipIf(ZoneInfo is None, "zoneinfo is not available")
+class TestScheduledTaskTimezone(unittest.TestCase):
+    engine = SearchEngine.fraction
+
+    def setUp(self):
+        self.tz = ZoneInfo('Europe/Berlin')
+
+    def _task(self, **rules):
+        return ScheduledTask(engine=self.engine, tz=self.tz, **rules)
+
+    def test_aware_result(self):
+        task = self._task(minutes=[0], hours=[9])
+        result = task.get_next_time(datetime(2021, 6, 1, 8, 0, tzinfo=timezone.utc))  # 10:00 CEST
+        self.assertEqual(result, datetime(2021, 6, 2, 9, 0, tzinfo=self.tz))
+        self.assertEqual(result.utcoffset(), timedelta(hours=2))
+        self.assertEqual(task.get_previous_time(datetime(2021, 6, 1, 8, 0)), datetime(2021, 6, 1, 9, 0, tzinfo=self.tz))
+
+    def test_skipped_time(self):
+        """2:30 doesn't exist on 28/3/2021, the task is executed when DST starts
+        """
+        task = self._task(minutes=[30], hours=[2])
+        result = task.get_next_time(datetime(2021, 3, 27, 12, 0, tzinfo=self.tz))
+        self.assertEqual(as_utc(result), datetime(2021, 3, 28, 1, 0))
+        self.assertEqual(result.replace(tzinfo=None), datetime(2021, 3, 28, 3, 0))
+        self.assertEqual(as_utc(task.get_previous_time(datetime(2021, 3, 28, 12, 0, tzinfo=self.tz))),
+                         datetime(2021, 3, 28, 1, 0))
+
+    def test_repeated_time(self):
+        """2:30 happens twice on 31/10/2021, the task is executed once
+        """
+        task = self._task(minutes=[30], hours=[2])
+        self.assertEqual(list(map(as_utc, task.iter_next_times(datetime(2021, 10, 30, 12, 0), count=3))),
+                         [datetime(2021, 10, 31, 0, 30), datetime(2021, 11, 1, 1, 30), datetime(2021, 11, 2, 1, 30)])
+        # 2:40 CET, second occurrence
+        self.assertEqual(as_utc(task.get_next_time(datetime(2021, 10, 31, 1, 40))), datetime(2021, 11, 1, 1, 30))
+        self.assertEqual(as_utc(task.get_previous_time(datetime(2021, 10, 31, 1, 20))), datetime(2021, 10, 31, 0, 30))
+
+    def test_every_15_minutes_during_repeated_hour(self):
+        """Repeated wall times are executed once, the following ones are not delayed
+        """
+        task = self._task(minutes=range(0, 60, 15))
+        self.assertEqual(list(map(as_utc, task.iter_next_times(datetime(2021, 10, 31, 0, 40), count=4))),
+                         [datetime(2021, 10, 31, 0, 45), datetime(2021, 10, 31, 2, 0), datetime(2021, 10, 31, 2, 15),
+                          datetime(2021, 10, 31, 2, 30)])
+        self.assertEqual(list(map(as_utc, task.iter_previous_times(datetime(2021, 10, 31, 2, 10), count=3))),
+                         [datetime(2021, 10, 31, 2, 0), datetime(2021, 10, 31, 0, 45), datetime(2021, 10, 31, 0, 30)])
+
+    def test_iter_until(self):
+        task = self._task(minutes=[0], hours=[0])
+        self.assertEqual(list(task.iter_next_times(datetime(2021, 3, 26, tzinfo=self.tz),
+                                                   until=datetime(2021, 3, 28, tzinfo=self.tz))),
+                         [datetime(2021, 3, 26, tzinfo=self.tz), datetime(2021, 3, 27, tzinfo=self.tz),
+                          datetime(2021, 3, 28, tzinfo=self.tz)])
+
+    def test_get_next_times(self):
+        task = self._task(minutes=[0], hours=[0])
+        self.assertEqual(task.get_next_times([datetime(2021, 3, 27, 12, 0), None]),
+                         [datetime(2021, 3, 28, tzinfo=self.tz), None])
+
+    def test_seconds(self):
+        task = self._task(seconds=[0, 30], minutes=[0])
+        self.assertEqual(list(map(as_utc, task.iter_next_times(datetime(2021, 10, 31, 0, 0, 10), count=3))),
+                         [datetime(2021, 10, 31, 0, 0, 30), datetime(2021, 10, 31, 2, 0, 0),
+                          datetime(2021, 10, 31, 2, 0, 30)])
+
+    def test_count_between(self):
+        """Skipped and repeated hours are executed once
+        """
+        task = self._task(minutes=range(0, 60, 15))
+        march = (datetime(2021, 3, 27, 23, tzinfo=timezone.utc), datetime(2021, 3, 28, 3, tzinfo=timezone.utc))
+        october = (datetime(2021, 10, 30, 22, tzinfo=timezone.utc), datetime(2021, 10, 31, 3, tzinfo=timezone.utc))
+        self.assertEqual(task.count_between(*march), 16)  # 2:00-2:45 are executed together with 3:00
+        self.assertEqual(task.count_between(*october), 16)  # 5 hours, 2:00-2:45 are executed once
+        for start, end in (march, october):
+            self.assertEqual(task.count_between(start, end), len(list(task.occurrences_between(start, end))))
+
+    def test_next_time_cached(self):
+        task = self._task(minutes=range(0, 60, 15))
+        for minutes in range(0, 180, 7):
+            current_time = datetime(2021, 10, 31, 0, 0, 30) + timedelta(minutes=minutes)  # Repeated hour from 0:00
+            self.assertEqual(task.next_time_cached(current_time), task.get_next_time(current_time))
+            last_run = current_time - timedelta(minutes=15)  # Not due during the second occurrence of the hour
+            self.assertEqual(task.is_due(current_time, last_run),
+                             as_utc(task.get_previous_time(current_time)) > last_run)
+
+
+class TestScheduledTaskTimezoneCompiledEngine(TestScheduledTaskTimezone):
+    engine = SearchEngine.compiled
@@ -1,4 +1,5 @@
 import unittest
+import calendar
 from datetime import datetime
 from scheduledtask import utils
 
@@ -31,6 +32,46 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(utils.get_smallest_value_greater_or_equal_to(range(7, 30, 5), 15), 17)
         self.assertEqual(utils.get_smallest_value_greater_or_equal_to(range(7, 30, 5), 26), 27)
 
+    def test_candidate_set_next(self):
+        self.assertEqual(utils.CandidateSet([1, 2, 3]).next(2), 2)
+        self.assertEqual(utils.CandidateSet([10, 1, 5]).next(7), 10)
+        self.assertEqual(utils.CandidateSet([1, 5, 15]).next(16), None)
+        self.assertEqual(utils.CandidateSet([5, 15, 30]).next(3), 5)
+        self.assertEqual(utils.CandidateSet(range(5, 15)).next(20), None)
+        self.assertEqual(utils.CandidateSet(range(5, 10, 2)).next(8), 9)
+        self.assertEqual(utils.CandidateSet(range(7, 30, 5)).next(26), 27)
+
+    def test_candidate_set_previous(self):
+        self.assertEqual(utils.CandidateSet([1, 2, 3]).previous(2), 2)
+        self.assertEqual(utils.CandidateSet([10, 1, 5]).previous(7), 5)
+        self.assertEqual(utils.CandidateSet([1, 5, 15]).previous(16), 15)
+        self.assertEqual(utils.CandidateSet([5, 15, 30]).previous(3), None)
+        self.assertEqual(utils.CandidateSet(range(5, 15)).previous(20), 14)
+        self.assertEqual(utils.CandidateSet(range(5, 10, 2)).previous(8), 7)
+        self.assertEqual(utils.CandidateSet(range(7, 30, 5)).previous(15), 12)
+
+    def test_candidate_set_first_last(self):
+        self.assertEqual(utils.first(utils.CandidateSet([30, 5, 15])), 5)
+        self.assertEqual(utils.last(utils.CandidateSet([30, 5, 15])), 30)
+        self.assertEqual(utils.last(utils.CandidateSet(range(7, 30, 5))), 27)
+
+    def test_candidate_set_count_below(self):
+        self.assertEqual(utils.CandidateSet([30, 5, 15]).count_below(15), 1)
+        self.assertEqual(utils.CandidateSet([30, 5, 15]).count_below(16), 2)
+        self.assertEqual(utils.CandidateSet([30, 5, 15]).count_below(5), 0)
+        self.assertEqual(utils.CandidateSet([30, 5, 15]).count_below(31), 3)
+        self.assertEqual(utils.CandidateSet(range(7, 30, 5)).count_below(12), 1)
+        self.assertEqual(utils.CandidateSet(range(7, 30, 5)).count_below(13), 2)
+        self.assertEqual(utils.CandidateSet(range(7, 30, 5)).count_below(60), 5)
+
+    def test_candidate_set_contains(self):
+        self.assertIn(5, utils.CandidateSet([30, 5, 15]))
+        self.assertNotIn(6, utils.CandidateSet([30, 5, 15]))
+        self.assertIn(12, utils.CandidateSet(range(7, 30, 5)))
+        self.assertNotIn(13, utils.CandidateSet(range(7, 30, 5)))
+        self.assertEqual(list(utils.CandidateSet([30, 5, 15])), [5, 15, 30])
+        self.assertEqual(len(utils.CandidateSet(range(7, 30, 5))), 5)
+
     def test_first(self):
         self.assertEqual(utils.first([1, 2, 3]), 1)
         self.assertEqual(utils.first(range(2, 15)), 2)
@@ -80,3 +121,23 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(utils.max_week_num(2016, 12), 4)
         self.assertEqual(utils.max_week_num(2017, 1), 5)
         self.assertEqual(utils.max_week_num(2017, 4), 4)
+
+    def test_calendar_table(self):
+        """Table matches the calendar module for every month of the filled years, including both ends of the range
+        """
+        for year in (1, 4, 100, 1900, 2000, 2016, 2017, 9999):
+            for month in range(1, 13):
+                self.assertEqual((utils.first_weekday(year, month), utils.num_days_in_month(year, month)),
+                                 calendar.monthrange(year, month))
+        with self.assertRaises(ValueError):
+            utils.num_days_in_month(10000, 1)
+        with self.assertRaises(ValueError):
+            utils.first_weekday(2016, 13)
+
+    def test_nearest_weekday(self):
+        self.assertEqual(utils.nearest_weekday(1, 5, 31), 3)  # Saturday 1/10/2016, Monday after
+        self.assertEqual(utils.nearest_weekday(2, 5, 31), 3)  # Sunday 2/10/2016, Monday after
+        self.assertEqual(utils.nearest_weekday(8, 5, 31), 7)  # Saturday 8/10/2016, Friday before
+        self.assertEqual(utils.nearest_weekday(30, 5, 31), 31)  # Sunday 30/10/2016, Monday after
+        self.assertEqual(utils.nearest_weekday(30, 5, 30), 28)  # Sunday 30/4/2017, Friday before
+        self.assertEqual(utils.nearest_weekday(12, 5, 31), 12)  # Wednesday 12/10/2016
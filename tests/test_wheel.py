@@ -0,0 +1,111 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from scheduledtask import ScheduledTask
+from scheduledtask.misfire import MisfirePolicy
+from scheduledtask.wheel import TimingWheel
+
+
+class TestTimingWheel(unittest.TestCase):
+    def setUp(self):
+        self.every_30_minutes = ScheduledTask(minutes=[0, 30])
+        self.hourly = ScheduledTask(minutes=[0])
+        self.daily = ScheduledTask(minutes=[0], hours=[0])
+        self.monthly = ScheduledTask(minutes=[0], hours=[0], days=[1])
+        self.wheel = TimingWheel(datetime(2016, 11, 12, 23, 10), lookahead_days=7)
+        for task in [self.daily, self.hourly, self.every_30_minutes, self.monthly]:
+            self.wheel.add(task)
+
+    def test_pop_due_nothing_due(self):
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 12, 23, 29)), [])
+        self.assertEqual(len(self.wheel), 4)
+
+    def test_pop_due(self):
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 13, 0, 0)),
+                         [(datetime(2016, 11, 12, 23, 30), self.every_30_minutes),
+                          (datetime(2016, 11, 13, 0, 0), self.daily),
+                          (datetime(2016, 11, 13, 0, 0), self.hourly),
+                          (datetime(2016, 11, 13, 0, 0), self.every_30_minutes)])
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 13, 0, 30)),
+                         [(datetime(2016, 11, 13, 0, 30), self.every_30_minutes)])
+
+    def test_pop_due_beyond_lookahead(self):
+        """Entries later than the day slots are fired in the round of their date
+        """
+        due = self.wheel.pop_due(datetime(2016, 12, 1, 0, 0))
+        self.assertEqual(len(due), (18 * 48 + 2) + (18 * 24 + 1) + (18 + 1) + 1)
+        self.assertEqual(due[-1], (datetime(2016, 12, 1, 0, 0), self.every_30_minutes))
+        self.assertEqual([time for time, task in due if task is self.monthly], [datetime(2016, 12, 1, 0, 0)])
+        self.assertEqual(due, sorted(due, key=lambda entry: entry[0]))
+
+    def test_pop_due_fire_once(self):
+        """After a downtime every due task is returned once, for its last missed execution time
+        """
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 14, 10, 45), MisfirePolicy.fire_once),
+                         [(datetime(2016, 11, 14, 0, 0), self.daily),
+                          (datetime(2016, 11, 14, 10, 0), self.hourly),
+                          (datetime(2016, 11, 14, 10, 30), self.every_30_minutes)])
+        self.assertEqual(len(self.wheel), 4)
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 14, 11, 0)),
+                         [(datetime(2016, 11, 14, 11, 0), self.every_30_minutes),
+                          (datetime(2016, 11, 14, 11, 0), self.hourly)])
+
+        heartbeat = ScheduledTask(seconds=[0, 30])
+        wheel = TimingWheel(datetime(2024, 1, 1))
+        wheel.add(heartbeat)
+        self.assertEqual(wheel.pop_due(datetime(2024, 1, 2), MisfirePolicy.fire_once),
+                         [(datetime(2024, 1, 2), heartbeat)])
+        self.assertEqual(len(wheel.pop_due(datetime(2024, 1, 3))), 2 * 24 * 60)
+
+    def test_pop_due_skip(self):
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 14, 10, 45), MisfirePolicy.skip), [])
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 14, 11, 0)),
+                         [(datetime(2016, 11, 14, 11, 0), self.every_30_minutes),
+                          (datetime(2016, 11, 14, 11, 0), self.hourly)])
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 12, 1, 0, 0), MisfirePolicy.skip), [])
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 12, 1, 0, 30)),
+                         [(datetime(2016, 12, 1, 0, 30), self.every_30_minutes)])
+
+    def test_pop_due_seconds(self):
+        heartbeat = ScheduledTask(seconds=range(0, 60, 20))
+        self.wheel.add(heartbeat, datetime(2016, 11, 12, 23, 10, 5))
+        self.assertEqual([time for time, task in self.wheel.pop_due(datetime(2016, 11, 12, 23, 11, 30))],
+                         [datetime(2016, 11, 12, 23, 10, 20), datetime(2016, 11, 12, 23, 10, 40),
+                          datetime(2016, 11, 12, 23, 11, 0), datetime(2016, 11, 12, 23, 11, 20)])
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 12, 23, 11, 40)),
+                         [(datetime(2016, 11, 12, 23, 11, 40), heartbeat)])
+
+    def test_remove(self):
+        self.wheel.remove(self.every_30_minutes)
+        self.assertNotIn(self.every_30_minutes, self.wheel)
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 13, 0, 0)),
+                         [(datetime(2016, 11, 13, 0, 0), self.daily), (datetime(2016, 11, 13, 0, 0), self.hourly)])
+        self.assertEqual(len(self.wheel), 3)
+        with self.assertRaises(KeyError):
+            self.wheel.remove(self.every_30_minutes)
+
+    def test_add_replaces(self):
+        self.assertEqual(self.wheel.add(self.daily, datetime(2016, 11, 13, 0, 1)), datetime(2016, 11, 14, 0, 0))
+        self.assertEqual(len(self.wheel), 4)
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 13, 0, 0)),
+                         [(datetime(2016, 11, 12, 23, 30), self.every_30_minutes),
+                          (datetime(2016, 11, 13, 0, 0), self.hourly),
+                          (datetime(2016, 11, 13, 0, 0), self.every_30_minutes)])
+
+    def test_add_never_executed(self):
+        task = ScheduledTask(minutes=[0], hours=[0], days=[1], months=[1], years=[2015])
+        self.assertIsNone(self.wheel.add(task))
+        self.assertNotIn(task, self.wheel)
+
+    def test_timezone(self):
+        """Tasks with timezone are ordered with the others by UTC time
+        """
+        tz = timezone(timedelta(hours=1))
+        task = ScheduledTask(minutes=[45], tz=tz)
+        self.assertEqual(self.wheel.add(task), datetime(2016, 11, 13, 0, 45, tzinfo=tz))
+        self.assertEqual(self.wheel.pop_due(datetime(2016, 11, 13, 0, 50, tzinfo=tz)),
+                         [(datetime(2016, 11, 12, 23, 30), self.every_30_minutes),
+                          (datetime(2016, 11, 13, 0, 45, tzinfo=tz), task)])
+
+    def test_lookahead_days(self):
+        with self.assertRaises(ValueError):
+            TimingWheel(lookahead_days=0)